@@ -54,12 +54,18 @@ CREATE TABLE IF NOT EXISTS episodes (
     mission_id VARCHAR(100),
     metadata JSONB DEFAULT '{}'::jsonb,
     embedding vector(384),
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    search_tsv tsvector GENERATED ALWAYS AS (
+        to_tsvector('english', COALESCE(summary, '') || ' ' || COALESCE(transcription, ''))
+    ) STORED  -- full-text search (JarvisMemoryPG.search_episodes)
 );
 
 CREATE INDEX IF NOT EXISTS idx_episodes_timestamp ON episodes(timestamp DESC);
 CREATE INDEX IF NOT EXISTS idx_episodes_type ON episodes(episode_type);
 CREATE INDEX IF NOT EXISTS idx_episodes_objects ON episodes USING gin(detected_objects);
+CREATE INDEX IF NOT EXISTS idx_episodes_search ON episodes USING gin(search_tsv);
+CREATE INDEX IF NOT EXISTS idx_episodes_summary_trgm ON episodes USING gin(summary gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_episodes_transcription_trgm ON episodes USING gin(transcription gin_trgm_ops);
 
 -- Create missions table
 CREATE TABLE IF NOT EXISTS missions (
@@ -78,11 +84,10 @@ CREATE TABLE IF NOT EXISTS missions (
 CREATE INDEX IF NOT EXISTS idx_missions_status ON missions(status);
 CREATE INDEX IF NOT EXISTS idx_missions_type ON missions(mission_type);
 
--- Create vector similarity search indexes (using ivfflat for performance)
--- Note: These indexes are created after some data exists for better performance
--- Run these manually after initial data import:
--- CREATE INDEX IF NOT EXISTS idx_nodes_embedding ON nodes USING ivfflat (embedding vector_cosine_ops) WITH (lists = 100);
--- CREATE INDEX IF NOT EXISTS idx_episodes_embedding ON episodes USING ivfflat (embedding vector_cosine_ops) WITH (lists = 100);
+-- Vector similarity search indexes (idx_nodes_embedding, idx_episodes_embedding)
+-- are created by JarvisMemoryPG once a table holds JARVIS_VECTOR_INDEX_MIN_ROWS
+-- rows, and kept tuned as it grows. To build them now:
+--   python3 python/jarvis_memory_pg.py index-vectors --rebuild
 
 -- Insert core nodes
 INSERT INTO nodes (id, node_type, name, category, attributes) VALUES
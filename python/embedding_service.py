@@ -0,0 +1,380 @@
+#!/usr/bin/env python3
+"""
+Jarvis Embedding Service - shared sentence embeddings for the memory backends
+
+The embedding model is loaded on first use rather than at import, so memory
+tools that never embed anything (stats, recent, missions) start in
+milliseconds. Running
+
+    python3 embedding_service.py serve
+
+keeps a single copy of the model resident: other processes send it batches
+of texts over a local socket, requests that arrive together are encoded in
+one model call, and vectors are cached by text hash. When no server is
+running, embed() loads the model in-process instead.
+
+Model backends (JARVIS_EMBED_BACKEND):
+- torch: sentence-transformers default
+- onnx: ONNX Runtime export of the same model
+- onnx-int8: int8-quantized ONNX model, smallest and fastest on CPU
+"""
+
+import os
+import sys
+import json
+import time
+import queue
+import socket
+import hashlib
+import platform
+import threading
+import socketserver
+import importlib.util
+from collections import OrderedDict
+from typing import Optional, List, Dict
+
+EMBEDDING_MODEL_NAME = os.environ.get('JARVIS_EMBED_MODEL', 'all-MiniLM-L6-v2')
+EMBEDDING_DIM = 384  # all-MiniLM-L6-v2
+
+EMBED_BACKEND = os.environ.get('JARVIS_EMBED_BACKEND', 'torch')
+# Quantized file inside the model repo; picked per CPU when unset
+ONNX_INT8_FILE = os.environ.get('JARVIS_EMBED_ONNX_FILE')
+
+# Embedding server (embedding_service.py serve)
+SERVER_HOST = os.environ.get('JARVIS_EMBED_HOST', '127.0.0.1')
+SERVER_PORT = int(os.environ.get('JARVIS_EMBED_PORT', '5611'))
+SERVER_SOCKET = os.environ.get('JARVIS_EMBED_SOCKET')  # Unix socket instead of TCP
+USE_SERVER = os.environ.get('JARVIS_EMBED_SERVER', '1') != '0'
+CONNECT_TIMEOUT = 0.5
+REQUEST_TIMEOUT = 60.0
+SERVER_RETRY_INTERVAL = 60.0  # seconds before retrying an unreachable server
+
+CACHE_ENTRIES = int(os.environ.get('JARVIS_EMBED_CACHE', '4096'))
+
+# Server-side batching: wait this long for more requests to share a model call
+BATCH_WAIT = 0.005
+BATCH_MAX_TEXTS = 256
+
+
+# === Model ===
+
+_model_lock = threading.Lock()
+_model_instance = None
+
+
+def _onnx_int8_file() -> str:
+    if ONNX_INT8_FILE:
+        return ONNX_INT8_FILE
+    if platform.machine().lower() in ('aarch64', 'arm64'):
+        return 'onnx/model_qint8_arm64.onnx'
+    return 'onnx/model_quint8_avx2.onnx'
+
+
+def _load_model():
+    from sentence_transformers import SentenceTransformer
+    
+    if EMBED_BACKEND == 'torch':
+        return SentenceTransformer(EMBEDDING_MODEL_NAME)
+    if EMBED_BACKEND == 'onnx':
+        return SentenceTransformer(EMBEDDING_MODEL_NAME, backend='onnx')
+    if EMBED_BACKEND == 'onnx-int8':
+        return SentenceTransformer(EMBEDDING_MODEL_NAME, backend='onnx',
+                                   model_kwargs={'file_name': _onnx_int8_file()})
+    raise ValueError(f"Unknown JARVIS_EMBED_BACKEND: {EMBED_BACKEND}")
+
+
+def _model():
+    """The embedding model, loaded on first use (None if not installed)"""
+    global _model_instance
+    with _model_lock:
+        if _model_instance is None:
+            if importlib.util.find_spec('sentence_transformers') is None:
+                print("[Embed] sentence-transformers not available, semantic search disabled", file=sys.stderr)
+                _model_instance = False
+            else:
+                start = time.time()
+                _model_instance = _load_model()
+                print(f"[Embed] Loaded {EMBEDDING_MODEL_NAME} ({EMBED_BACKEND}) in {time.time() - start:.1f}s",
+                      file=sys.stderr)
+        return _model_instance or None
+
+
+class EmbeddingCache:
+    """LRU of embeddings keyed by a hash of the model name and text"""
+    
+    def __init__(self, max_entries: int = CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def _key(text: str) -> bytes:
+        return hashlib.sha1(f"{EMBEDDING_MODEL_NAME}\0{text}".encode('utf-8')).digest()
+    
+    def get_many(self, texts: List[str]) -> List[Optional[List[float]]]:
+        vectors = []
+        with self._lock:
+            for text in texts:
+                key = self._key(text)
+                vector = self._entries.get(key)
+                if vector is None:
+                    self.misses += 1
+                else:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                vectors.append(vector)
+        return vectors
+    
+    def put_many(self, texts: List[str], vectors: List[List[float]]):
+        with self._lock:
+            for text, vector in zip(texts, vectors):
+                self._entries[self._key(text)] = vector
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def stats(self) -> Dict:
+        with self._lock:
+            return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+
+_cache = EmbeddingCache()
+
+
+def _encode(texts: List[str]) -> List[List[float]]:
+    """Embed texts with the in-process model, encoding only cache misses"""
+    vectors = _cache.get_many(texts)
+    missing = list(dict.fromkeys(text for text, vector in zip(texts, vectors) if vector is None))
+    if missing:
+        model = _model()
+        if model is None:
+            raise RuntimeError("sentence-transformers is not installed (pip install sentence-transformers)")
+        encoded = model.encode(missing, normalize_embeddings=True, convert_to_numpy=True,
+                               show_progress_bar=False).tolist()
+        _cache.put_many(missing, encoded)
+        by_text = dict(zip(missing, encoded))
+        vectors = [by_text[text] if vector is None else vector for text, vector in zip(texts, vectors)]
+    return vectors
+
+
+# === Client ===
+
+_serving = False  # True inside the server process, which never calls itself
+_server_retry_at = 0.0
+
+
+def _request(payload: Dict) -> Dict:
+    """Send one JSON-lines request to the embedding server"""
+    if SERVER_SOCKET:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(CONNECT_TIMEOUT)
+        sock.connect(SERVER_SOCKET)
+    else:
+        sock = socket.create_connection((SERVER_HOST, SERVER_PORT), timeout=CONNECT_TIMEOUT)
+    with sock:
+        sock.settimeout(REQUEST_TIMEOUT)
+        sock.sendall((json.dumps(payload) + '\n').encode('utf-8'))
+        with sock.makefile('rb') as f:
+            line = f.readline()
+    if not line:
+        raise ConnectionError("Embedding server closed the connection")
+    response = json.loads(line)
+    if not response.get('success'):
+        raise RuntimeError(f"Embedding server: {response.get('error')}")
+    return response
+
+
+def _server_request(payload: Dict) -> Optional[Dict]:
+    """A server response, or None if no server is reachable (remembered for a while)"""
+    global _server_retry_at
+    if not USE_SERVER or _serving or time.monotonic() < _server_retry_at:
+        return None
+    try:
+        return _request(payload)
+    except OSError:
+        _server_retry_at = time.monotonic() + SERVER_RETRY_INTERVAL
+        return None
+
+
+def embed(texts: List[str]) -> List[List[float]]:
+    """
+    Unit-length embeddings, one per text: from the shared server when one is
+    running, otherwise from a model loaded in this process.
+    """
+    if not texts:
+        return []
+    response = _server_request({'cmd': 'embed', 'texts': list(texts)})
+    if response is not None:
+        return response['vectors']
+    return _encode(list(texts))
+
+
+def available() -> bool:
+    """Whether embed() can work: sentence-transformers is installed or a server is up"""
+    if _model_instance:
+        return True
+    if _model_instance is None and importlib.util.find_spec('sentence_transformers') is not None:
+        return True
+    return _server_request({'cmd': 'ping'}) is not None
+
+
+# === Server ===
+
+class _Job:
+    __slots__ = ('texts', 'vectors', 'error', 'done')
+    
+    def __init__(self, texts: List[str]):
+        self.texts = texts
+        self.vectors = None
+        self.error = None
+        self.done = threading.Event()
+
+
+class _Batcher:
+    """Encodes requests that arrive within BATCH_WAIT of each other in one model call"""
+    
+    def __init__(self):
+        self._jobs = queue.Queue()
+        threading.Thread(target=self._run, name='embed-batcher', daemon=True).start()
+    
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        job = _Job(texts)
+        self._jobs.put(job)
+        job.done.wait()
+        if job.error is not None:
+            raise job.error
+        return job.vectors
+    
+    def _run(self):
+        while True:
+            jobs = [self._jobs.get()]
+            count = len(jobs[0].texts)
+            deadline = time.monotonic() + BATCH_WAIT
+            while count < BATCH_MAX_TEXTS:
+                try:
+                    job = self._jobs.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                jobs.append(job)
+                count += len(job.texts)
+            
+            try:
+                vectors = _encode([text for job in jobs for text in job.texts])
+            except Exception as e:
+                vectors = None
+                for job in jobs:
+                    job.error = e
+            
+            start = 0
+            for job in jobs:
+                if vectors is not None:
+                    job.vectors = vectors[start:start + len(job.texts)]
+                    start += len(job.texts)
+                job.done.set()
+
+
+def handle_request(request: Dict, batcher: _Batcher) -> Dict:
+    """Answer one server request: {"cmd": "embed"|"ping", ...}"""
+    cmd = request.get('cmd')
+    
+    if cmd == 'ping':
+        return {'success': True, 'model': EMBEDDING_MODEL_NAME, 'backend': EMBED_BACKEND,
+                'cache': _cache.stats()}
+    
+    if cmd == 'embed':
+        texts = request['texts']
+        if not isinstance(texts, list) or not all(isinstance(t, str) for t in texts):
+            return {'success': False, 'error': "texts must be a list of strings"}
+        return {'success': True, 'vectors': batcher.embed(texts)}
+    
+    return {'success': False, 'error': f"Unknown command: {cmd}"}
+
+
+class _EmbeddingRequestHandler(socketserver.StreamRequestHandler):
+    """JSON lines: one request object per line, one response object per line"""
+    
+    def handle(self):
+        for line in self.rfile:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                response = handle_request(json.loads(line), self.server.batcher)
+            except KeyError as e:
+                response = {'success': False, 'error': f"Missing field: {e.args[0]}"}
+            except Exception as e:
+                response = {'success': False, 'error': str(e)}
+            self.wfile.write((json.dumps(response) + '\n').encode('utf-8'))
+            self.wfile.flush()
+
+
+class EmbeddingTCPServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class EmbeddingUnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def serve(host: str = SERVER_HOST, port: int = SERVER_PORT, socket_path: str = SERVER_SOCKET):
+    """Run the shared embedding server so only one copy of the model is in RAM"""
+    global _serving
+    _serving = True
+    
+    # Load the model up front so the first request doesn't wait for it
+    if _model() is None:
+        sys.exit(1)
+    
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        server = EmbeddingUnixServer(socket_path, _EmbeddingRequestHandler)
+        where = socket_path
+    else:
+        server = EmbeddingTCPServer((host, port), _EmbeddingRequestHandler)
+        where = f"{host}:{port}"
+    server.batcher = _Batcher()
+    
+    print(f"[Embed] Serving {EMBEDDING_MODEL_NAME} ({EMBED_BACKEND}) on {where}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if socket_path and os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+
+if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Jarvis Embedding Service")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    
+    serve_parser = subparsers.add_parser("serve", help="Run the shared embedding server (JSON lines over TCP or a Unix socket)")
+    serve_parser.add_argument("--host", default=SERVER_HOST)
+    serve_parser.add_argument("--port", type=int, default=SERVER_PORT)
+    serve_parser.add_argument("--socket", default=SERVER_SOCKET, help="Listen on this Unix socket path instead of TCP")
+    
+    embed_parser = subparsers.add_parser("embed", help="Embed texts and print the vectors as JSON")
+    embed_parser.add_argument("texts", nargs="+")
+    
+    subparsers.add_parser("ping", help="Check whether the embedding server is running")
+    
+    args = parser.parse_args()
+    
+    if args.command == "serve":
+        serve(args.host, args.port, socket_path=args.socket)
+    
+    elif args.command == "embed":
+        print(json.dumps(embed(args.texts)))
+    
+    elif args.command == "ping":
+        response = _server_request({'cmd': 'ping'})
+        if response is None:
+            print("Embedding server not running")
+            sys.exit(1)
+        print(json.dumps(response, indent=2))
@@ -11,10 +11,21 @@ This module implements a hybrid memory architecture combining:
 Storage: NetworkX graph with JSON persistence (fallback when PostgreSQL unavailable)
 """
 
+import gc
 import os
+import re
 import sys
 import json
+import fcntl
+import mmap
 import time
+import sqlite3
+import atexit
+import threading
+from array import array
+from collections import defaultdict
+from contextlib import contextmanager
+from itertools import repeat
 from datetime import datetime
 from pathlib import Path
 from typing import Optional, Dict, List, Any, Tuple
@@ -24,8 +35,12 @@ import networkx as nx
 
 # Data directories
 DATA_DIR = Path(os.path.expanduser("~/optidex/data/memory"))
-GRAPH_FILE = DATA_DIR / "knowledge_graph.json"
+GRAPH_FILE = DATA_DIR / "knowledge_graph.snap"
+GRAPH_LOG_FILE = DATA_DIR / "knowledge_graph.log"
+LEGACY_GRAPH_FILE = DATA_DIR / "knowledge_graph.json"  # read once, then replaced by GRAPH_FILE
 EPISODES_DIR = DATA_DIR / "episodes"
+EPISODE_INDEX_FILE = DATA_DIR / "episode_index.db"
+EPISODE_SEGMENT_MAX_BYTES = 16 * 1024 * 1024  # start a new part of the day's segment past this
 MISSIONS_DIR = DATA_DIR / "missions"
 
 # Ensure directories exist
@@ -33,6 +48,12 @@ DATA_DIR.mkdir(parents=True, exist_ok=True)
 EPISODES_DIR.mkdir(parents=True, exist_ok=True)
 MISSIONS_DIR.mkdir(parents=True, exist_ok=True)
 
+# Graph changes go to an append-only log; it is fsynced at most this often (seconds)
+# and compacted into a new snapshot once it holds more records than the snapshot
+# has nodes and edges (and at least LOG_COMPACT_MIN_RECORDS)
+LOG_FSYNC_INTERVAL = 1.0
+LOG_COMPACT_MIN_RECORDS = 5000
+
 
 class EdgeType(Enum):
     """Types of relationships in the knowledge graph"""
@@ -94,60 +115,1094 @@ class Mission:
         return cls(**data)
 
 
+class GraphLog:
+    """
+    Append-only log of graph changes (JSON lines) on top of a snapshot.
+    
+    Each record is a full node or edge upsert, so replaying one twice is
+    harmless. The first line holds the snapshot generation the log applies
+    to: compaction writes snapshot n+1 before starting a new log, so a crash
+    in between never replays an old log over a newer snapshot. Records are
+    flushed to the OS at once (nothing is lost if the process dies) and
+    fsynced in batches at most fsync_interval seconds apart.
+    
+    Several processes may share the log. Records are appended with a single
+    O_APPEND write, and appends, loading and compaction happen under an
+    exclusive flock on a lock file beside the log (the log itself is
+    replaced on compaction), so a writer can first read what others logged
+    since (read_new), or see that the log was replaced and reload.
+    """
+    
+    def __init__(self, path: Path, fsync_interval: float = LOG_FSYNC_INTERVAL):
+        self.path = path
+        self.fsync_interval = fsync_interval
+        self.records = 0
+        self._fd = None
+        self._inode = None
+        self._offset = 0  # bytes of the log this process has read or written
+        self._lock = threading.RLock()
+        self._lock_fd = None
+        self._lock_depth = 0
+        self._timer = None
+        self._dirty = False
+        self._last_sync = 0.0
+    
+    @contextmanager
+    def locked(self):
+        """Hold the log lock against other threads and processes (re-entrant)"""
+        with self._lock:
+            if self._lock_fd is None:
+                self._lock_fd = os.open(self.path.with_suffix('.lock'), os.O_RDWR | os.O_CREAT, 0o644)
+            if not self._lock_depth:
+                fcntl.flock(self._lock_fd, fcntl.LOCK_EX)
+            self._lock_depth += 1
+            try:
+                yield
+            finally:
+                self._lock_depth -= 1
+                if not self._lock_depth:
+                    fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+    
+    @staticmethod
+    def _parse(data: bytes) -> Tuple[List[Dict], int]:
+        """Records in complete lines of data, and the bytes they span"""
+        end = data.rfind(b'\n') + 1
+        records = []
+        for line in data[:end].splitlines():
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                pass  # torn by a crash; the next append started a fresh line
+        return records, end
+    
+    @classmethod
+    def _read(cls, data: bytes, generation: int) -> Optional[Tuple[List[Dict], int]]:
+        """Records in a whole log and the bytes they end at, or None if it is not for generation"""
+        header_end = data.find(b'\n') + 1
+        try:
+            header = json.loads(data[:header_end])
+        except ValueError:
+            return None
+        if not header_end or header.get('generation') != generation:
+            return None
+        records, size = cls._parse(data[header_end:])
+        return records, header_end + size
+    
+    def _open_fd(self):
+        self._close_fd()
+        self._fd = os.open(self.path, os.O_RDWR | os.O_APPEND)
+        self._inode = os.fstat(self._fd).st_ino
+    
+    def _close_fd(self):
+        if self._fd is not None:
+            self._sync()
+            os.close(self._fd)
+            self._fd = None
+    
+    def replay(self, generation: int) -> List[Dict]:
+        """Records logged on top of snapshot generation (skipping records torn by a crash)"""
+        with self.locked():
+            self.records = 0
+            try:
+                self._open_fd()
+            except FileNotFoundError:
+                return []
+            read = self._read(os.pread(self._fd, os.fstat(self._fd).st_size, 0), generation)
+            if read is None:
+                self._close_fd()
+                return []
+            records, self._offset = read
+            self.records = len(records)
+            return records
+    
+    def open(self, generation: int):
+        """Continue the log replayed for generation, or start a new one"""
+        if self._fd is None:
+            self.reset(generation)
+    
+    def replaced(self) -> bool:
+        """Whether another process compacted and started a new log since this one opened it"""
+        try:
+            return os.stat(self.path).st_ino != self._inode
+        except FileNotFoundError:
+            return True
+    
+    def read_new(self) -> List[Dict]:
+        """Records other processes appended since this one last read or wrote; call under locked()"""
+        size = os.fstat(self._fd).st_size
+        if size <= self._offset:
+            return []
+        records, consumed = self._parse(os.pread(self._fd, size - self._offset, self._offset))
+        self._offset += consumed
+        self.records += len(records)
+        return records
+    
+    def reset(self, generation: int):
+        """Start an empty log for snapshot generation"""
+        with self.locked():
+            self._close_fd()
+            tmp = self.path.with_suffix('.log.tmp')
+            with open(tmp, 'wb') as f:
+                f.write(json.dumps({'generation': generation}).encode('utf-8') + b'\n')
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.path)
+            self._open_fd()
+            self._offset = os.fstat(self._fd).st_size
+            self.records = 0
+            self._dirty = False
+    
+    def append(self, record: Dict):
+        self.extend([record])
+    
+    def extend(self, records: List[Dict]):
+        """Append records with a single write"""
+        if not records:
+            return
+        data = ''.join(json.dumps(r, separators=(',', ':'), default=str) + '\n' for r in records)
+        data = data.encode('utf-8')
+        with self.locked():
+            size = os.fstat(self._fd).st_size
+            if size and os.pread(self._fd, 1, size - 1) != b'\n':
+                data = b'\n' + data  # after a record torn by a crash
+            if os.write(self._fd, data) != len(data):
+                raise OSError(f"Short write to {self.path.name}")
+            if self._offset == size:
+                # Otherwise records by others are still unread; read_new
+                # returns them (and these) later
+                self._offset = size + len(data)
+            self.records += len(records)
+            self._dirty = True
+            if time.monotonic() - self._last_sync >= self.fsync_interval:
+                self._sync()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.fsync_interval, self.sync)
+                self._timer.daemon = True
+                self._timer.start()
+    
+    def _sync(self):
+        if self._dirty and self._fd is not None:
+            os.fsync(self._fd)
+            self._dirty = False
+        self._last_sync = time.monotonic()
+    
+    def sync(self):
+        """fsync records written since the last sync"""
+        with self._lock:
+            self._timer = None
+            self._sync()
+    
+    def close(self):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            self._close_fd()
+            if self._lock_fd is not None:
+                os.close(self._lock_fd)
+                self._lock_fd = None
+
+
+SNAPSHOT_MAGIC = b'JMSNAP01'
+
+
+def _column_kind(values: List) -> str:
+    """Storage kind for a column: interned atom, float64, int64 or JSON object"""
+    kinds = set(map(type, values))
+    if len(kinds) == 1:
+        return {str: 's', float: 'd', int: 'q'}.get(kinds.pop(), 'j')
+    return 'j'
+
+
+class EpisodeIndex:
+    """
+    SQLite index of stored episodes: timestamp, type, importance and where
+    the record lives (file, offset, length; length None means the whole
+    file). Recent, by-type and time-range queries are index range scans and
+    counts come from a per-type table kept up to date by triggers, so no
+    query lists the episodes directory. The index is shared by every
+    process using the same data directory.
+    """
+    
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS episodes (
+            id TEXT PRIMARY KEY,
+            timestamp REAL NOT NULL,
+            episode_type TEXT NOT NULL,
+            importance REAL,
+            file TEXT NOT NULL,
+            offset INTEGER NOT NULL DEFAULT 0,
+            length INTEGER
+        );
+        CREATE INDEX IF NOT EXISTS idx_episodes_timestamp ON episodes(timestamp);
+        CREATE INDEX IF NOT EXISTS idx_episodes_type_timestamp ON episodes(episode_type, timestamp);
+        CREATE TABLE IF NOT EXISTS episode_counts (
+            episode_type TEXT PRIMARY KEY,
+            count INTEGER NOT NULL
+        );
+        CREATE TRIGGER IF NOT EXISTS episodes_count_insert AFTER INSERT ON episodes BEGIN
+            INSERT INTO episode_counts VALUES (new.episode_type, 1)
+            ON CONFLICT(episode_type) DO UPDATE SET count = count + 1;
+        END;
+        CREATE TRIGGER IF NOT EXISTS episodes_count_delete AFTER DELETE ON episodes BEGIN
+            UPDATE episode_counts SET count = count - 1 WHERE episode_type = old.episode_type;
+        END;
+        CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+    """
+    
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(str(path), check_same_thread=False, timeout=30,
+                                    isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.execute("PRAGMA synchronous = NORMAL")
+        self.conn.executescript(self.SCHEMA)
+    
+    def get_meta(self, key: str) -> Optional[str]:
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+    
+    def set_meta(self, key: str, value: str):
+        with self._lock:
+            self.conn.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (key, value))
+    
+    def _transaction(self, fn):
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                fn()
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+    
+    def rebuild(self, rows: List[Tuple]):
+        """Replace the index with rows of (id, timestamp, type, importance, file, offset, length)"""
+        def replace():
+            self.conn.execute("DELETE FROM episodes")
+            self.conn.execute("DELETE FROM episode_counts")
+            self.conn.executemany("INSERT INTO episodes VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+            self.conn.execute("INSERT OR REPLACE INTO meta VALUES ('built', ?)", (str(time.time()),))
+        self._transaction(replace)
+    
+    def add(self, rows: List[Tuple]):
+        """Record where episodes are stored, replacing earlier entries with the same id"""
+        def insert():
+            for row in rows:
+                # DELETE + INSERT (not REPLACE) so the count triggers fire
+                self.conn.execute("DELETE FROM episodes WHERE id = ?", (row[0],))
+                self.conn.execute("INSERT INTO episodes VALUES (?, ?, ?, ?, ?, ?, ?)", row)
+        self._transaction(insert)
+    
+    def locate(self, episode_id: str) -> Optional[Tuple[str, int, Optional[int]]]:
+        """(file, offset, length) of an episode"""
+        return self.conn.execute(
+            "SELECT file, offset, length FROM episodes WHERE id = ?", (episode_id,)
+        ).fetchone()
+    
+    def query(
+        self,
+        limit: Optional[int],
+        episode_type: str = None,
+        start: float = None,
+        end: float = None
+    ) -> sqlite3.Cursor:
+        """Locations of the newest episodes matching the filters (limit None: all)"""
+        conditions, params = [], []
+        if episode_type is not None:
+            conditions.append("episode_type = ?")
+            params.append(episode_type)
+        if start is not None:
+            conditions.append("timestamp >= ?")
+            params.append(start)
+        if end is not None:
+            conditions.append("timestamp <= ?")
+            params.append(end)
+        where = " AND ".join(conditions) if conditions else "1"
+        return self.conn.execute(f"""
+            SELECT file, offset, length FROM episodes
+            WHERE {where}
+            ORDER BY timestamp DESC LIMIT ?
+        """, params + [-1 if limit is None else limit])
+    
+    def count(self, episode_type: str = None) -> int:
+        if episode_type is not None:
+            row = self.conn.execute(
+                "SELECT count FROM episode_counts WHERE episode_type = ?", (episode_type,)
+            ).fetchone()
+            return row[0] if row else 0
+        return self.conn.execute("SELECT COALESCE(SUM(count), 0) FROM episode_counts").fetchone()[0]
+    
+    def close(self):
+        self.conn.close()
+
+
+class EpisodeStore:
+    """
+    Episodes stored as JSON lines in daily segment files
+    (episodes_YYYYMMDD.jsonl, then episodes_YYYYMMDD_1.jsonl... once a
+    segment reaches EPISODE_SEGMENT_MAX_BYTES) and located through an
+    EpisodeIndex, so reading one is a seek into a segment. Each record is
+    appended with a single O_APPEND write, so processes sharing the
+    directory never interleave records, and indexed only once written: a
+    record torn by a crash is never referenced. Per-episode ep_*.json files
+    from older versions are moved into segments on first open.
+    """
+    
+    def __init__(self, episodes_dir: Path = EPISODES_DIR, index_file: Path = EPISODE_INDEX_FILE):
+        self.dir = episodes_dir
+        self.index = EpisodeIndex(index_file)
+        if self.index.get_meta('built') is None:
+            self.rebuild()
+        if self.index.get_meta('files_migrated') is None:
+            self.migrate_files()
+    
+    def _segment_path(self, timestamp: float) -> Path:
+        """Segment an episode with this timestamp is appended to"""
+        day = datetime.fromtimestamp(timestamp).strftime('%Y%m%d')
+        part = 0
+        while True:
+            path = self.dir / (f"episodes_{day}.jsonl" if part == 0 else f"episodes_{day}_{part}.jsonl")
+            try:
+                if path.stat().st_size < EPISODE_SEGMENT_MAX_BYTES:
+                    return path
+            except FileNotFoundError:
+                return path
+            part += 1
+    
+    def _write(self, data: Dict) -> Tuple:
+        """Append one record; returns its index row"""
+        line = json.dumps(data, separators=(',', ':')).encode('utf-8')
+        path = self._segment_path(data['timestamp'])
+        fd = os.open(path, os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            record = line + b'\n'
+            size = os.fstat(fd).st_size
+            if size and os.pread(fd, 1, size - 1) != b'\n':
+                record = b'\n' + record  # after a record torn by a crash
+            if os.write(fd, record) != len(record):
+                raise OSError(f"Short write to {path.name}")
+            offset = os.lseek(fd, 0, os.SEEK_CUR) - len(line) - 1
+        finally:
+            os.close(fd)
+        return (data['id'], data['timestamp'], data['episode_type'], data.get('importance'),
+                path.name, offset, len(line))
+    
+    def append(self, episode: 'Episode'):
+        """Store and index an episode"""
+        self.index.add([self._write(episode.to_dict())])
+    
+    def _read(self, files: Dict, location: Tuple[str, int, Optional[int]]) -> Episode:
+        file, offset, length = location
+        f = files.get(file)
+        if f is None:
+            f = files[file] = open(self.dir / file, 'rb')
+        f.seek(offset)
+        return Episode.from_dict(json.loads(f.read(-1 if length is None else length)))
+    
+    def iter_episodes(self, episode_type: str = None, start: float = None, end: float = None,
+                      limit: Optional[int] = None):
+        """Episodes matching the filters, newest first (unreadable records are skipped)"""
+        files = {}
+        try:
+            for location in list(self.index.query(limit, episode_type, start, end)):
+                try:
+                    yield self._read(files, location)
+                except Exception:
+                    continue
+        finally:
+            for f in files.values():
+                f.close()
+    
+    def query(self, limit: int, episode_type: str = None, start: float = None,
+              end: float = None) -> List[Episode]:
+        return list(self.iter_episodes(episode_type, start, end, limit))
+    
+    def search(self, query: str = None, episode_type: str = None, start: float = None,
+               end: float = None, objects: List[str] = None, limit: int = 10) -> List[Episode]:
+        """
+        Episodes matching the filters that contain all of objects. With a
+        query, episodes sharing more query words come first; ties and
+        queryless searches are newest first.
+        """
+        words = set(re.findall(r"\w+", query.lower())) if query else set()
+        wanted = set(objects or ())
+        matches = []
+        for episode in self.iter_episodes(episode_type, start, end):
+            if not wanted.issubset(episode.detected_objects):
+                continue
+            if not words:
+                matches.append(episode)
+                if len(matches) >= limit:
+                    break
+                continue
+            text = ' '.join([episode.summary, episode.transcription or ''] + episode.detected_objects)
+            score = len(words.intersection(re.findall(r"\w+", text.lower())))
+            if score:
+                matches.append((score, episode))
+        if not words:
+            return matches
+        # Stable sort keeps newest first among equal scores
+        matches.sort(key=lambda match: match[0], reverse=True)
+        return [episode for _, episode in matches[:limit]]
+    
+    def get(self, episode_id: str) -> Optional[Episode]:
+        location = self.index.locate(episode_id)
+        if location is None:
+            return None
+        files = {}
+        try:
+            return self._read(files, location)
+        except FileNotFoundError:
+            return None
+        finally:
+            for f in files.values():
+                f.close()
+    
+    def count(self, episode_type: str = None) -> int:
+        return self.index.count(episode_type)
+    
+    def migrate_files(self):
+        """Move per-episode ep_*.json files into segments"""
+        episode_files = sorted(self.dir.glob("ep_*.json"))
+        rows, migrated = [], []
+        for episode_file in episode_files:
+            try:
+                with open(episode_file, 'r') as f:
+                    rows.append(self._write(json.load(f)))
+                migrated.append(episode_file)
+            except Exception as e:
+                print(f"[Memory] Skipping unreadable episode {episode_file.name}: {e}", file=sys.stderr)
+        
+        # Segments reach disk before the index points at them and the files go
+        for name in {row[4] for row in rows}:
+            with open(self.dir / name, 'rb') as f:
+                os.fsync(f.fileno())
+        if rows:
+            self.index.add(rows)
+        for episode_file in migrated:
+            episode_file.unlink()
+        self.index.set_meta('files_migrated', str(time.time()))
+        if migrated:
+            print(f"[Memory] Moved {len(migrated)} episode files into segments", file=sys.stderr)
+    
+    def rebuild(self):
+        """Re-index every segment (and any leftover ep_*.json file)"""
+        rows = {}
+        for segment in sorted(self.dir.glob("episodes_*.jsonl")):
+            with open(segment, 'rb') as f:
+                offset = 0
+                for line in f:
+                    try:
+                        if line.endswith(b'\n'):
+                            data = json.loads(line)
+                            rows[data['id']] = (data['id'], data['timestamp'], data['episode_type'],
+                                                data.get('importance'), segment.name, offset,
+                                                len(line) - 1)
+                    except Exception:
+                        pass  # torn or corrupt record; never indexed
+                    offset += len(line)
+        for episode_file in self.dir.glob("ep_*.json"):
+            try:
+                with open(episode_file, 'r') as f:
+                    data = json.load(f)
+                rows[data['id']] = (data['id'], data['timestamp'], data['episode_type'],
+                                    data.get('importance'), episode_file.name, 0, None)
+            except Exception as e:
+                print(f"[Memory] Skipping unreadable episode {episode_file.name}: {e}", file=sys.stderr)
+        
+        self.index.rebuild(list(rows.values()))
+        if rows:
+            print(f"[Memory] Indexed {len(rows)} episodes", file=sys.stderr)
+    
+    def close(self):
+        self.index.close()
+
+
+def _bulk_add_edges(graph: nx.MultiDiGraph, edges):
+    """
+    add_edges_from for (u, v, key, attrs) without networkx's per-edge
+    overhead, which dominates loading. Fills the adjacency dicts the same
+    way MultiDiGraph.add_edge does (successor and predecessor entries share
+    one key dict); attrs dicts are stored as given.
+    """
+    succ, pred = graph._succ, graph._pred
+    for u, v, key, attrs in edges:
+        if u not in succ:
+            graph.add_node(u)
+        if v not in succ:
+            graph.add_node(v)
+        keydict = succ[u].get(v)
+        if keydict is None:
+            keydict = succ[u][v] = pred[v][u] = graph.edge_key_dict_factory()
+        keydict[key] = attrs
+
+
+class GraphSnapshot:
+    """
+    Compact binary snapshot of the graph, read through mmap.
+    
+    Layout: magic, u32 header length, JSON header, then 8-byte aligned
+    sections. Node ids, edge keys and string attribute values are interned
+    in one JSON array and referenced by u32 index, so an edge type is stored
+    as an integer code. Nodes and edges are grouped by attribute key set and
+    stored column-wise per group (interned index, float64, int64, or index
+    into a JSON array for anything else), which lets loading build attribute
+    dicts and add them to the graph in bulk instead of one call per item.
+    """
+    
+    def __init__(self, path: Path):
+        self.path = path
+    
+    def save(self, graph: nx.MultiDiGraph, generation: int) -> int:
+        """Write graph atomically; returns nodes + edges written"""
+        atoms, atom_index = [], {}
+        objects = []
+        data = bytearray()
+        
+        def intern(value) -> int:
+            i = atom_index.get(value)
+            if i is None:
+                i = atom_index[value] = len(atoms)
+                atoms.append(value)
+            return i
+        
+        def section(typecode: str, values) -> int:
+            arr = array(typecode, values)
+            if sys.byteorder == 'big':
+                arr.byteswap()
+            data.extend(bytes(-len(data) % 8))
+            offset = len(data)
+            data.extend(arr.tobytes())
+            return offset
+        
+        def columns(rows: List[Dict], keys: Tuple) -> List[Dict]:
+            cols = []
+            for key in keys:
+                values = [attrs[key] for attrs in rows]
+                kind = _column_kind(values)
+                try:
+                    if kind == 's':
+                        offset = section('I', map(intern, values))
+                    elif kind in 'dq':
+                        offset = section(kind, values)
+                except OverflowError:
+                    kind = 'j'
+                if kind == 'j':
+                    offset = section('I', range(len(objects), len(objects) + len(values)))
+                    objects.extend(values)
+                cols.append({'key': key, 'kind': kind, 'offset': offset})
+            return cols
+        
+        node_groups = defaultdict(list)
+        for node_id, attrs in graph.nodes(data=True):
+            node_groups[tuple(attrs)].append((node_id, attrs))
+        edge_groups = defaultdict(list)
+        for u, v, key, attrs in graph.edges(keys=True, data=True):
+            edge_groups[tuple(attrs)].append((u, v, key, attrs))
+        
+        header = {'generation': generation, 'nodes': [], 'edges': []}
+        for keys, group in node_groups.items():
+            header['nodes'].append({
+                'count': len(group),
+                'ids': section('I', (intern(n) for n, _ in group)),
+                'columns': columns([attrs for _, attrs in group], keys),
+            })
+        for keys, group in edge_groups.items():
+            header['edges'].append({
+                'count': len(group),
+                'source': section('I', (intern(e[0]) for e in group)),
+                'target': section('I', (intern(e[1]) for e in group)),
+                'key': section('I', (intern(e[2]) for e in group)),
+                'columns': columns([e[3] for e in group], keys),
+            })
+        for name, values in (('atoms', atoms), ('objects', objects)):
+            blob = json.dumps(values, separators=(',', ':'), default=str).encode('utf-8')
+            data.extend(bytes(-len(data) % 8))
+            header[name] = [len(data), len(blob)]
+            data.extend(blob)
+        
+        header_bytes = json.dumps(header, separators=(',', ':')).encode('utf-8')
+        header_bytes += b' ' * (-(len(SNAPSHOT_MAGIC) + 4 + len(header_bytes)) % 8)
+        tmp = self.path.with_suffix('.snap.tmp')
+        with open(tmp, 'wb') as f:
+            f.write(SNAPSHOT_MAGIC)
+            f.write(len(header_bytes).to_bytes(4, 'little'))
+            f.write(header_bytes)
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+        return graph.number_of_nodes() + graph.number_of_edges()
+    
+    def load(self, graph: nx.MultiDiGraph) -> Tuple[int, int]:
+        """Add the snapshot to graph; returns (generation, nodes + edges)"""
+        # Collections triggered by the millions of new dicts find nothing to free
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            return self._load(graph)
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+    
+    def _load(self, graph: nx.MultiDiGraph) -> Tuple[int, int]:
+        with open(self.path, 'rb') as f, \
+                mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if mm[:len(SNAPSHOT_MAGIC)] != SNAPSHOT_MAGIC:
+                raise ValueError(f"{self.path} is not a graph snapshot")
+            start = len(SNAPSHOT_MAGIC) + 4
+            base = start + int.from_bytes(mm[len(SNAPSHOT_MAGIC):start], 'little')
+            header = json.loads(mm[start:base])
+            
+            def blob(name: str):
+                offset, length = header[name]
+                return json.loads(mm[base + offset:base + offset + length])
+            
+            def section(typecode: str, offset: int, count: int) -> array:
+                arr = array(typecode)
+                arr.frombytes(mm[base + offset:base + offset + count * arr.itemsize])
+                if sys.byteorder == 'big':
+                    arr.byteswap()
+                return arr
+            
+            atoms, objects = blob('atoms'), blob('objects')
+            
+            def attr_dicts(group: Dict):
+                count, cols = group['count'], group['columns']
+                if not cols:
+                    return ({} for _ in range(count))
+                values = []
+                for col in cols:
+                    kind = col['kind']
+                    arr = section('I' if kind in 'sj' else kind, col['offset'], count)
+                    if kind == 's':
+                        values.append(map(atoms.__getitem__, arr))
+                    elif kind == 'j':
+                        values.append(map(objects.__getitem__, arr))
+                    else:
+                        values.append(arr.tolist())
+                keys = [col['key'] for col in cols]
+                return map(dict, map(zip, repeat(keys), zip(*values)))
+            
+            size = 0
+            for group in header['nodes']:
+                ids = map(atoms.__getitem__, section('I', group['ids'], group['count']))
+                graph.add_nodes_from(zip(ids, attr_dicts(group)))
+                size += group['count']
+            for group in header['edges']:
+                ends = [map(atoms.__getitem__, section('I', group[name], group['count']))
+                        for name in ('source', 'target', 'key')]
+                _bulk_add_edges(graph, zip(*ends, attr_dicts(group)))
+                size += group['count']
+        
+        return header['generation'], size
+
+
+def _load_json_graph(path: Path, graph: nx.MultiDiGraph) -> Tuple[int, int]:
+    """Add a legacy JSON snapshot to graph; returns (generation, nodes + edges)"""
+    with open(path, 'r') as f:
+        data = json.load(f)
+    
+    # Add nodes
+    for node in data.get('nodes', []):
+        node_id = node.pop('id')
+        graph.add_node(node_id, **node)
+    
+    # Add edges (very old files have no keys; give them stable ones)
+    for i, edge in enumerate(data.get('edges', [])):
+        graph.add_edge(
+            edge['source'],
+            edge['target'],
+            key=edge.get('key', f"edge_{i}"),
+            **{k: v for k, v in edge.items() if k not in ['source', 'target', 'key']}
+        )
+    
+    return data.get('generation', 0), len(data.get('nodes', [])) + len(data.get('edges', []))
+
+
+def _apply_record(graph: nx.MultiDiGraph, record: Dict):
+    """Apply one GraphLog record (a full node or edge upsert) to graph"""
+    if record['op'] == 'node':
+        node_id = record['id']
+        if graph.has_node(node_id):
+            attrs = graph.nodes[node_id]
+            attrs.clear()
+            attrs.update(record['attrs'])
+        else:
+            graph.add_node(node_id, **record['attrs'])
+    elif record['op'] == 'edge':
+        source, target, key = record['source'], record['target'], record['key']
+        if graph.has_edge(source, target, key):
+            attrs = graph.edges[source, target, key]
+            attrs.clear()
+            attrs.update(record['attrs'])
+        else:
+            graph.add_edge(source, target, key=key, **record['attrs'])
+
+
+def read_graph(graph_file: Path = GRAPH_FILE, log_file: Path = None,
+               legacy_file: Path = None) -> nx.MultiDiGraph:
+    """
+    The stored graph (snapshot plus logged changes), read without writing
+    anything: unlike JarvisMemory this converts no legacy JSON snapshot,
+    adds no core nodes and never compacts.
+    """
+    graph = nx.MultiDiGraph()
+    legacy_file = legacy_file or graph_file.with_suffix('.json')
+    generation = 0
+    if graph_file.exists():
+        generation, _ = GraphSnapshot(graph_file).load(graph)
+    elif legacy_file.exists():
+        generation, _ = _load_json_graph(legacy_file, graph)
+    
+    try:
+        data = (log_file or graph_file.with_suffix('.log')).read_bytes()
+    except FileNotFoundError:
+        return graph
+    read = GraphLog._read(data, generation)
+    for record in read[0] if read else []:
+        _apply_record(graph, record)
+    return graph
+
+
+class GraphIndex:
+    """
+    Secondary indexes over the graph, updated as nodes and edges are written.
+    
+    - by_type: node type -> node ids
+    - tokens: word in an entity name -> entity ids
+    - trigrams: character trigram of an entity name or id (without the
+      "entity:" prefix) -> entity ids, for substring matches
+    - members: concept id -> entities linked to it by is_a edges
+    - active_missions: mission nodes with status "active"
+    
+    Lookups cost about as much as their result instead of a pass over every
+    node, and the counts get_stats reports (edge_count, set sizes) are read
+    in O(1). Results keep the order nodes were first indexed in.
+    """
+    
+    ENTITY_PREFIX = "entity:"
+    
+    def __init__(self):
+        self.graph = None
+        self.by_type = defaultdict(set)
+        self.tokens = defaultdict(set)
+        self.trigrams = defaultdict(set)
+        self.members = defaultdict(set)
+        self.active_missions = set()
+        self.edge_count = 0
+        self._indexed = {}  # node id -> (type, name, status) it is indexed under
+        self._order = {}  # node id -> first-indexed sequence number
+    
+    def build(self, graph: nx.MultiDiGraph):
+        """Index a whole graph (after loading it or changing it directly)"""
+        self.__init__()
+        self.graph = graph
+        for node_id, attrs in graph.nodes(data=True):
+            self.add_node(node_id, attrs)
+        for source, target, attrs in graph.edges(data=True):
+            self.add_edge(source, target, attrs)
+    
+    @staticmethod
+    def _trigrams(text: str) -> set:
+        return {text[i:i + 3] for i in range(len(text) - 2)}
+    
+    def _terms(self, node_id: str, name: str) -> Tuple[set, set]:
+        name = name.lower()
+        key = node_id.lower()
+        if key.startswith(self.ENTITY_PREFIX):
+            key = key[len(self.ENTITY_PREFIX):]
+        return set(re.findall(r'\w+', name)), self._trigrams(name) | self._trigrams(key)
+    
+    def add_node(self, node_id: str, attrs: Dict):
+        """Index a node, or re-index it after its attributes changed"""
+        node_type = attrs.get('type', 'unknown')
+        name = str(attrs.get('name', '')) if node_type == 'entity' else None
+        status = attrs.get('status') if node_type == 'mission' else None
+        old = self._indexed.get(node_id)
+        if old == (node_type, name, status):
+            return
+        if old is not None:
+            self._unindex(node_id, *old)
+        self._indexed[node_id] = (node_type, name, status)
+        self._order.setdefault(node_id, len(self._order))
+        self.by_type[node_type].add(node_id)
+        if status == 'active':
+            self.active_missions.add(node_id)
+        if name is not None:
+            tokens, trigrams = self._terms(node_id, name)
+            for token in tokens:
+                self.tokens[token].add(node_id)
+            for trigram in trigrams:
+                self.trigrams[trigram].add(node_id)
+    
+    def _unindex(self, node_id: str, node_type: str, name: Optional[str], status: Optional[str]):
+        self.by_type[node_type].discard(node_id)
+        self.active_missions.discard(node_id)
+        if name is not None:
+            tokens, trigrams = self._terms(node_id, name)
+            for token in tokens:
+                self.tokens[token].discard(node_id)
+            for trigram in trigrams:
+                self.trigrams[trigram].discard(node_id)
+    
+    def add_edge(self, source: str, target: str, attrs: Dict, new: bool = True):
+        if new:
+            self.edge_count += 1
+        # add_edge creates missing endpoints without attributes
+        for node_id in (source, target):
+            if node_id not in self._indexed:
+                self.add_node(node_id, self.graph.nodes[node_id])
+        if attrs.get('type') == EdgeType.IS_A.value:
+            self.members[target].add(source)
+    
+    def ordered(self, node_ids) -> List[str]:
+        return sorted(node_ids, key=self._order.__getitem__)
+    
+    def search(self, query: str, limit: int) -> List[str]:
+        """
+        Entities whose name or id contains query (case-insensitive), those
+        containing all of its words as whole words first.
+        """
+        q = query.lower()
+        nodes = self.graph.nodes
+        
+        def matches(node_id):
+            return q in str(nodes[node_id].get('name', '')).lower() or q in node_id.lower()
+        
+        if len(q) < 3 or ':' in q or q in self.ENTITY_PREFIX:
+            # Too short for trigrams, or matching the shared id prefix
+            candidates = self.by_type.get('entity', set())
+        else:
+            postings = sorted((self.trigrams.get(t, set()) for t in self._trigrams(q)), key=len)
+            candidates = postings[0].intersection(*postings[1:])
+        found = [n for n in candidates if matches(n)]
+        
+        words = re.findall(r'\w+', q)
+        whole = set.intersection(*(self.tokens.get(w, set()) for w in words)) if words else set()
+        ranked = self.ordered(n for n in found if n in whole) + self.ordered(n for n in found if n not in whole)
+        return ranked[:limit]
+    
+    def concept_members(self, concept_id: str) -> List[str]:
+        return self.ordered(self.members.get(concept_id, ()))
+
+
 class JarvisMemory:
     """
     Main memory system using NetworkX knowledge graph with JSON persistence.
+    
+    The graph is stored as a binary snapshot (GraphSnapshot) plus a log of
+    the changes made since (GraphLog), so a write costs O(change) instead of
+    rewriting the whole file. A JSON snapshot from older versions is read
+    once and replaced by a binary one. Inside batch() changes are collected
+    and logged together when the outermost batch exits. Lookups by type,
+    name and concept go through a GraphIndex kept in step with every write.
     """
     
-    def __init__(self, graph_file: Path = GRAPH_FILE):
+    def __init__(self, graph_file: Path = GRAPH_FILE, log_file: Path = None,
+                 legacy_file: Path = None):
         self.graph_file = graph_file
+        self.legacy_file = legacy_file or graph_file.with_suffix('.json')
+        self._snapshot = GraphSnapshot(graph_file)
         self.graph = nx.MultiDiGraph()
+        self._generation = 0
+        self._snapshot_size = 0  # nodes + edges in the snapshot (counting edges is O(edges))
+        self._log = GraphLog(log_file or graph_file.with_suffix('.log'))
+        self._episodes = EpisodeStore(EPISODES_DIR, EPISODE_INDEX_FILE)
+        self._index = GraphIndex()
+        self._batch_depth = 0
+        self._pending = {}  # (op, key...) -> log record, while batching
+        self._missions_dirty = False
         self._load_graph()
+        atexit.register(self.close)
         self._initialize_core_nodes()
     
+    def close(self):
+        """Flush and fsync pending log records"""
+        self._log.close()
+        self._episodes.close()
+    
     def _load_graph(self):
-        """Load graph from JSON file"""
+        """Load the snapshot, then replay the log written since"""
+        with self._log.locked():
+            legacy = self._read_graph()
+            self._index.build(self.graph)
+            if legacy:
+                print(f"[Memory] Converting {self.legacy_file.name} to a binary snapshot", file=sys.stderr)
+                self._compact()
+            else:
+                self._maybe_compact()
+    
+    def _read_graph(self) -> bool:
+        """Load the snapshot and replay the log into self.graph (under the log lock)"""
+        legacy = self._load_snapshot()
+        try:
+            for record in self._log.replay(self._generation):
+                self._apply(record)
+        except Exception as e:
+            print(f"[Memory] Error replaying graph log: {e}", file=sys.stderr)
+        self._log.open(self._generation)
+        
+        if self._log.records:
+            print(f"[Memory] Replayed {self._log.records} logged changes", file=sys.stderr)
+        return legacy
+    
+    def _load_snapshot(self) -> bool:
+        """Load the binary snapshot, or the legacy JSON one; True if it was JSON"""
         if self.graph_file.exists():
+            load, legacy = self._snapshot.load, False
+        elif self.legacy_file.exists():
+            load, legacy = lambda graph: _load_json_graph(self.legacy_file, graph), True
+        else:
+            return False
+        
+        try:
+            self._generation, self._snapshot_size = load(self.graph)
+            print(f"[Memory] Loaded graph: {self.graph.number_of_nodes()} nodes, {self.graph.number_of_edges()} edges", file=sys.stderr)
+        except Exception as e:
+            print(f"[Memory] Error loading graph: {e}", file=sys.stderr)
+            self.graph = nx.MultiDiGraph()
+            return False
+        return legacy
+    
+    def _apply(self, record: Dict):
+        """Replay one log record (a full node or edge upsert)"""
+        _apply_record(self.graph, record)
+    
+    @staticmethod
+    def _record_key(record: Dict) -> Tuple:
+        if record['op'] == 'node':
+            return ('node', record['id'])
+        return ('edge', record['source'], record['target'], record['key'])
+    
+    def _index_record(self, record: Dict, new: bool):
+        if record['op'] == 'node':
+            self._index.add_node(record['id'], self.graph.nodes[record['id']])
+        else:
+            self._index.add_edge(record['source'], record['target'], record['attrs'], new)
+    
+    def _catch_up(self, records: List[Dict]):
+        """
+        Bring the graph up to date with what other processes logged before
+        records (changes this one made but has not logged yet) are appended;
+        call under the log lock. Where both changed the same node or edge,
+        records win.
+        """
+        if self._log.replaced():
+            # Another process compacted: its snapshot holds everything
+            # logged before, this process's logged changes included
+            self.graph.clear()
+            self._read_graph()
+            for record in records:
+                self._apply(record)
+            self._index.build(self.graph)
+            return
+        
+        others = self._log.read_new()
+        if not others:
+            return
+        # Applying others' records updates attrs dicts in place, and records
+        # hold the same dicts
+        mine = [{**r, 'attrs': dict(r['attrs'])} for r in records]
+        touched = set()
+        for record in others:
             try:
-                with open(self.graph_file, 'r') as f:
-                    data = json.load(f)
-                
-                # Add nodes
-                for node in data.get('nodes', []):
-                    node_id = node.pop('id')
-                    self.graph.add_node(node_id, **node)
-                
-                # Add edges
-                for edge in data.get('edges', []):
-                    self.graph.add_edge(
-                        edge['source'],
-                        edge['target'],
-                        key=edge.get('key', f"edge_{time.time()}"),
-                        **{k: v for k, v in edge.items() if k not in ['source', 'target', 'key']}
-                    )
-                
-                print(f"[Memory] Loaded graph: {self.graph.number_of_nodes()} nodes, {self.graph.number_of_edges()} edges", file=sys.stderr)
+                new = record['op'] == 'edge' and not self.graph.has_edge(
+                    record['source'], record['target'], record['key'])
+                self._apply(record)
             except Exception as e:
-                print(f"[Memory] Error loading graph: {e}", file=sys.stderr)
-                self.graph = nx.MultiDiGraph()
+                print(f"[Memory] Error replaying graph log: {e}", file=sys.stderr)
+                continue
+            touched.add(self._record_key(record))
+            self._index_record(record, new)
+        for record in mine:
+            if self._record_key(record) in touched:
+                self._apply(record)
+                self._index_record(record, new=False)
+    
+    def _log_node(self, node_id: str):
+        """Index and persist a node's current attributes"""
+        self._index.add_node(node_id, self.graph.nodes[node_id])
+        self._write({'op': 'node', 'id': node_id, 'attrs': self.graph.nodes[node_id]},
+                    ('node', node_id))
+    
+    def _log_edge(self, source: str, target: str, key: str, new: bool = True):
+        """Index and persist an edge's current attributes"""
+        attrs = self.graph.edges[source, target, key]
+        self._index.add_edge(source, target, attrs, new)
+        self._write({
+            'op': 'edge', 'source': source, 'target': target, 'key': key, 'attrs': attrs
+        }, ('edge', source, target, key))
+    
+    def _write(self, record: Dict, key: Tuple):
+        if self._batch_depth:
+            # attrs is the live dict, so the record logged on exit holds the
+            # final state and a node touched twice is written once
+            self._pending[key] = record
+            return
+        self._persist([record])
+    
+    @contextmanager
+    def batch(self):
+        """
+        Group writes: node and edge changes made inside are logged with one
+        write (and the missions file saved once) when the outermost batch
+        exits. Batches nest.
+        
+        There is no rollback: if the block raises, the changes it already
+        made to the graph are still persisted so the log matches memory.
+        """
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if not self._batch_depth:
+                self._flush_batch()
+    
+    def _flush_batch(self):
+        records = list(self._pending.values())
+        self._pending.clear()
+        try:
+            self._persist(records)
+        except Exception as e:
+            print(f"[Memory] Error writing graph log: {e}", file=sys.stderr)
+        if self._missions_dirty:
+            self._missions_dirty = False
+            self._save_missions()
+    
+    def _persist(self, records: List[Dict]):
+        """Log records after catching up with other processes, compacting when due"""
+        with self._log.locked():
+            self._catch_up(records)
+            self._log.extend(records)
+            self._maybe_compact()
+    
+    def _maybe_compact(self):
+        """Fold the log into a new snapshot once replaying it costs more than loading one"""
+        if self._log.records >= max(LOG_COMPACT_MIN_RECORDS, self._snapshot_size):
+            self._compact()
     
     def _save_graph(self):
-        """Save graph to JSON file"""
+        """
+        Re-index the graph and write a full snapshot.
+        
+        Changes made through this class are indexed and logged as they
+        happen; call this only after modifying self.graph directly.
+        """
+        self._index.build(self.graph)
+        self._compact()
+    
+    def _compact(self):
+        """Write a full snapshot and start a new log"""
         try:
-            nodes = []
-            for node_id, attrs in self.graph.nodes(data=True):
-                node_data = {'id': node_id, **attrs}
-                nodes.append(node_data)
-            
-            edges = []
-            for u, v, key, attrs in self.graph.edges(keys=True, data=True):
-                edge_data = {'source': u, 'target': v, 'key': key, **attrs}
-                edges.append(edge_data)
-            
-            data = {'nodes': nodes, 'edges': edges}
-            
-            with open(self.graph_file, 'w') as f:
-                json.dump(data, f, indent=2, default=str)
+            with self._log.locked():
+                generation = self._generation + 1
+                self._snapshot_size = self._snapshot.save(self.graph, generation)
+                self._generation = generation
+                self._log.reset(generation)
         except Exception as e:
             print(f"[Memory] Error saving graph: {e}", file=sys.stderr)
     
@@ -168,6 +1223,7 @@ class JarvisMemory:
             # Update existing
             self.graph.nodes[node_id].update(attributes)
             self.graph.nodes[node_id]['updated_at'] = time.time()
+            self._log_node(node_id)
         else:
             # Create new
             self.graph.add_node(node_id,
@@ -178,11 +1234,11 @@ class JarvisMemory:
                 updated_at=time.time(),
                 **attributes
             )
+            self._log_node(node_id)
             # Link to category concept
             self._ensure_concept(category)
             self._add_edge(node_id, f"concept:{category}", EdgeType.IS_A)
         
-        self._save_graph()
         return node_id
     
     def add_concept(self, name: str, **attributes) -> str:
@@ -200,19 +1256,23 @@ class JarvisMemory:
                 created_at=time.time(),
                 **attributes
             )
+            self._log_node(node_id)
         elif attributes:
             self.graph.nodes[node_id].update(attributes)
+            self._log_node(node_id)
         
         return node_id
     
     def _add_edge(self, source: str, target: str, edge_type: EdgeType, **attributes):
         """Add an edge between nodes"""
         key = f"{edge_type.value}_{int(time.time() * 1000)}"
+        new = not self.graph.has_edge(source, target, key)
         self.graph.add_edge(source, target, key=key,
             type=edge_type.value,
             created_at=time.time(),
             **attributes
         )
+        self._log_edge(source, target, key, new)
     
     # === Episode Management ===
     
@@ -250,61 +1310,78 @@ class JarvisMemory:
             metadata=metadata
         )
         
-        # Save episode to file
-        episode_file = EPISODES_DIR / f"{episode_id}.json"
-        with open(episode_file, 'w') as f:
-            json.dump(episode.to_dict(), f, indent=2)
-        
-        # Add episode node to graph
-        self.graph.add_node(episode_id,
-            type="episode",
-            timestamp=timestamp,
-            episode_type=episode_type,
-            summary=summary,
-            importance=importance
-        )
-        
-        # Link to detected objects
-        for obj in (detected_objects or []):
-            entity_id = self.add_entity(episode_id, "episode_entity")
-            concept_id = self._ensure_concept(obj, category="detected_object")
-            self._add_edge(entity_id, concept_id, EdgeType.OBSERVED_IN)
-        
-        # Link to time node
-        time_node = self._get_or_create_time_node(timestamp)
-        self._add_edge(entity_id if detected_objects else episode_id, time_node, EdgeType.OCCURRED_AT)
-        
-        # Link to mission if applicable
-        if mission_id and self.graph.has_node(mission_id):
-            self._add_edge(episode_id, mission_id, EdgeType.TRIGGERED_BY)
+        # Append episode to its segment
+        self._episodes.append(episode)
         
-        self._save_graph()
+        with self.batch():
+            # Add episode node to graph
+            self.graph.add_node(episode_id,
+                type="episode",
+                timestamp=timestamp,
+                episode_type=episode_type,
+                summary=summary,
+                importance=importance
+            )
+            self._log_node(episode_id)
+            
+            # Link to detected objects
+            for obj in (detected_objects or []):
+                entity_id = self.add_entity(episode_id, "episode_entity")
+                concept_id = self._ensure_concept(obj, category="detected_object")
+                self._add_edge(entity_id, concept_id, EdgeType.OBSERVED_IN)
+            
+            # Link to time node
+            time_node = self._get_or_create_time_node(timestamp)
+            self._add_edge(entity_id if detected_objects else episode_id, time_node, EdgeType.OCCURRED_AT)
+            
+            # Link to mission if applicable
+            if mission_id and self.graph.has_node(mission_id):
+                self._add_edge(episode_id, mission_id, EdgeType.TRIGGERED_BY)
         
         print(f"[Memory] Created episode: {episode_id} - {summary[:50]}...", file=sys.stderr)
         return episode
     
     def get_episode(self, episode_id: str) -> Optional[Episode]:
         """Retrieve an episode by ID"""
-        episode_file = EPISODES_DIR / f"{episode_id}.json"
-        if episode_file.exists():
-            with open(episode_file, 'r') as f:
-                return Episode.from_dict(json.load(f))
-        return None
+        return self._episodes.get(episode_id)
     
     def get_recent_episodes(self, limit: int = 10, episode_type: str = None) -> List[Episode]:
         """Get most recent episodes"""
-        episodes = []
-        for episode_file in sorted(EPISODES_DIR.glob("ep_*.json"), reverse=True)[:limit * 2]:
-            try:
-                with open(episode_file, 'r') as f:
-                    ep = Episode.from_dict(json.load(f))
-                    if episode_type is None or ep.episode_type == episode_type:
-                        episodes.append(ep)
-                        if len(episodes) >= limit:
-                            break
-            except:
-                continue
-        return episodes
+        return self._episodes.query(limit, episode_type=episode_type)
+    
+    def search_episodes_by_time(
+        self,
+        start_time: datetime = None,
+        end_time: datetime = None,
+        episode_type: str = None,
+        limit: int = 50
+    ) -> List[Episode]:
+        """Search episodes by time range"""
+        return self._episodes.query(
+            limit,
+            episode_type=episode_type,
+            start=start_time.timestamp() if start_time else None,
+            end=end_time.timestamp() if end_time else None
+        )
+    
+    def search_episodes(
+        self,
+        query: str = None,
+        start_time: datetime = None,
+        end_time: datetime = None,
+        episode_type: str = None,
+        objects: List[str] = None,
+        limit: int = 10
+    ) -> List[Episode]:
+        """Find episodes by time range, type, detected objects and query words"""
+        return self._episodes.search(
+            query,
+            episode_type=episode_type,
+            start=start_time.timestamp() if start_time else None,
+            end=end_time.timestamp() if end_time else None,
+            objects=objects,
+            limit=limit
+        )
     
     # === Time Management ===
     
@@ -322,6 +1399,7 @@ class JarvisMemory:
                 hour=dt.hour,
                 day_of_week=dt.strftime("%A")
             )
+            self._log_node(time_id)
         
         return time_id
     
@@ -347,23 +1425,24 @@ class JarvisMemory:
             trigger_conditions=trigger_conditions or {}
         )
         
-        # Add mission node to graph
-        self.graph.add_node(mission_id,
-            type="mission",
-            objective=objective,
-            mission_type=mission_type,
-            status="active",
-            priority=priority,
-            created_at=mission.created_at
-        )
-        
-        # Link to target entities/concepts
-        for target in (target_entities or []):
-            concept_id = self._ensure_concept(target, category="target_object")
-            self._add_edge(mission_id, concept_id, EdgeType.INVOLVES)
-        
-        self._save_missions()
-        self._save_graph()
+        with self.batch():
+            # Add mission node to graph
+            self.graph.add_node(mission_id,
+                type="mission",
+                objective=objective,
+                mission_type=mission_type,
+                status="active",
+                priority=priority,
+                created_at=mission.created_at
+            )
+            self._log_node(mission_id)
+            
+            # Link to target entities/concepts
+            for target in (target_entities or []):
+                concept_id = self._ensure_concept(target, category="target_object")
+                self._add_edge(mission_id, concept_id, EdgeType.INVOLVES)
+            
+            self._save_missions()
         
         print(f"[Memory] Created mission: {mission_id} - {objective}", file=sys.stderr)
         return mission
@@ -383,9 +1462,11 @@ class JarvisMemory:
                 pass
         
         # Also check graph for active missions
-        for node_id, attrs in self.graph.nodes(data=True):
-            if attrs.get('type') == 'mission' and attrs.get('status') == 'active':
-                if not any(m.id == node_id for m in missions):
+        known = {m.id for m in missions}
+        for node_id in self._index.ordered(self._index.by_type.get('mission', ())):
+            attrs = self.graph.nodes[node_id]
+            if attrs.get('status') == 'active':
+                if node_id not in known:
                     missions.append(Mission(
                         id=node_id,
                         objective=attrs.get('objective', ''),
@@ -404,11 +1485,14 @@ class JarvisMemory:
             self.graph.nodes[mission_id]['completed_at'] = time.time()
             if results:
                 self.graph.nodes[mission_id]['results'] = results
-            self._save_graph()
+            self._log_node(mission_id)
             self._save_missions()
     
     def _save_missions(self):
         """Save active missions to file"""
+        if self._batch_depth:
+            self._missions_dirty = True
+            return
         missions = self.get_active_missions()
         missions_file = MISSIONS_DIR / "active_missions.json"
         with open(missions_file, 'w') as f:
@@ -422,20 +1506,23 @@ class JarvisMemory:
     ) -> List[Tuple[Mission, float]]:
         """Check if any missions match current observations"""
         matches = []
+        objects = [obj.lower() for obj in (detected_objects or [])]
+        heard = transcription.lower() if transcription else None
         
         for mission in self.get_active_missions():
             score = 0.0
+            targets = [t.lower() for t in mission.target_entities]
+            target_set = set(targets)
             
             # Check detected objects against target entities
-            if detected_objects and mission.target_entities:
-                for obj in detected_objects:
-                    if obj.lower() in [t.lower() for t in mission.target_entities]:
-                        score += 0.5
+            for obj in objects:
+                if obj in target_set:
+                    score += 0.5
             
             # Check transcription for keywords
-            if transcription and mission.target_entities:
-                for target in mission.target_entities:
-                    if target.lower() in transcription.lower():
+            if heard:
+                for target in targets:
+                    if target in heard:
                         score += 0.3
             
             if score > 0:
@@ -447,16 +1534,14 @@ class JarvisMemory:
     
     def search_entities(self, query: str, limit: int = 10) -> List[Dict]:
         """Search for entities by name"""
-        results = []
-        query_lower = query.lower()
-        
-        for node_id, attrs in self.graph.nodes(data=True):
-            if attrs.get('type') == 'entity':
-                name = attrs.get('name', '').lower()
-                if query_lower in name or query_lower in node_id.lower():
-                    results.append({'id': node_id, **attrs})
-        
-        return results[:limit]
+        return [{'id': node_id, **self.graph.nodes[node_id]}
+                for node_id in self._index.search(query, limit)]
+    
+    def get_concept_entities(self, concept: str, limit: int = None) -> List[Dict]:
+        """Entities that are a kind of concept (is_a edges)"""
+        concept_id = concept if concept.startswith("concept:") else f"concept:{concept.lower().replace(' ', '_')}"
+        members = self._index.concept_members(concept_id)[:limit]
+        return [{'id': node_id, **self.graph.nodes[node_id]} for node_id in members]
     
     def get_related_entities(self, entity_id: str, max_depth: int = 2) -> List[Dict]:
         """Get entities related to the given entity"""
@@ -482,21 +1567,19 @@ class JarvisMemory:
     
     def get_stats(self) -> Dict:
         """Get memory statistics"""
-        node_types = {}
-        for _, attrs in self.graph.nodes(data=True):
-            t = attrs.get('type', 'unknown')
-            node_types[t] = node_types.get(t, 0) + 1
+        # Counters kept by the graph and episode indexes; nothing is scanned
+        node_types = {t: len(ids) for t, ids in self._index.by_type.items() if ids}
         
-        episodes_count = len(list(EPISODES_DIR.glob("ep_*.json")))
+        episodes_count = self._episodes.count()
         
         return {
             'total_nodes': self.graph.number_of_nodes(),
-            'total_edges': self.graph.number_of_edges(),
+            'total_edges': self._index.edge_count,
             'entities': node_types.get('entity', 0),
             'concepts': node_types.get('concept', 0),
             'episodes': episodes_count,
             'time_nodes': node_types.get('time', 0),
-            'active_missions': len(self.get_active_missions()),
+            'active_missions': len(self._index.active_missions),
             'node_types': node_types
         }
     
@@ -528,6 +1611,74 @@ class JarvisMemory:
         return "\n".join(parts)
 
 
+def _synthetic_graph(nodes: int) -> nx.MultiDiGraph:
+    """Graph shaped like an observer's memory: episodes, their entities, time nodes"""
+    graph = nx.MultiDiGraph()
+    start = time.time() - nodes * 200
+    concepts = [f"concept:object_{i}" for i in range(80)]
+    for c in concepts:
+        graph.add_node(c, name=c[8:], type="concept", created_at=start, category="detected_object")
+    
+    # Two nodes per episode plus a time node every six
+    for i in range((nodes - len(concepts)) * 6 // 13):
+        ts = start + i * 600
+        ep, entity, time_id = f"ep_{int(ts * 1000)}", f"entity:ep_{int(ts * 1000)}", f"time:{i // 6}"
+        graph.add_node(ep, type="episode", timestamp=ts, episode_type="observation",
+                       summary=f"Observed: person, chair, cup near the window ({i})", importance=0.5)
+        graph.add_node(entity, name=ep, type="entity", category="episode_entity",
+                       created_at=ts, updated_at=ts)
+        if i % 6 == 0:
+            graph.add_node(time_id, type="time", timestamp=ts, date="2026-01-01",
+                           time="12:00", hour=12, day_of_week="Monday")
+        graph.add_edge(entity, concepts[0], key=f"is_a_{i}", type="is_a", created_at=ts)
+        for j in range(3):
+            graph.add_edge(entity, concepts[(i + j) % len(concepts)], key=f"observed_in_{i}_{j}",
+                           type="observed_in", created_at=ts)
+        graph.add_edge(entity, time_id, key=f"occurred_at_{i}", type="occurred_at", created_at=ts)
+    return graph
+
+
+def benchmark_snapshot(nodes: int) -> Dict:
+    """Compare loading a binary snapshot against the legacy indent=2 JSON file"""
+    import tempfile
+    
+    graph = _synthetic_graph(nodes)
+    with tempfile.TemporaryDirectory() as tmp:
+        json_file = Path(tmp) / "graph.json"
+        with open(json_file, 'w') as f:
+            json.dump({
+                'nodes': [{'id': n, **a} for n, a in graph.nodes(data=True)],
+                'edges': [{'source': u, 'target': v, 'key': k, **a}
+                          for u, v, k, a in graph.edges(keys=True, data=True)]
+            }, f, indent=2)
+        
+        snapshot = GraphSnapshot(Path(tmp) / "graph.snap")
+        started = time.perf_counter()
+        snapshot.save(graph, 1)
+        save_time = time.perf_counter() - started
+        result = {
+            'nodes': graph.number_of_nodes(),
+            'edges': graph.number_of_edges(),
+            'json_mb': round(json_file.stat().st_size / (1024 * 1024), 1),
+            'snapshot_mb': round(snapshot.path.stat().st_size / (1024 * 1024), 1),
+            'snapshot_save_s': round(save_time, 2),
+        }
+        del graph
+        gc.collect()  # graphs hold reference cycles (cached views)
+        
+        for name, load in (('json', lambda g: _load_json_graph(json_file, g)),
+                           ('snapshot', snapshot.load)):
+            loaded = nx.MultiDiGraph()
+            started = time.perf_counter()
+            load(loaded)
+            result[f'{name}_load_s'] = round(time.perf_counter() - started, 2)
+            del loaded
+            gc.collect()
+    
+    result['speedup'] = round(result['json_load_s'] / result['snapshot_load_s'], 2) if result['snapshot_load_s'] else None
+    return result
+
+
 # Singleton instance
 _memory_instance: Optional[JarvisMemory] = None
 
@@ -544,12 +1695,23 @@ if __name__ == "__main__":
     import argparse
     
     parser = argparse.ArgumentParser(description="Jarvis Memory System")
-    parser.add_argument("command", choices=["stats", "recent", "missions", "search", "context"])
+    parser.add_argument("command", choices=["stats", "recent", "missions", "search", "context", "reindex",
+                                            "migrate-episodes", "bench-snapshot"])
     parser.add_argument("--query", "-q", help="Search query")
     parser.add_argument("--limit", "-l", type=int, default=5)
     parser.add_argument("--json", action="store_true", help="Output as JSON")
+    parser.add_argument("--nodes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000],
+                        help="Graph sizes for bench-snapshot")
     
     args = parser.parse_args()
+    if args.command == "bench-snapshot":
+        results = [benchmark_snapshot(n) for n in args.nodes]
+        if args.json:
+            print(json.dumps(results, indent=2))
+        else:
+            for result in results:
+                print(", ".join(f"{k}: {v}" for k, v in result.items()))
+        sys.exit(0)
     memory = get_memory()
     
     if args.command == "stats":
@@ -589,4 +1751,13 @@ if __name__ == "__main__":
     
     elif args.command == "context":
         print(memory.get_context_for_llm())
+    
+    elif args.command == "reindex":
+        memory._episodes.rebuild()
+        print(f"Episodes indexed: {memory._episodes.count()}")
+    
+    elif args.command == "migrate-episodes":
+        # Normally done once automatically; rerun for files written by older versions since
+        memory._episodes.migrate_files()
+        print(f"Episodes: {memory._episodes.count()}")
 
@@ -9,13 +9,21 @@ but with scalable, persistent storage.
 Requirements:
 - PostgreSQL 14+ with pgvector extension
 - psycopg2-binary
-- sentence-transformers (for embeddings)
+- sentence-transformers (for embeddings, loaded on first use; see embedding_service.py)
 """
 
 import os
 import sys
+import re
 import json
+import math
 import time
+import queue
+import atexit
+import random
+import functools
+import threading
+from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
 from typing import Optional, Dict, List, Any, Tuple
@@ -23,17 +31,12 @@ from dataclasses import dataclass, field, asdict
 from enum import Enum
 
 import psycopg2
-from psycopg2.extras import Json, RealDictCursor
+from psycopg2.extras import Json, RealDictCursor, execute_values
+from psycopg2.pool import ThreadedConnectionPool
 
-# Try to import embedding model
-try:
-    from sentence_transformers import SentenceTransformer
-    EMBEDDING_MODEL = SentenceTransformer('all-MiniLM-L6-v2')
-    HAS_EMBEDDINGS = True
-except ImportError:
-    EMBEDDING_MODEL = None
-    HAS_EMBEDDINGS = False
-    print("[Memory-PG] sentence-transformers not available, semantic search disabled", file=sys.stderr)
+# Embeddings come from the shared server, or a model loaded on first use
+import embedding_service
+from embedding_service import EMBEDDING_DIM
 
 # Database configuration
 DB_CONFIG = {
@@ -42,10 +45,47 @@ DB_CONFIG = {
     'database': os.environ.get('JARVIS_DB_NAME', 'jarvis_memory'),
     'user': os.environ.get('JARVIS_DB_USER', 'jarvis'),
     'password': os.environ.get('JARVIS_DB_PASSWORD', 'jarvis_memory_2024'),
+    'connect_timeout': int(os.environ.get('JARVIS_DB_CONNECT_TIMEOUT', '2')),
 }
 
-# Embedding dimension
-EMBEDDING_DIM = 384  # all-MiniLM-L6-v2
+# Connection pool shared by every thread using the memory instance. The pool
+# closes connections returned while it holds POOL_MIN idle ones, so by
+# default it keeps all POOL_MAX open instead of reconnecting under load.
+POOL_MAX = int(os.environ.get('JARVIS_DB_POOL_MAX', '4'))
+POOL_MIN = min(int(os.environ.get('JARVIS_DB_POOL_MIN', POOL_MAX)), POOL_MAX)
+HEALTH_CHECK_IDLE = 30.0  # seconds idle before a connection is pinged on checkout
+
+# Approximate nearest-neighbour indexes on the embedding columns. Below
+# VECTOR_INDEX_MIN_ROWS an exact scan is fast enough and no index is kept.
+VECTOR_TABLES = ('episodes', 'nodes')
+VECTOR_INDEX_TYPE = os.environ.get('JARVIS_VECTOR_INDEX', 'hnsw')  # hnsw | ivfflat
+VECTOR_INDEX_MIN_ROWS = int(os.environ.get('JARVIS_VECTOR_INDEX_MIN_ROWS', '2000'))
+VECTOR_INDEX_AUTO = os.environ.get('JARVIS_VECTOR_INDEX_AUTO', '1') != '0'
+VECTOR_INDEX_CHECK_EVERY = 500  # embeddings written between index checks
+HNSW_M = 16
+HNSW_EF_CONSTRUCTION = 64
+HNSW_EF_SEARCH = int(os.environ.get('JARVIS_HNSW_EF_SEARCH', '40'))
+HNSW_EF_SEARCH_MAX = 1000  # pgvector's upper bound for hnsw.ef_search
+IVFFLAT_PROBES = int(os.environ.get('JARVIS_IVFFLAT_PROBES', '0'))  # 0: sqrt(lists)
+
+# Background embedding: writes commit without embeddings and a worker thread
+# fills them in, so write latency doesn't depend on model inference
+EMBED_BATCH_SIZE = 64
+EMBED_BATCH_WAIT = 0.05  # seconds to gather more jobs into a batch
+EMBED_DRAIN_TIMEOUT = float(os.environ.get('JARVIS_EMBED_DRAIN_TIMEOUT', '10'))  # at exit
+BACKFILL_IDLE = 300.0  # seconds idle before the worker embeds rows left without one
+
+# Hybrid episode search: candidates taken from each ranking, and the k of
+# reciprocal rank fusion (score = sum of 1 / (k + rank))
+HYBRID_CANDIDATES = 4  # per result requested
+RRF_K = 60
+LEXICAL_POOL = 1000  # newest text matches ranked by relevance; bounds common words
+
+# Bump when _ensure_schema changes, so existing databases run it again
+SCHEMA_VERSION = 1
+
+# Errors meaning the connection itself is gone, not that the query was bad
+CONNECTION_ERRORS = (psycopg2.OperationalError, psycopg2.InterfaceError)
 
 
 class EdgeType(Enum):
@@ -151,29 +191,210 @@ class Mission:
         )
 
 
+def _retry_on_disconnect(method):
+    """
+    Run an idempotent method again, once, on a fresh connection if the
+    connection it used dropped. Calls made inside a caller's batch() are not
+    retried, since the rest of that transaction is lost with the connection.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self._in_batch():
+            return method(self, *args, **kwargs)
+        try:
+            return method(self, *args, **kwargs)
+        except CONNECTION_ERRORS as e:
+            print(f"[Memory-PG] Connection lost ({e}), retrying", file=sys.stderr)
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+class EmbeddingWorker:
+    """
+    Background thread that embeds rows committed without an embedding.
+    
+    Jobs are (table, id, text) and are embedded in batches of up to
+    EMBED_BATCH_SIZE. When idle for BACKFILL_IDLE it backfills rows other
+    processes left unembedded and checks the vector indexes, building any
+    that became due. At interpreter exit it waits up to
+    EMBED_DRAIN_TIMEOUT for queued jobs; anything left is picked up by a
+    later backfill.
+    """
+    
+    def __init__(self, memory: 'JarvisMemoryPG'):
+        self.memory = memory
+        self._jobs = queue.Queue()
+        self._unfinished = 0
+        self._done = threading.Condition()
+        self._thread = None
+    
+    def submit(self, jobs: List[Tuple[str, str, str]]):
+        if not jobs or not embedding_service.available():
+            return
+        with self._done:
+            self._unfinished += len(jobs)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='embedding-worker', daemon=True)
+                self._thread.start()
+                atexit.register(self.drain, EMBED_DRAIN_TIMEOUT)
+        for job in jobs:
+            self._jobs.put(job)
+    
+    def drain(self, timeout: float = None) -> bool:
+        """Wait until every submitted job is written; False on timeout"""
+        with self._done:
+            return self._done.wait_for(lambda: not self._unfinished, timeout)
+    
+    def _run(self):
+        while True:
+            try:
+                jobs = [self._jobs.get(timeout=BACKFILL_IDLE)]
+            except queue.Empty:
+                try:
+                    self.memory.backfill_embeddings()
+                except Exception as e:
+                    print(f"[Memory-PG] Embedding backfill failed: {e}", file=sys.stderr)
+                if VECTOR_INDEX_AUTO:
+                    # Tables may have crossed the threshold through other processes
+                    self.memory._maybe_index_vectors()
+                continue
+            
+            deadline = time.monotonic() + EMBED_BATCH_WAIT
+            while len(jobs) < EMBED_BATCH_SIZE:
+                try:
+                    jobs.append(self._jobs.get(timeout=max(0.0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+            
+            try:
+                self.memory._write_embeddings(jobs)
+            except Exception as e:
+                # Rows stay NULL; backfill_embeddings() retries them later
+                print(f"[Memory-PG] Embedding {len(jobs)} rows failed: {e}", file=sys.stderr)
+            with self._done:
+                self._unfinished -= len(jobs)
+                self._done.notify_all()
+
+
 class JarvisMemoryPG:
     """
     PostgreSQL-backed memory system with pgvector for semantic search.
+    
+    Safe to share between threads: each batch() checks a connection out of a
+    pool for the calling thread, and reads run in a batch of their own.
+    Every write runs in batch(): rows are inserted without embeddings, the
+    transaction is committed once when the outermost batch exits, and the
+    queued texts are then embedded in batches by a background worker.
     """
     
     def __init__(self):
-        self.conn = None
+        self._pool = None
+        self._slots = threading.BoundedSemaphore(POOL_MAX)
+        self._last_used = {}  # id(connection) -> monotonic time it was checked in
+        self._local = threading.local()  # conn, pending embeddings of this thread's batch
+        self._vectors_written = 0  # since the last vector index check
+        self._ivfflat_lists = {}  # table -> lists of its ivfflat index
+        self._embedder = EmbeddingWorker(self)
         self._connect()
         self._ensure_schema()
+        self._read_vector_indexes()
     
     def _connect(self):
-        """Establish database connection"""
+        """Open the connection pool"""
         try:
-            self.conn = psycopg2.connect(**DB_CONFIG)
-            self.conn.autocommit = False
+            self._pool = ThreadedConnectionPool(POOL_MIN, POOL_MAX, **DB_CONFIG)
             print(f"[Memory-PG] Connected to PostgreSQL", file=sys.stderr)
         except Exception as e:
             print(f"[Memory-PG] Connection failed: {e}", file=sys.stderr)
             raise
     
+    def close(self):
+        """Finish queued embeddings and close every pooled connection"""
+        self._embedder.drain(EMBED_DRAIN_TIMEOUT)
+        if self._pool is not None:
+            self._pool.closeall()
+            self._pool = None
+    
+    @property
+    def conn(self):
+        """The connection checked out by this thread's current batch()"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            raise RuntimeError("JarvisMemoryPG.conn is only available inside batch()")
+        return conn
+    
+    def _in_batch(self) -> bool:
+        return getattr(self._local, 'conn', None) is not None
+    
+    def _checkout(self):
+        """
+        Take a connection from the pool, blocking while all POOL_MAX are in
+        use. One that has sat idle is pinged first and replaced if dead.
+        """
+        self._slots.acquire()
+        try:
+            conn = self._pool.getconn()
+            if not self._healthy(conn):
+                print("[Memory-PG] Replacing dead connection", file=sys.stderr)
+                self._last_used.pop(id(conn), None)
+                self._pool.putconn(conn, close=True)
+                conn = self._pool.getconn()
+            return conn
+        except BaseException:
+            self._slots.release()
+            raise
+    
+    def _checkin(self, conn, broken: bool = False):
+        try:
+            if broken or conn.closed:
+                self._last_used.pop(id(conn), None)
+                self._pool.putconn(conn, close=True)
+            else:
+                self._last_used[id(conn)] = time.monotonic()
+                self._pool.putconn(conn)
+                if conn.closed:
+                    # Discarded by the pool (more than POOL_MIN idle)
+                    self._last_used.pop(id(conn), None)
+        finally:
+            self._slots.release()
+    
+    def _healthy(self, conn) -> bool:
+        if conn.closed:
+            return False
+        last_used = self._last_used.get(id(conn))
+        if last_used is not None and time.monotonic() - last_used < HEALTH_CHECK_IDLE:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except CONNECTION_ERRORS:
+            return False
+    
+    def _schema_current(self, cur) -> bool:
+        cur.execute("SELECT to_regclass('memory_stats') IS NOT NULL")
+        if not cur.fetchone()[0]:
+            return False
+        cur.execute("SELECT value FROM memory_stats WHERE key = 'schema_version'")
+        row = cur.fetchone()
+        return row is not None and row[0] >= SCHEMA_VERSION
+    
     def _ensure_schema(self):
-        """Create tables if they don't exist"""
-        with self.conn.cursor() as cur:
+        """
+        Create tables, indexes and triggers if they don't exist. Done once per
+        SCHEMA_VERSION (recorded in memory_stats): even with IF NOT EXISTS or
+        OR REPLACE, the DDL takes table locks that wait for, and then hold
+        off, writers in other processes.
+        """
+        with self.batch(), self.conn.cursor() as cur:
+            if self._schema_current(cur):
+                return
+            # Serialize schema setup between processes starting at once
+            cur.execute("SELECT pg_advisory_xact_lock(hashtext('jarvis_memory_schema'))")
+            if self._schema_current(cur):
+                return
+            
             # Enable pgvector extension
             cur.execute("CREATE EXTENSION IF NOT EXISTS vector;")
             
@@ -191,6 +412,8 @@ class JarvisMemoryPG:
                 );
                 CREATE INDEX IF NOT EXISTS idx_nodes_type ON nodes(node_type);
                 CREATE INDEX IF NOT EXISTS idx_nodes_category ON nodes(category);
+                CREATE INDEX IF NOT EXISTS idx_nodes_unembedded ON nodes(id)
+                    WHERE embedding IS NULL AND node_type = 'entity';
             """ % EMBEDDING_DIM)
             
             # Edges table (relationships)
@@ -229,8 +452,39 @@ class JarvisMemoryPG:
                 );
                 CREATE INDEX IF NOT EXISTS idx_episodes_timestamp ON episodes(timestamp DESC);
                 CREATE INDEX IF NOT EXISTS idx_episodes_type ON episodes(episode_type);
+                CREATE INDEX IF NOT EXISTS idx_episodes_unembedded ON episodes(timestamp DESC)
+                    WHERE embedding IS NULL;
             """ % EMBEDDING_DIM)
             
+            # Text search: a maintained tsvector for ranked full-text matching,
+            # trigrams so ILIKE substring search doesn't scan the table
+            cur.execute("""
+                SELECT 1 FROM information_schema.columns
+                WHERE table_name = 'episodes' AND column_name = 'search_tsv'
+            """)
+            if not cur.fetchone():
+                cur.execute("""
+                    ALTER TABLE episodes ADD COLUMN search_tsv tsvector GENERATED ALWAYS AS (
+                        to_tsvector('english', COALESCE(summary, '') || ' ' || COALESCE(transcription, ''))
+                    ) STORED
+                """)
+            cur.execute("""
+                CREATE INDEX IF NOT EXISTS idx_episodes_search ON episodes USING gin(search_tsv);
+                CREATE INDEX IF NOT EXISTS idx_episodes_objects ON episodes USING gin(detected_objects);
+            """)
+            cur.execute("SAVEPOINT trigrams")
+            try:
+                cur.execute("""
+                    CREATE EXTENSION IF NOT EXISTS pg_trgm;
+                    CREATE INDEX IF NOT EXISTS idx_episodes_summary_trgm ON episodes USING gin(summary gin_trgm_ops);
+                    CREATE INDEX IF NOT EXISTS idx_episodes_transcription_trgm ON episodes USING gin(transcription gin_trgm_ops);
+                """)
+                cur.execute("RELEASE SAVEPOINT trigrams")
+            except (psycopg2.errors.FeatureNotSupported, psycopg2.errors.InsufficientPrivilege) as e:
+                cur.execute("ROLLBACK TO SAVEPOINT trigrams")
+                print(f"[Memory-PG] pg_trgm unavailable, substring search will scan: {e.pgerror.strip()}",
+                      file=sys.stderr)
+            
             # Missions table
             cur.execute("""
                 CREATE TABLE IF NOT EXISTS missions (
@@ -248,19 +502,452 @@ class JarvisMemoryPG:
                 CREATE INDEX IF NOT EXISTS idx_missions_status ON missions(status);
             """)
             
-            self.conn.commit()
+            self._ensure_stats(cur)
+            cur.execute("""
+                INSERT INTO memory_stats (key, value) VALUES ('schema_version', %s)
+                ON CONFLICT (key) DO UPDATE SET value = EXCLUDED.value
+            """, (SCHEMA_VERSION,))
             print("[Memory-PG] Schema initialized", file=sys.stderr)
     
+    def _ensure_stats(self, cur):
+        """
+        Keep row counts in memory_stats, maintained by triggers, so get_stats
+        reads a handful of rows instead of counting whole tables. Keys are
+        the table name, plus nodes:<node_type> and missions:<status>.
+        Inserts and deletes are counted once per statement from its
+        transition table, so a bulk write costs one counter update, not one
+        per row.
+        """
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS memory_stats (
+                key VARCHAR(100) PRIMARY KEY,
+                value BIGINT NOT NULL DEFAULT 0
+            );
+            
+            CREATE OR REPLACE FUNCTION memory_stats_bump(stat_key TEXT, delta BIGINT)
+            RETURNS void LANGUAGE sql AS $$
+                INSERT INTO memory_stats (key, value) VALUES (stat_key, delta)
+                ON CONFLICT (key) DO UPDATE SET value = memory_stats.value + delta;
+            $$;
+            
+            CREATE OR REPLACE FUNCTION memory_stats_count() RETURNS trigger
+            LANGUAGE plpgsql AS $$
+            BEGIN
+                IF TG_OP = 'INSERT' THEN
+                    PERFORM memory_stats_bump(TG_TABLE_NAME, 1);
+                ELSIF TG_OP = 'DELETE' THEN
+                    PERFORM memory_stats_bump(TG_TABLE_NAME, -1);
+                END IF;
+                IF TG_TABLE_NAME = 'nodes' THEN
+                    IF TG_OP <> 'INSERT' THEN
+                        PERFORM memory_stats_bump('nodes:' || OLD.node_type, -1);
+                    END IF;
+                    IF TG_OP <> 'DELETE' THEN
+                        PERFORM memory_stats_bump('nodes:' || NEW.node_type, 1);
+                    END IF;
+                ELSIF TG_TABLE_NAME = 'missions' THEN
+                    IF TG_OP <> 'INSERT' THEN
+                        PERFORM memory_stats_bump('missions:' || COALESCE(OLD.status, ''), -1);
+                    END IF;
+                    IF TG_OP <> 'DELETE' THEN
+                        PERFORM memory_stats_bump('missions:' || COALESCE(NEW.status, ''), 1);
+                    END IF;
+                END IF;
+                RETURN NULL;
+            END;
+            $$;
+            
+            CREATE OR REPLACE FUNCTION memory_stats_count_rows() RETURNS trigger
+            LANGUAGE plpgsql AS $$
+            DECLARE
+                sign BIGINT := CASE WHEN TG_OP = 'INSERT' THEN 1 ELSE -1 END;
+            BEGIN
+                -- changed: the statement's inserted or deleted rows
+                IF TG_TABLE_NAME = 'nodes' THEN
+                    INSERT INTO memory_stats (key, value)
+                    SELECT key, SUM(n) * sign FROM (
+                        SELECT 'nodes' AS key, COUNT(*) AS n FROM changed
+                        UNION ALL SELECT 'nodes:' || node_type, COUNT(*) FROM changed GROUP BY node_type
+                    ) c GROUP BY key HAVING SUM(n) > 0 ORDER BY key
+                    ON CONFLICT (key) DO UPDATE SET value = memory_stats.value + EXCLUDED.value;
+                ELSIF TG_TABLE_NAME = 'missions' THEN
+                    INSERT INTO memory_stats (key, value)
+                    SELECT key, SUM(n) * sign FROM (
+                        SELECT 'missions' AS key, COUNT(*) AS n FROM changed
+                        UNION ALL SELECT 'missions:' || COALESCE(status, ''), COUNT(*) FROM changed GROUP BY status
+                    ) c GROUP BY key HAVING SUM(n) > 0 ORDER BY key
+                    ON CONFLICT (key) DO UPDATE SET value = memory_stats.value + EXCLUDED.value;
+                ELSE
+                    INSERT INTO memory_stats (key, value)
+                    SELECT TG_TABLE_NAME, COUNT(*) * sign FROM changed HAVING COUNT(*) > 0
+                    ON CONFLICT (key) DO UPDATE SET value = memory_stats.value + EXCLUDED.value;
+                END IF;
+                RETURN NULL;
+            END;
+            $$;
+        """)
+        
+        for table in ('nodes', 'edges', 'episodes', 'missions'):
+            cur.execute(f"""
+                CREATE OR REPLACE TRIGGER {table}_stats
+                AFTER INSERT ON {table} REFERENCING NEW TABLE AS changed
+                FOR EACH STATEMENT EXECUTE FUNCTION memory_stats_count_rows();
+                
+                CREATE OR REPLACE TRIGGER {table}_stats_delete
+                AFTER DELETE ON {table} REFERENCING OLD TABLE AS changed
+                FOR EACH STATEMENT EXECUTE FUNCTION memory_stats_count_rows()
+            """)
+        for table, column in (('nodes', 'node_type'), ('missions', 'status')):
+            cur.execute(f"""
+                CREATE OR REPLACE TRIGGER {table}_stats_{column}
+                AFTER UPDATE OF {column} ON {table}
+                FOR EACH ROW WHEN (OLD.{column} IS DISTINCT FROM NEW.{column})
+                EXECUTE FUNCTION memory_stats_count()
+            """)
+        
+        # Seed the counters from the existing rows once; the triggers keep them
+        # current after that. SHARE locks hold off writers while counting.
+        cur.execute("SELECT 1 FROM memory_stats WHERE key = 'seeded'")
+        if cur.fetchone():
+            return
+        cur.execute("""
+            LOCK TABLE nodes, edges, episodes, missions IN SHARE MODE;
+            DELETE FROM memory_stats;
+            INSERT INTO memory_stats (key, value)
+                SELECT 'nodes', COUNT(*) FROM nodes
+                UNION ALL SELECT 'edges', COUNT(*) FROM edges
+                UNION ALL SELECT 'episodes', COUNT(*) FROM episodes
+                UNION ALL SELECT 'missions', COUNT(*) FROM missions
+                UNION ALL SELECT 'nodes:' || node_type, COUNT(*) FROM nodes GROUP BY node_type
+                UNION ALL SELECT 'missions:' || COALESCE(status, ''), COUNT(*) FROM missions GROUP BY status
+                UNION ALL SELECT 'seeded', 1;
+        """)
+    
     def _get_embedding(self, text: str) -> Optional[List[float]]:
         """Generate embedding for text"""
-        if not HAS_EMBEDDINGS or not EMBEDDING_MODEL:
-            return None
+        return self._get_embeddings([text])[0]
+    
+    def _get_embeddings(self, texts: List[str]) -> List[Optional[List[float]]]:
+        """Generate embeddings for several texts in one model call"""
+        if not texts or not embedding_service.available():
+            return [None] * len(texts)
         try:
-            embedding = EMBEDDING_MODEL.encode(text).tolist()
-            return embedding
+            return embedding_service.embed(texts)
         except Exception as e:
             print(f"[Memory-PG] Embedding error: {e}", file=sys.stderr)
-            return None
+            return [None] * len(texts)
+    
+    # === Batching ===
+    
+    @contextmanager
+    def batch(self):
+        """
+        Group writes into one transaction on one pooled connection, available
+        as self.conn inside the block. Node, edge and episode writes made
+        inside are committed once when the outermost batch exits, and the
+        embeddings they need are handed to the background worker. If the
+        block raises, the transaction is rolled back. Batches nest, and each
+        thread gets its own.
+        """
+        local = self._local
+        if self._in_batch():
+            yield self
+            return
+        
+        conn = self._checkout()
+        local.conn, local.pending = conn, []  # pending: (table, id, text)
+        broken = False
+        try:
+            yield self
+            self._flush_batch()
+        except BaseException as e:
+            broken = isinstance(e, CONNECTION_ERRORS)
+            try:
+                conn.rollback()
+            except CONNECTION_ERRORS:
+                broken = True
+            raise
+        finally:
+            local.conn, local.pending = None, []
+            self._checkin(conn, broken)
+        
+        if VECTOR_INDEX_AUTO and self._vectors_written >= VECTOR_INDEX_CHECK_EVERY:
+            self._vectors_written = 0
+            self._maybe_index_vectors()
+    
+    @contextmanager
+    def _autocommit(self):
+        """A pooled connection in autocommit mode, for statements that can't run in a transaction"""
+        if self._in_batch():
+            raise RuntimeError("Autocommit statements cannot run inside batch()")
+        conn = self._checkout()
+        broken = False
+        try:
+            conn.autocommit = True
+            yield conn
+        except CONNECTION_ERRORS:
+            broken = True
+            raise
+        finally:
+            if not broken and not conn.closed:
+                conn.autocommit = False
+            self._checkin(conn, broken)
+    
+    def _queue_embedding(self, table: str, row_id: str, text: str):
+        """Have the worker embed a row once the current batch commits"""
+        self._local.pending.append((table, row_id, text))
+    
+    def _flush_batch(self):
+        pending = self._local.pending
+        self._local.pending = []
+        self.conn.commit()
+        self._embedder.submit(pending)
+    
+    def _write_embeddings(self, jobs: List[Tuple[str, str, str]]) -> int:
+        """Embed (table, id, text) jobs in one model call and store the vectors"""
+        embeddings = self._get_embeddings([text for _, _, text in jobs])
+        rows = {}  # table -> [(id, vector text)]
+        for (table, row_id, _), embedding in zip(jobs, embeddings):
+            if embedding is not None:
+                # pgvector's text form, much cheaper to send than ARRAY[...];
+                # 9 digits round-trip the model's float32 values exactly
+                text = '[' + ','.join(['%.9g'] * len(embedding)) % tuple(embedding) + ']'
+                rows.setdefault(table, []).append((row_id, text))
+        written = 0
+        with self.batch(), self.conn.cursor() as cur:
+            for table, values in rows.items():
+                # One statement per table; upserted nodes keep the embedding they were created with
+                execute_values(cur, f"""
+                    UPDATE {table} t SET embedding = v.embedding::vector
+                    FROM (VALUES %s) AS v(id, embedding)
+                    WHERE t.id = v.id AND t.embedding IS NULL
+                """, values, page_size=len(values))
+                written += cur.rowcount
+            self._vectors_written += written
+        return written
+    
+    def backfill_embeddings(self, limit: int = None, batch_size: int = EMBED_BATCH_SIZE) -> int:
+        """
+        Embed episodes and entities stored without an embedding, e.g. by a
+        process that exited before its worker finished or by a migration,
+        batch_size texts per model call. Returns the number of rows filled.
+        """
+        if not embedding_service.available():
+            return 0
+        sources = {
+            # Same texts create_episode and add_entity embed
+            'episodes': """
+                SELECT id, COALESCE(summary, '') || COALESCE(' ' || transcription, '')
+                FROM episodes WHERE embedding IS NULL
+                ORDER BY timestamp DESC LIMIT %s
+            """,
+            'nodes': """
+                SELECT id, concat_ws(' ', name, category)
+                FROM nodes WHERE embedding IS NULL AND node_type = 'entity'
+                LIMIT %s
+            """,
+        }
+        filled = 0
+        for table, sql in sources.items():
+            while limit is None or filled < limit:
+                size = batch_size if limit is None else min(batch_size, limit - filled)
+                with self.batch(), self.conn.cursor() as cur:
+                    cur.execute(sql, (size,))
+                    rows = cur.fetchall()
+                if not rows:
+                    break
+                written = self._write_embeddings([(table, row_id, text) for row_id, text in rows])
+                if not written:
+                    break  # embedding failed; leave the rest for a later pass
+                filled += written
+        if filled:
+            print(f"[Memory-PG] Backfilled {filled} embeddings", file=sys.stderr)
+        return filled
+    
+    # === Vector Indexes ===
+    
+    def _read_vector_indexes(self):
+        """
+        Note the lists of existing ivfflat indexes, for search tuning. Only a
+        catalog lookup: building indexes is left to the embedding worker
+        (after VECTOR_INDEX_CHECK_EVERY embeddings, or when idle) and to
+        the index-vectors command, so starting up never waits on a build.
+        """
+        with self.batch(), self.conn.cursor() as cur:
+            cur.execute("""
+                SELECT c.relname, c.reloptions
+                FROM pg_class c JOIN pg_am am ON am.oid = c.relam
+                WHERE am.amname = 'ivfflat' AND c.relname = ANY(%s)
+            """, ([f"idx_{table}_embedding" for table in VECTOR_TABLES],))
+            for name, reloptions in cur.fetchall():
+                options = dict(opt.split('=', 1) for opt in reloptions or [])
+                self._ivfflat_lists[name[len('idx_'):-len('_embedding')]] = int(options.get('lists', 1))
+    
+    def _maybe_index_vectors(self):
+        """ensure_vector_indexes(), logging instead of raising: writes must not fail over it"""
+        try:
+            for table, action in self.ensure_vector_indexes().items():
+                if action not in ('ok', 'below threshold', 'busy'):
+                    print(f"[Memory-PG] Vector index on {table}: {action}", file=sys.stderr)
+        except Exception as e:
+            print(f"[Memory-PG] Vector index maintenance failed: {e}", file=sys.stderr)
+    
+    def ensure_vector_indexes(self, rebuild: bool = False) -> Dict[str, str]:
+        """
+        Create or refresh the ANN index on each embedding column.
+        
+        A table gets an index (VECTOR_INDEX_TYPE, cosine distance) once it
+        holds VECTOR_INDEX_MIN_ROWS rows. HNSW indexes absorb inserts as they
+        come; ivfflat indexes are rebuilt when the table has grown enough
+        that their lists no longer fit it. Builds run CONCURRENTLY so writers
+        are not blocked, and only one process builds at a time.
+        Returns the action taken per table.
+        """
+        with self._autocommit() as conn, conn.cursor() as cur:
+            cur.execute("SELECT pg_try_advisory_lock(hashtext('jarvis_vector_index'))")
+            if not cur.fetchone()[0]:
+                return {table: 'busy' for table in VECTOR_TABLES}
+            try:
+                return {table: self._maintain_vector_index(cur, table, rebuild) for table in VECTOR_TABLES}
+            finally:
+                cur.execute("SELECT pg_advisory_unlock(hashtext('jarvis_vector_index'))")
+    
+    @staticmethod
+    def _ivfflat_lists_for(rows: int) -> int:
+        # pgvector's guidance: rows / 1000 up to 1M rows, sqrt(rows) beyond
+        return max(1, rows // 1000) if rows <= 1000000 else int(math.sqrt(rows))
+    
+    def _maintain_vector_index(self, cur, table: str, rebuild: bool) -> str:
+        name = f"idx_{table}_embedding"
+        cur.execute("SELECT value FROM memory_stats WHERE key = %s", (table,))
+        row = cur.fetchone()
+        rows = row[0] if row else 0
+        
+        cur.execute("""
+            SELECT am.amname, c.reloptions, i.indisvalid
+            FROM pg_class c
+            JOIN pg_index i ON i.indexrelid = c.oid
+            JOIN pg_am am ON am.oid = c.relam
+            WHERE c.relname = %s
+        """, (name,))
+        current = cur.fetchone()
+        
+        lists = self._ivfflat_lists_for(rows)
+        if current is None:
+            if rows < VECTOR_INDEX_MIN_ROWS and not rebuild:
+                return 'below threshold'
+            action = 'created'
+        else:
+            method, reloptions, valid = current
+            options = dict(opt.split('=', 1) for opt in reloptions or [])
+            if method == 'ivfflat':
+                self._ivfflat_lists[table] = int(options.get('lists', 1))
+            if not valid:
+                action = 'rebuilt (invalid)'
+            elif method != VECTOR_INDEX_TYPE:
+                action = f'rebuilt ({method} -> {VECTOR_INDEX_TYPE})'
+            elif method == 'ivfflat' and lists >= 2 * int(options.get('lists', 1)):
+                action = f"rebuilt (lists {options.get('lists')} -> {lists})"
+            elif rebuild:
+                action = 'rebuilt'
+            else:
+                return 'ok'
+        
+        if VECTOR_INDEX_TYPE == 'hnsw':
+            using = f"hnsw (embedding vector_cosine_ops) WITH (m = {HNSW_M}, ef_construction = {HNSW_EF_CONSTRUCTION})"
+        elif VECTOR_INDEX_TYPE == 'ivfflat':
+            using = f"ivfflat (embedding vector_cosine_ops) WITH (lists = {lists})"
+        else:
+            raise ValueError(f"Unknown JARVIS_VECTOR_INDEX: {VECTOR_INDEX_TYPE}")
+        
+        # Build beside the old index and swap, so searches keep using one meanwhile
+        print(f"[Memory-PG] Building {VECTOR_INDEX_TYPE} index on {table} ({rows} rows)...", file=sys.stderr)
+        cur.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}_new")
+        cur.execute(f"CREATE INDEX CONCURRENTLY {name}_new ON {table} USING {using}")
+        cur.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+        cur.execute(f"ALTER INDEX {name}_new RENAME TO {name}")
+        if VECTOR_INDEX_TYPE == 'ivfflat':
+            self._ivfflat_lists[table] = lists
+        return action
+    
+    def _tune_vector_search(self, cur, table: str, limit: int, ef_search: int = None, probes: int = None):
+        """Set this transaction's ANN search breadth; more is slower but finds more true neighbours"""
+        # Past the maximum, a larger limit just gets fewer than limit from the index
+        ef_search = min(max(ef_search or HNSW_EF_SEARCH, limit), HNSW_EF_SEARCH_MAX)
+        if not probes:
+            probes = IVFFLAT_PROBES or max(1, round(math.sqrt(self._ivfflat_lists.get(table, 1))))
+        cur.execute("SELECT set_config('hnsw.ef_search', %s, true), set_config('ivfflat.probes', %s, true)",
+                    (str(ef_search), str(probes)))
+    
+    def benchmark_vector_index(self, rows: int = 20000, queries: int = 50, limit: int = 10,
+                               clusters: int = 50) -> List[Dict]:
+        """
+        Recall and latency of HNSW and ivfflat at several search settings on
+        synthetic clustered embeddings, against exact search. Runs in a
+        temporary table, so stored memory is untouched.
+        """
+        rng = random.Random(0)
+        
+        def unit(vector):
+            norm = math.sqrt(sum(x * x for x in vector)) or 1.0
+            return [x / norm for x in vector]
+        
+        centroids = [unit([rng.gauss(0, 1) for _ in range(EMBEDDING_DIM)]) for _ in range(clusters)]
+        
+        def sample():
+            centroid = rng.choice(centroids)
+            return unit([c + rng.gauss(0, 0.1) for c in centroid])
+        
+        def to_vector(vector):
+            return '[' + ','.join(f"{x:.6f}" for x in vector) + ']'
+        
+        probes_set = [to_vector(sample()) for _ in range(queries)]
+        results = []
+        
+        with self.batch(), self.conn.cursor() as cur:
+            cur.execute(f"""
+                CREATE TEMP TABLE bench_vectors (id INT PRIMARY KEY, embedding vector({EMBEDDING_DIM}))
+                ON COMMIT DROP
+            """)
+            for start in range(0, rows, 1000):
+                execute_values(cur, "INSERT INTO bench_vectors (id, embedding) VALUES %s",
+                               [(i, to_vector(sample())) for i in range(start, min(start + 1000, rows))])
+            cur.execute("ANALYZE bench_vectors")
+            
+            def run():
+                found, elapsed = [], 0.0
+                for q in probes_set:
+                    start = time.perf_counter()
+                    cur.execute("SELECT id FROM bench_vectors ORDER BY embedding <=> %s::vector LIMIT %s",
+                                (q, limit))
+                    found.append({r[0] for r in cur.fetchall()})
+                    elapsed += time.perf_counter() - start
+                return found, elapsed * 1000 / len(probes_set)
+            
+            exact, latency = run()
+            results.append({'index': 'exact', 'setting': None, 'recall': 1.0, 'latency_ms': latency})
+            
+            # Keep the planner on the index under test
+            cur.execute("SET LOCAL enable_seqscan = off")
+            sweeps = [
+                ('hnsw', f"hnsw (embedding vector_cosine_ops) WITH (m = {HNSW_M}, ef_construction = {HNSW_EF_CONSTRUCTION})",
+                 'hnsw.ef_search', [limit, 20, 40, 80, 160]),
+                ('ivfflat', f"ivfflat (embedding vector_cosine_ops) WITH (lists = {self._ivfflat_lists_for(rows)})",
+                 'ivfflat.probes', [1, 2, 4, 8, 16, 32]),
+            ]
+            for method, using, setting, values in sweeps:
+                start = time.perf_counter()
+                cur.execute(f"CREATE INDEX bench_vectors_idx ON bench_vectors USING {using}")
+                build = time.perf_counter() - start
+                for value in values:
+                    cur.execute("SELECT set_config(%s, %s, true)", (setting, str(value)))
+                    found, latency = run()
+                    recall = sum(len(f & e) for f, e in zip(found, exact)) / sum(len(e) for e in exact)
+                    results.append({'index': method, 'setting': f"{setting.split('.')[1]}={value}",
+                                    'recall': recall, 'latency_ms': latency, 'build_s': build})
+                cur.execute("DROP INDEX bench_vectors_idx")
+        
+        return results
     
     # === Entity Management ===
     
@@ -268,27 +955,23 @@ class JarvisMemoryPG:
         """Add or update an entity node"""
         node_id = f"entity:{name.lower().replace(' ', '_')}"
         
-        with self.conn.cursor() as cur:
-            # Get embedding for entity
-            embedding = self._get_embedding(f"{name} {category}")
-            
+        with self.batch(), self.conn.cursor() as cur:
             cur.execute("""
-                INSERT INTO nodes (id, node_type, name, category, attributes, embedding)
-                VALUES (%s, 'entity', %s, %s, %s, %s)
+                INSERT INTO nodes (id, node_type, name, category, attributes)
+                VALUES (%s, 'entity', %s, %s, %s)
                 ON CONFLICT (id) DO UPDATE SET
                     name = EXCLUDED.name,
                     attributes = nodes.attributes || EXCLUDED.attributes,
                     updated_at = CURRENT_TIMESTAMP
                 RETURNING id
-            """, (node_id, name, category, Json(attributes), embedding))
+            """, (node_id, name, category, Json(attributes)))
+            self._queue_embedding('nodes', node_id, f"{name} {category}")
             
             # Ensure category concept exists
             self._ensure_concept(category)
             
             # Add IS_A relationship
             self._add_edge(node_id, f"concept:{category}", EdgeType.IS_A)
-            
-            self.conn.commit()
         
         return node_id
     
@@ -333,12 +1016,6 @@ class JarvisMemoryPG:
         episode_id = f"ep_{int(time.time() * 1000)}"
         timestamp = datetime.now()
         
-        # Generate embedding from summary and transcription
-        embed_text = summary
-        if transcription:
-            embed_text += " " + transcription
-        embedding = self._get_embedding(embed_text)
-        
         episode = Episode(
             id=episode_id,
             timestamp=timestamp.timestamp(),
@@ -355,37 +1032,43 @@ class JarvisMemoryPG:
             metadata=metadata
         )
         
-        with self.conn.cursor() as cur:
+        with self.batch(), self.conn.cursor() as cur:
             cur.execute("""
                 INSERT INTO episodes (
                     id, timestamp, episode_type, summary, importance,
                     video_path, audio_path, image_path, transcription,
-                    detected_objects, entities_mentioned, mission_id, metadata, embedding
-                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                    detected_objects, entities_mentioned, mission_id, metadata
+                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
             """, (
                 episode_id, timestamp, episode_type, summary, importance,
                 video_path, audio_path, image_path, transcription,
                 detected_objects or [], entities_mentioned or [], mission_id,
-                Json(metadata), embedding
+                Json(metadata)
             ))
             
-            self.conn.commit()
+            # Embed summary and transcription
+            embed_text = summary
+            if transcription:
+                embed_text += " " + transcription
+            self._queue_embedding('episodes', episode_id, embed_text)
         
         print(f"[Memory-PG] Created episode: {episode_id} - {summary[:50]}...", file=sys.stderr)
         return episode
     
+    @_retry_on_disconnect
     def get_episode(self, episode_id: str) -> Optional[Episode]:
         """Retrieve an episode by ID"""
-        with self.conn.cursor(cursor_factory=RealDictCursor) as cur:
+        with self.batch(), self.conn.cursor(cursor_factory=RealDictCursor) as cur:
             cur.execute("SELECT * FROM episodes WHERE id = %s", (episode_id,))
             row = cur.fetchone()
             if row:
                 return Episode.from_row(dict(row))
         return None
     
+    @_retry_on_disconnect
     def get_recent_episodes(self, limit: int = 10, episode_type: str = None) -> List[Episode]:
         """Get most recent episodes"""
-        with self.conn.cursor(cursor_factory=RealDictCursor) as cur:
+        with self.batch(), self.conn.cursor(cursor_factory=RealDictCursor) as cur:
             if episode_type:
                 cur.execute("""
                     SELECT * FROM episodes 
@@ -400,6 +1083,7 @@ class JarvisMemoryPG:
             
             return [Episode.from_row(dict(row)) for row in cur.fetchall()]
     
+    @_retry_on_disconnect
     def search_episodes_by_time(
         self,
         start_time: datetime = None,
@@ -408,7 +1092,7 @@ class JarvisMemoryPG:
         limit: int = 50
     ) -> List[Episode]:
         """Search episodes by time range"""
-        with self.conn.cursor(cursor_factory=RealDictCursor) as cur:
+        with self.batch(), self.conn.cursor(cursor_factory=RealDictCursor) as cur:
             conditions = []
             params = []
             
@@ -433,9 +1117,16 @@ class JarvisMemoryPG:
             
             return [Episode.from_row(dict(row)) for row in cur.fetchall()]
     
-    def semantic_search_episodes(self, query: str, limit: int = 10) -> List[Episode]:
-        """Search episodes by semantic similarity"""
-        if not HAS_EMBEDDINGS:
+    @_retry_on_disconnect
+    def semantic_search_episodes(self, query: str, limit: int = 10,
+                                 ef_search: int = None, probes: int = None) -> List[Episode]:
+        """
+        Search episodes by semantic similarity. ef_search (HNSW) and probes
+        (ivfflat) trade speed for recall when a vector index is in use.
+        Episodes not embedded yet are matched by full-text search instead
+        and listed first.
+        """
+        if not embedding_service.available():
             # Fallback to text search
             return self._text_search_episodes(query, limit)
         
@@ -443,20 +1134,126 @@ class JarvisMemoryPG:
         if not embedding:
             return self._text_search_episodes(query, limit)
         
-        with self.conn.cursor(cursor_factory=RealDictCursor) as cur:
+        with self.batch(), self.conn.cursor(cursor_factory=RealDictCursor) as cur:
+            self._tune_vector_search(cur, 'episodes', limit, ef_search, probes)
             cur.execute("""
-                SELECT *, embedding <=> %s::vector AS distance
+                SELECT *, embedding <=> %(q)s::vector AS distance
                 FROM episodes
                 WHERE embedding IS NOT NULL
-                ORDER BY distance ASC
-                LIMIT %s
-            """, (embedding, limit))
+                ORDER BY embedding <=> %(q)s::vector
+                LIMIT %(limit)s
+            """, {'q': embedding, 'limit': limit})
+            similar = cur.fetchall()
             
+            cur.execute("""
+                SELECT * FROM episodes
+                WHERE embedding IS NULL AND search_tsv @@ plainto_tsquery('english', %s)
+                ORDER BY timestamp DESC LIMIT %s
+            """, (query, limit))
+            unembedded = cur.fetchall()
+            
+            return [Episode.from_row(dict(row)) for row in (unembedded + similar)[:limit]]
+    
+    @_retry_on_disconnect
+    def search_episodes(
+        self,
+        query: str = None,
+        start_time: datetime = None,
+        end_time: datetime = None,
+        episode_type: str = None,
+        objects: List[str] = None,
+        limit: int = 10,
+        ef_search: int = None,
+        probes: int = None
+    ) -> List[Episode]:
+        """
+        Find episodes with every filter and ranking in one query.
+        
+        Filters: time range, episode type, and detected objects (all must be
+        present). With a query, matches are ranked by full-text relevance
+        (any query word, or a query word among the detected objects) and by
+        embedding similarity, and the two rankings are combined with
+        reciprocal rank fusion. Without one, the newest matches come first.
+        """
+        conditions = []
+        params = {'limit': limit, 'candidates': max(limit * HYBRID_CANDIDATES, 20), 'k': RRF_K,
+                  'pool': LEXICAL_POOL}
+        if start_time:
+            conditions.append("timestamp >= %(start)s")
+            params['start'] = start_time
+        if end_time:
+            conditions.append("timestamp <= %(end)s")
+            params['end'] = end_time
+        if episode_type:
+            conditions.append("episode_type = %(type)s")
+            params['type'] = episode_type
+        if objects:
+            conditions.append("detected_objects @> %(objects)s::text[]")
+            params['objects'] = list(objects)
+        where = " AND ".join(conditions) if conditions else "TRUE"
+        
+        if not query or not query.strip():
+            with self.batch(), self.conn.cursor(cursor_factory=RealDictCursor) as cur:
+                cur.execute(f"""
+                    SELECT * FROM episodes WHERE {where}
+                    ORDER BY timestamp DESC LIMIT %(limit)s
+                """, params)
+                return [Episode.from_row(dict(row)) for row in cur.fetchall()]
+        
+        params['text'] = query
+        params['words'] = re.findall(r"\w+", query.lower())
+        # Any word may match (plainto_tsquery would need all of them); more
+        # matching words rank higher. Only the newest LEXICAL_POOL matches are
+        # scored, so a very common word doesn't rank half the table.
+        tsq = "NULLIF(replace(plainto_tsquery('english', %(text)s)::text, '&', '|'), '')::tsquery"
+        rankings = [f"""
+            SELECT id, row_number() OVER (ORDER BY relevance DESC, timestamp DESC) AS rank
+            FROM (
+                SELECT id, timestamp,
+                       COALESCE(ts_rank_cd(search_tsv, {tsq}), 0)
+                           + CASE WHEN detected_objects && %(words)s::text[] THEN 1 ELSE 0 END AS relevance
+                FROM (
+                    SELECT id, timestamp, search_tsv, detected_objects FROM episodes
+                    WHERE (search_tsv @@ {tsq} OR detected_objects && %(words)s::text[]) AND {where}
+                    ORDER BY timestamp DESC LIMIT %(pool)s
+                ) matches
+                ORDER BY relevance DESC LIMIT %(candidates)s
+            ) lexical
+        """]
+        
+        embedding = self._get_embedding(query) if embedding_service.available() else None
+        if embedding:
+            params['q'] = embedding
+            rankings.append(f"""
+                SELECT id, row_number() OVER (ORDER BY distance) AS rank
+                FROM (
+                    SELECT id, embedding <=> %(q)s::vector AS distance
+                    FROM episodes
+                    WHERE embedding IS NOT NULL AND {where}
+                    ORDER BY embedding <=> %(q)s::vector LIMIT %(candidates)s
+                ) semantic
+            """)
+        
+        with self.batch(), self.conn.cursor(cursor_factory=RealDictCursor) as cur:
+            if embedding:
+                self._tune_vector_search(cur, 'episodes', params['candidates'], ef_search, probes)
+            cur.execute(f"""
+                SELECT e.*, fused.score
+                FROM (
+                    SELECT id, SUM(1.0 / (%(k)s + rank)) AS score
+                    FROM ({" UNION ALL ".join(rankings)}) ranked
+                    GROUP BY id
+                ) fused
+                JOIN episodes e USING (id)
+                ORDER BY fused.score DESC, e.timestamp DESC
+                LIMIT %(limit)s
+            """, params)
             return [Episode.from_row(dict(row)) for row in cur.fetchall()]
     
+    @_retry_on_disconnect
     def _text_search_episodes(self, query: str, limit: int) -> List[Episode]:
         """Fallback text search for episodes"""
-        with self.conn.cursor(cursor_factory=RealDictCursor) as cur:
+        with self.batch(), self.conn.cursor(cursor_factory=RealDictCursor) as cur:
             cur.execute("""
                 SELECT * FROM episodes
                 WHERE summary ILIKE %s OR transcription ILIKE %s
@@ -487,7 +1284,7 @@ class JarvisMemoryPG:
             trigger_conditions=trigger_conditions or {}
         )
         
-        with self.conn.cursor() as cur:
+        with self.batch(), self.conn.cursor() as cur:
             cur.execute("""
                 INSERT INTO missions (
                     id, objective, mission_type, priority,
@@ -497,15 +1294,14 @@ class JarvisMemoryPG:
                 mission_id, objective, mission_type, priority,
                 target_entities or [], Json(trigger_conditions or {})
             ))
-            
-            self.conn.commit()
         
         print(f"[Memory-PG] Created mission: {mission_id} - {objective}", file=sys.stderr)
         return mission
     
+    @_retry_on_disconnect
     def get_active_missions(self) -> List[Mission]:
         """Get all active missions"""
-        with self.conn.cursor(cursor_factory=RealDictCursor) as cur:
+        with self.batch(), self.conn.cursor(cursor_factory=RealDictCursor) as cur:
             cur.execute("""
                 SELECT * FROM missions WHERE status = 'active'
                 ORDER BY 
@@ -519,15 +1315,15 @@ class JarvisMemoryPG:
             
             return [Mission.from_row(dict(row)) for row in cur.fetchall()]
     
+    @_retry_on_disconnect
     def complete_mission(self, mission_id: str, results: Dict = None):
         """Mark a mission as completed"""
-        with self.conn.cursor() as cur:
+        with self.batch(), self.conn.cursor() as cur:
             cur.execute("""
                 UPDATE missions 
                 SET status = 'completed', completed_at = CURRENT_TIMESTAMP, results = %s
                 WHERE id = %s
             """, (Json(results or {}), mission_id))
-            self.conn.commit()
     
     def check_mission_match(
         self,
@@ -537,18 +1333,21 @@ class JarvisMemoryPG:
     ) -> List[Tuple[Mission, float]]:
         """Check if any missions match current observations"""
         matches = []
+        objects = [obj.lower() for obj in (detected_objects or [])]
+        heard = transcription.lower() if transcription else None
         
         for mission in self.get_active_missions():
             score = 0.0
+            targets = [t.lower() for t in mission.target_entities]
+            target_set = set(targets)
             
-            if detected_objects and mission.target_entities:
-                for obj in detected_objects:
-                    if obj.lower() in [t.lower() for t in mission.target_entities]:
-                        score += 0.5
+            for obj in objects:
+                if obj in target_set:
+                    score += 0.5
             
-            if transcription and mission.target_entities:
-                for target in mission.target_entities:
-                    if target.lower() in transcription.lower():
+            if heard:
+                for target in targets:
+                    if target in heard:
                         score += 0.3
             
             if score > 0:
@@ -558,9 +1357,10 @@ class JarvisMemoryPG:
     
     # === Query Methods ===
     
+    @_retry_on_disconnect
     def search_entities(self, query: str, limit: int = 10) -> List[Dict]:
         """Search for entities by name"""
-        with self.conn.cursor(cursor_factory=RealDictCursor) as cur:
+        with self.batch(), self.conn.cursor(cursor_factory=RealDictCursor) as cur:
             cur.execute("""
                 SELECT * FROM nodes
                 WHERE node_type = 'entity' AND name ILIKE %s
@@ -569,30 +1369,22 @@ class JarvisMemoryPG:
             
             return [dict(row) for row in cur.fetchall()]
     
+    @_retry_on_disconnect
     def get_stats(self) -> Dict:
         """Get memory statistics"""
-        with self.conn.cursor() as cur:
-            stats = {}
-            
-            cur.execute("SELECT COUNT(*) FROM nodes")
-            stats['total_nodes'] = cur.fetchone()[0]
-            
-            cur.execute("SELECT COUNT(*) FROM edges")
-            stats['total_edges'] = cur.fetchone()[0]
-            
-            cur.execute("SELECT COUNT(*) FROM nodes WHERE node_type = 'entity'")
-            stats['entities'] = cur.fetchone()[0]
-            
-            cur.execute("SELECT COUNT(*) FROM nodes WHERE node_type = 'concept'")
-            stats['concepts'] = cur.fetchone()[0]
-            
-            cur.execute("SELECT COUNT(*) FROM episodes")
-            stats['episodes'] = cur.fetchone()[0]
-            
-            cur.execute("SELECT COUNT(*) FROM missions WHERE status = 'active'")
-            stats['active_missions'] = cur.fetchone()[0]
-            
-            return stats
+        # Counters maintained by the memory_stats triggers (see _ensure_stats)
+        with self.batch(), self.conn.cursor() as cur:
+            cur.execute("SELECT key, value FROM memory_stats")
+            counts = dict(cur.fetchall())
+        
+        return {
+            'total_nodes': counts.get('nodes', 0),
+            'total_edges': counts.get('edges', 0),
+            'entities': counts.get('nodes:entity', 0),
+            'concepts': counts.get('nodes:concept', 0),
+            'episodes': counts.get('episodes', 0),
+            'active_missions': counts.get('missions:active', 0),
+        }
     
     def get_context_for_llm(self, include_recent: bool = True, include_missions: bool = True) -> str:
         """Generate context string for LLM"""
@@ -640,10 +1432,14 @@ if __name__ == "__main__":
     import argparse
     
     parser = argparse.ArgumentParser(description="Jarvis Memory System (PostgreSQL)")
-    parser.add_argument("command", choices=["stats", "recent", "missions", "search", "context"])
+    parser.add_argument("command", choices=["stats", "recent", "missions", "search", "context",
+                                            "index-vectors", "bench-vectors", "backfill-embeddings"])
     parser.add_argument("--query", "-q", help="Search query")
     parser.add_argument("--limit", "-l", type=int, default=5)
     parser.add_argument("--json", action="store_true", help="Output as JSON")
+    parser.add_argument("--rebuild", action="store_true", help="index-vectors: rebuild existing indexes")
+    parser.add_argument("--rows", type=int, default=20000, help="bench-vectors: synthetic rows")
+    parser.add_argument("--queries", type=int, default=50, help="bench-vectors: queries per setting")
     
     args = parser.parse_args()
     memory = get_memory()
@@ -685,4 +1481,21 @@ if __name__ == "__main__":
     
     elif args.command == "context":
         print(memory.get_context_for_llm())
+    
+    elif args.command == "index-vectors":
+        for table, action in memory.ensure_vector_indexes(rebuild=args.rebuild).items():
+            print(f"{table}: {action}")
+    
+    elif args.command == "backfill-embeddings":
+        print(f"Embedded {memory.backfill_embeddings()} rows")
+    
+    elif args.command == "bench-vectors":
+        results = memory.benchmark_vector_index(rows=args.rows, queries=args.queries, limit=args.limit)
+        if args.json:
+            print(json.dumps(results, indent=2))
+        else:
+            print(f"{args.rows} synthetic vectors, {args.queries} queries, top {args.limit}")
+            for r in results:
+                setting = r['setting'] or '-'
+                print(f"  {r['index']:8} {setting:16} recall {r['recall']:.3f}  {r['latency_ms']:7.2f} ms/query")
 
@@ -19,12 +19,43 @@ import sqlite3
 import re
 import bz2
 import time
+import math
+import hashlib
+import gzip
+import io
 import argparse
+import importlib.util
+import shutil
+import subprocess
 import urllib.request
+import multiprocessing
+import queue
+import socketserver
+import threading
+from collections import Counter, OrderedDict, deque
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Optional, List, Dict, Any, Tuple
+from typing import Optional, List, Dict, Any, Tuple, Callable
 from datetime import datetime
 
+import embedding_service
+
+# Optional zstd compression of article content (knowledge_base.py storage compress)
+try:
+    import zstandard
+    HAS_ZSTD = True
+except ImportError:
+    zstandard = None
+    HAS_ZSTD = False
+
+# Optional semantic search over article summaries (knowledge_base.py semantic build)
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    np = None
+    HAS_NUMPY = False
+
 # Data directory
 DATA_DIR = Path(os.path.expanduser("~/optidex/data/knowledge"))
 DATA_DIR.mkdir(parents=True, exist_ok=True)
@@ -34,14 +65,249 @@ DB_PATH = DATA_DIR / "knowledge.db"
 # Wikipedia dump URL (English, articles only, multistream for streaming parse)
 WIKI_URL = "https://dumps.wikimedia.org/enwiki/latest/enwiki-latest-pages-articles-multistream.xml.bz2"
 
+# Multistream index (offset:page_id:title per line) - lets the dump be split into
+# independently decompressible bz2 streams of ~100 pages each
+WIKI_INDEX_URL = "https://dumps.wikimedia.org/enwiki/latest/enwiki-latest-pages-articles-multistream-index.txt.bz2"
+
+# Published checksums for the dump files (one "<digest>  <filename>" per line)
+WIKI_SHA1_URL = "https://dumps.wikimedia.org/enwiki/latest/enwiki-latest-sha1sums.txt"
+WIKI_MD5_URL = "https://dumps.wikimedia.org/enwiki/latest/enwiki-latest-md5sums.txt"
+
+# Downloader: parallel HTTP range requests over fixed-size segments
+DOWNLOAD_CONNECTIONS = 4
+DOWNLOAD_SEGMENT_SIZE = 64 * 1024 * 1024
+DOWNLOAD_RETRIES = 5
+
+DUMP_FILE = DATA_DIR / "enwiki-pages-articles.xml.bz2"
+
+# Wikidata JSON dump (one entity per line) for import-wikidata
+WIKIDATA_DUMP_URL = "https://dumps.wikimedia.org/wikidatawiki/entities/latest-all.json.bz2"
+WIKIDATA_DUMP_FILE = DATA_DIR / "wikidata-latest-all.json.bz2"
+
+# Entity type -> (Wikidata class, max items for the SPARQL fetch)
+WIKIDATA_TYPES = {
+    'people': ('Q5', 20000),        # human
+    'countries': ('Q6256', 300),    # country
+    'cities': ('Q515', 10000),      # city
+    'companies': ('Q4830453', 5000), # business enterprise
+    'films': ('Q11424', 10000),     # film
+    'tv_series': ('Q5398426', 5000), # television series
+    'video_games': ('Q7889', 5000), # video game
+    'albums': ('Q482994', 5000),    # album
+    'books': ('Q571', 10000),       # book
+    'diseases': ('Q12136', 2000),   # disease
+    'species': ('Q16521', 10000),   # taxon
+    'mountains': ('Q8502', 2000),   # mountain
+    'lakes': ('Q23397', 1000),      # lake
+    'rivers': ('Q4022', 2000),      # river
+    'schools': ('Q3914', 5000),     # school
+    'universities': ('Q3918', 3000), # university
+    'websites': ('Q35127', 2000),   # website
+    'events': ('Q1656682', 5000),   # event
+}
+
+# Sitelinks kept per entity, and claims kept in entities.properties
+WIKIDATA_SITES = ('enwiki', 'simplewiki', 'enwikiquote', 'enwikivoyage', 'commonswiki')
+WIKIDATA_PROPERTIES = {
+    'P31': 'instance_of',
+    'P279': 'subclass_of',
+    'P17': 'country',
+    'P131': 'located_in',
+    'P27': 'citizenship',
+    'P106': 'occupation',
+    'P569': 'born',
+    'P570': 'died',
+    'P571': 'founded',
+    'P625': 'coordinates',
+    'P18': 'image',
+    'P856': 'website',
+}
+INDEX_FILE = DATA_DIR / "enwiki-pages-articles-index.txt.bz2"
+
+# Query daemon (knowledge_base.py serve)
+SERVER_HOST = os.environ.get('JARVIS_KB_HOST', '127.0.0.1')
+SERVER_PORT = int(os.environ.get('JARVIS_KB_PORT', '5610'))
+
+# Detected (content, summary) column names per database path
+_schema_cache: Dict[str, Tuple[str, str]] = {}
+
+
+# SQLite tuning (read profile)
+MMAP_SIZE = int(os.environ.get('JARVIS_KB_MMAP_MB', '2048')) * 1024 * 1024
+CACHE_SIZE_KB = int(os.environ.get('JARVIS_KB_CACHE_MB', '64')) * 1024
+
+# Query result cache (see QueryCache); JARVIS_KB_QUERY_CACHE=0 disables it
+QUERY_CACHE_ENTRIES = int(os.environ.get('JARVIS_KB_QUERY_CACHE', '1024'))
+QUERY_CACHE_TTL = float(os.environ.get('JARVIS_KB_QUERY_CACHE_TTL', '3600'))
+QUERY_CACHE_DISK = os.environ.get('JARVIS_KB_DISK_CACHE', '0') == '1'
+QUERY_CACHE_DB_PATH = DATA_DIR / "query_cache.db"
+# How often (seconds) the cache checks whether an import changed the database
+QUERY_CACHE_VERSION_CHECK = 1.0
+
+# PRAGMAs applied by get_db_connection for each connection profile
+DB_PROFILES = {
+    # General read/write use (schema changes, entity fetches)
+    'default': {
+        'busy_timeout': 5000,
+    },
+    # Query path: pages served from the memory map and a large page cache,
+    # writes rejected
+    'read': {
+        'mmap_size': MMAP_SIZE,
+        'cache_size': -CACHE_SIZE_KB,
+        'temp_store': 'MEMORY',
+        'busy_timeout': 5000,
+        'query_only': 'ON',
+    },
+    # Import path: durability traded for speed. An interrupted import is
+    # resumed from its saved offset rather than recovered from a journal.
+    'bulk': {
+        'journal_mode': 'OFF',
+        'synchronous': 'OFF',
+        'cache_size': -CACHE_SIZE_KB * 4,
+        'temp_store': 'MEMORY',
+    },
+}
+
+# FTS5 build tuning: articles indexed per committed chunk, and the segment
+# merge settings used while importing (fewer, larger merges than the defaults)
+FTS_CHUNK_SIZE = 5000
+FTS_IMPORT_AUTOMERGE = 8
+FTS_IMPORT_CRISISMERGE = 32
 
-def get_db_connection() -> sqlite3.Connection:
-    """Get a database connection"""
-    conn = sqlite3.connect(str(DB_PATH))
+# Compressed content storage: zstd level and trained dictionary size/samples
+ZSTD_LEVEL = 9
+ZSTD_DICT_SIZE = 112 * 1024
+ZSTD_TRAIN_SAMPLES = 5000
+
+# Semantic search: int8 summary embeddings under SEMANTIC_DIR, searched through
+# k-means (IVF) lists. Embedded through embedding_service, with the same model
+# as the PostgreSQL memory backend.
+SEMANTIC_DIR = DATA_DIR / "semantic"
+EMBEDDING_BATCH_SIZE = 256
+SEMANTIC_TRAIN_SAMPLES = 100000
+SEMANTIC_NPROBE = int(os.environ.get('JARVIS_KB_NPROBE', '16'))
+SEMANTIC_CANDIDATES = 50       # per ranking fused in hybrid mode
+HYBRID_SEMANTIC_WEIGHT = 0.6   # cosine share of the hybrid score, the rest is bm25
+SEARCH_MODES = ('keyword', 'semantic', 'hybrid')
+
+# Passage search: best paragraphs of the top articles, within an LLM token budget
+PASSAGE_TOKEN_BUDGET = int(os.environ.get('JARVIS_KB_PASSAGE_TOKENS', '400'))
+PASSAGE_ARTICLES = 5
+PASSAGE_MAX_CHARS = 1200
+
+# Secondary indexes on articles, dropped during bulk loads and rebuilt after
+ARTICLE_INDEXES = {
+    'idx_articles_title': "CREATE INDEX IF NOT EXISTS idx_articles_title ON articles(title)",
+    'idx_articles_title_norm': "CREATE INDEX IF NOT EXISTS idx_articles_title_norm ON articles(title_norm)",
+}
+
+ENTITY_INDEXES = {
+    'idx_entities_label': "CREATE INDEX IF NOT EXISTS idx_entities_label ON entities(label)",
+    'idx_entities_wikipedia': "CREATE INDEX IF NOT EXISTS idx_entities_wikipedia ON entities(wikipedia_title)",
+}
+
+# Per-thread read connection reused across queries in the same process
+_local = threading.local()
+
+
+def get_db_connection(profile: str = 'default', check_same_thread: bool = True) -> sqlite3.Connection:
+    """Get a database connection tuned with one of DB_PROFILES"""
+    conn = sqlite3.connect(str(DB_PATH), check_same_thread=check_same_thread, cached_statements=256)
     conn.row_factory = sqlite3.Row
+    conn.create_function(
+        'kb_content', 2,
+        lambda content, content_z: content if content_z is None else _decompress_content(conn, content_z),
+        deterministic=True
+    )
+    for pragma, value in DB_PROFILES[profile].items():
+        conn.execute(f"PRAGMA {pragma} = {value}")
+    return conn
+
+
+def get_read_connection() -> sqlite3.Connection:
+    """
+    Get this thread's shared read connection.
+    
+    Kept open between queries so the memory map, page cache and prepared
+    statements stay warm; callers must not close it.
+    """
+    conn = getattr(_local, 'conn', None)
+    if conn is None:
+        conn = get_db_connection('read')
+        _local.conn = conn
     return conn
 
 
+def _begin_bulk_load(conn: sqlite3.Connection, indexes: Dict[str, str] = ARTICLE_INDEXES):
+    """Drop secondary indexes so a bulk import only maintains the primary keys"""
+    for name in indexes:
+        conn.execute(f"DROP INDEX IF EXISTS {name}")
+    conn.commit()
+
+
+def _end_bulk_load(conn: sqlite3.Connection, indexes: Dict[str, str] = ARTICLE_INDEXES):
+    """Rebuild secondary indexes in one sorted pass and return to WAL mode"""
+    print("Building indexes...")
+    for sql in indexes.values():
+        conn.execute(sql)
+    conn.commit()
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA optimize")
+
+
+def _article_columns(conn: sqlite3.Connection) -> Tuple[str, str]:
+    """Get (content, summary) column names, supporting both old and new schema"""
+    cols = _schema_cache.get(str(DB_PATH))
+    if cols is None:
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(articles)")}
+        if not columns:
+            # Table not created yet - don't cache a guess
+            return 'content', 'summary'
+        cols = (
+            'full_text' if 'full_text' in columns else 'content',
+            'abstract' if 'abstract' in columns else 'summary'
+        )
+        _schema_cache[str(DB_PATH)] = cols
+    return cols
+
+
+def _has_compressed_column(conn: sqlite3.Connection) -> bool:
+    """Whether articles has the content_z column (added by init_database)"""
+    key = f"{DB_PATH}:content_z"
+    if key not in _schema_cache:
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(articles)")}
+        if 'content_z' not in columns:
+            return False
+        _schema_cache[key] = True
+    return True
+
+
+def _decompress_content(conn: sqlite3.Connection, blob: bytes) -> str:
+    """Decompress a content_z value, loading its dictionary on first use"""
+    if not HAS_ZSTD:
+        raise RuntimeError("Article content is zstd-compressed; install zstandard")
+    
+    # Decompressors aren't thread-safe, so keep one set per thread
+    decompressors = getattr(_local, 'zstd', None)
+    if decompressors is None:
+        decompressors = _local.zstd = {}
+    
+    dict_id = zstandard.get_frame_parameters(blob).dict_id
+    key = (str(DB_PATH), dict_id)
+    dctx = decompressors.get(key)
+    if dctx is None:
+        if dict_id:
+            row = conn.execute("SELECT data FROM zstd_dicts WHERE id = ?", (dict_id,)).fetchone()
+            if row is None:
+                raise RuntimeError(f"Missing zstd dictionary {dict_id}")
+            dctx = zstandard.ZstdDecompressor(dict_data=zstandard.ZstdCompressionDict(row[0]))
+        else:
+            dctx = zstandard.ZstdDecompressor()
+        decompressors[key] = dctx
+    return dctx.decompress(blob).decode('utf-8')
+
+
 def init_database():
     """Initialize the database schema"""
     conn = get_db_connection()
@@ -52,7 +318,9 @@ def init_database():
         CREATE TABLE IF NOT EXISTS articles (
             id INTEGER PRIMARY KEY,
             title TEXT UNIQUE NOT NULL,
+            title_norm TEXT,
             content TEXT,
+            content_z BLOB,
             summary TEXT,
             categories TEXT,
             links TEXT,
@@ -78,6 +346,8 @@ def init_database():
             aliases TEXT,
             wikipedia_title TEXT,
             properties TEXT,
+            instance_of TEXT,
+            sitelinks TEXT,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         )
     """)
@@ -87,18 +357,225 @@ def init_database():
     columns = [row[1] for row in cursor.fetchall()]
     if 'wikipedia_title' not in columns:
         cursor.execute("ALTER TABLE entities ADD COLUMN wikipedia_title TEXT")
+    if 'instance_of' not in columns:
+        cursor.execute("ALTER TABLE entities ADD COLUMN instance_of TEXT")
+    if 'sitelinks' not in columns:
+        cursor.execute("ALTER TABLE entities ADD COLUMN sitelinks TEXT")
+    
+    # Normalized title for case-insensitive lookups (filled by index_titles on old databases)
+    cursor.execute("PRAGMA table_info(articles)")
+    columns = [row[1] for row in cursor.fetchall()]
+    if 'title_norm' not in columns:
+        cursor.execute("ALTER TABLE articles ADD COLUMN title_norm TEXT")
+    
+    # Full text stored zstd-compressed instead of in content (see compress_articles)
+    if 'content_z' not in columns:
+        cursor.execute("ALTER TABLE articles ADD COLUMN content_z BLOB")
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS zstd_dicts (
+            id INTEGER PRIMARY KEY,
+            data BLOB NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    
+    # Redirect pages, resolved by get_article
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS redirects (
+            title TEXT PRIMARY KEY,
+            title_norm TEXT NOT NULL,
+            target TEXT NOT NULL
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_redirects_title_norm ON redirects(title_norm)")
     
     # Indexes
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_articles_title ON articles(title)")
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_entities_label ON entities(label)")
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_entities_wikipedia ON entities(wikipedia_title)")
+    for sql in ARTICLE_INDEXES.values():
+        cursor.execute(sql)
+    for sql in ENTITY_INDEXES.values():
+        cursor.execute(sql)
+    
+    # Entity search: normalized labels/aliases for exact matches, FTS5 for the rest.
+    # Filled by _write_entities (or index_entities for older databases).
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS entity_aliases (
+            alias_norm TEXT NOT NULL,
+            entity_id TEXT NOT NULL,
+            is_label INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (alias_norm, entity_id)
+        ) WITHOUT ROWID
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_entity_aliases_entity ON entity_aliases(entity_id)")
+    cursor.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS entities_fts USING fts5(
+            label, aliases, description,
+            content='entities',
+            prefix='2 3'
+        )
+    """)
+    
+    # WAL lets the query daemon keep reading while an import writes
+    cursor.execute("PRAGMA journal_mode = WAL")
+    
+    # Import bookkeeping and storage settings (resume offsets, content compression)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS import_state (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        )
+    """)
     
     conn.commit()
     conn.close()
 
 
+# Flat markup that is deleted outright: comments, refs (with any templates
+# inside them), HTML tags, bold/italic quotes and heading markers. Every
+# alternative starts with a literal character so the regex engine can skip
+# plain text without trying each alternative at every position.
+_WIKI_STRIP_RE = re.compile(r"""
+    <!--.*?-->
+  | <ref\b[^>]*?/>
+  | <ref\b[^>]*>.*?</ref\s*>
+  | </?[a-zA-Z][^<>]*>
+  | '''{0,3}
+  | ==={0,4}[ \t]*
+""", re.VERBOSE | re.DOTALL)
+
+# Nesting tokens, resolved by the scanner in clean_wikitext.
+# No groups or anchors, for the same literal-prefix reason as above.
+_WIKI_TOKEN_RE = re.compile(r"""
+    \{\{ | \}\} | \{\| | \|\}(?!\}) | \[\[ | \]\] | \[(?:https?:)?// | \]
+""", re.VERBOSE)
+
+# Token text -> kind; anything else matched is an external link opener
+_WIKI_TOKENS = {
+    '{{': 'open_tpl',
+    '}}': 'close_tpl',
+    '{|': 'open_table',
+    '|}': 'close_table',
+    '[[': 'open_link',
+    ']]': 'close_link',
+    ']': 'close_ext',
+}
+
+# Brace pairs for skipping a whole template or table including anything nested
+_WIKI_SKIP_RE = {
+    'open_tpl': (re.compile(r'\{\{|\}\}'), '{{'),
+    'open_table': (re.compile(r'\{\||\|\}(?!\})'), '{|'),
+}
+
+# Links that carry no prose (images, categories)
+_NON_TEXT_LINK_RE = re.compile(r'\s*:?\s*(?:File|Image|Category)\s*:', re.IGNORECASE)
+
+# Kept as separate literal-prefixed patterns so the engine can jump straight
+# to candidate positions instead of testing every space
+_BLANK_LINES_RE = re.compile(r'\n[ \t]*\n(?:[ \t]*\n)*')
+_SPACES_RE = re.compile(r'  +')
+
+
 def clean_wikitext(text: str) -> str:
-    """Clean Wikipedia markup to plain text"""
+    """
+    Clean Wikipedia markup to plain text.
+    
+    Flat markup is removed in one pass, then a single scan over the nesting
+    tokens does the rest: templates and tables are skipped to their matching
+    closer so nested {{...}} is removed completely, and links are tracked on
+    a stack so they keep their label while file/category links (including
+    their captions) are dropped.
+    """
+    if not text:
+        return ""
+    
+    text = _WIKI_STRIP_RE.sub('', text)
+    
+    out = []    # pieces of the innermost open link
+    stack = []  # (opening token, parent pieces)
+    pos = 0
+    search = _WIKI_TOKEN_RE.search
+    
+    while True:
+        m = search(text, pos)
+        if m is None:
+            break
+        
+        start = m.start()
+        if start > pos:
+            out.append(text[pos:start])
+        pos = m.end()
+        kind = _WIKI_TOKENS.get(m.group(), 'open_ext')
+        
+        if kind in _WIKI_SKIP_RE:
+            # Templates and tables are dropped: jump past the matching closer.
+            # If it never comes, only the opener is dropped.
+            braces, opener = _WIKI_SKIP_RE[kind]
+            depth = 1
+            for b in braces.finditer(text, pos):
+                depth += 1 if b.group() == opener else -1
+                if depth == 0:
+                    pos = b.end()
+                    break
+            continue
+        
+        if kind == 'open_link' or kind == 'open_ext':
+            stack.append((kind, out))
+            out = []
+            continue
+        
+        if kind == 'close_link':
+            opener = 'open_link'
+        elif kind == 'close_ext':
+            opener = 'open_ext'
+        else:
+            # Stray "}}" or "|}"
+            out.append(m.group())
+            continue
+        
+        if stack and stack[-1][0] == opener:
+            pass
+        elif kind == 'close_link' and stack and stack[-1][0] == 'open_ext':
+            # "]]" ending an external link: the second "]" is plain text
+            opener = 'open_ext'
+            pos -= 1
+        elif not any(frame[0] == opener for frame in stack):
+            # Stray closer
+            out.append(m.group())
+            continue
+        
+        # Unwind links left open inside this one, keeping their text
+        while stack[-1][0] != opener:
+            _, parent = stack.pop()
+            parent.extend(out)
+            out = parent
+        
+        _, parent = stack.pop()
+        inner = ''.join(out)
+        out = parent
+        
+        if opener == 'open_link':
+            if not _NON_TEXT_LINK_RE.match(inner):
+                target, _, label = inner.partition('|')
+                out.append(label or target)
+        else:
+            _, _, label = inner.partition(' ')
+            out.append(label)
+    
+    out.append(text[pos:])
+    
+    # Unclosed constructs at the end: keep whatever text they held
+    while stack:
+        _, parent = stack.pop()
+        parent.extend(out)
+        out = parent
+    
+    text = ''.join(out)
+    text = _BLANK_LINES_RE.sub('\n\n', text)
+    text = _SPACES_RE.sub(' ', text)
+    return text.strip()
+
+
+def clean_wikitext_legacy(text: str) -> str:
+    """Clean Wikipedia markup with the old multi-pass regex chain (kept for benchmarking)"""
     if not text:
         return ""
     
@@ -162,20 +639,186 @@ def extract_summary(text: str, max_length: int = 500) -> str:
     return text[:max_length] if text else ""
 
 
-def search_articles(query: str, limit: int = 10) -> List[Dict]:
-    """Search articles using full-text search"""
-    conn = get_db_connection()
+# === Query result cache ===
+
+def _data_version(conn: sqlite3.Connection) -> int:
+    """Counter bumped by every write that can change query results"""
+    try:
+        row = conn.execute("SELECT value FROM import_state WHERE key = 'data_version'").fetchone()
+    except sqlite3.OperationalError:
+        return 0
+    return int(row[0]) if row else 0
+
+
+def _bump_data_version(conn: sqlite3.Connection):
+    """Invalidate cached query results once the caller commits"""
+    conn.execute("""
+        INSERT INTO import_state (key, value) VALUES ('data_version', '1')
+        ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + 1
+    """)
+
+
+class QueryCache:
+    """
+    LRU + TTL memo for search_articles and get_article results.
+    
+    Entries belong to one data_version of the database; when an import bumps
+    it the cache is dropped. Cached results are shared between callers and
+    must be treated as read-only. With disk_path, results are also kept in a
+    small separate SQLite file so short-lived CLI processes benefit too.
+    """
+    
+    _MISSING = object()
+    
+    def __init__(self, max_entries: int = QUERY_CACHE_ENTRIES, ttl: float = QUERY_CACHE_TTL,
+                 disk_path: Path = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.disk_path = disk_path
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self._version = None
+        self._checked = 0.0
+        self._disk = None
+    
+    def _disk_conn(self) -> Optional[sqlite3.Connection]:
+        if self.disk_path is None:
+            return None
+        if self._disk is None:
+            try:
+                disk = sqlite3.connect(str(self.disk_path), check_same_thread=False, isolation_level=None)
+                disk.execute("PRAGMA journal_mode = WAL")
+                disk.execute("PRAGMA synchronous = NORMAL")
+                disk.execute("""
+                    CREATE TABLE IF NOT EXISTS query_cache (
+                        key TEXT PRIMARY KEY,
+                        version INTEGER NOT NULL,
+                        created REAL NOT NULL,
+                        value TEXT NOT NULL
+                    )
+                """)
+                self._disk = disk
+            except sqlite3.Error as e:
+                print(f"[Knowledge] Disk cache disabled: {e}", file=sys.stderr)
+                self.disk_path = None
+        return self._disk
+    
+    def _check_version(self, conn: sqlite3.Connection) -> int:
+        """Current data_version, dropping stale entries if it changed (lock held)"""
+        now = time.monotonic()
+        if self._version is None or now - self._checked >= QUERY_CACHE_VERSION_CHECK:
+            version = _data_version(conn)
+            if version != self._version:
+                self._entries.clear()
+                disk = self._disk_conn()
+                if disk is not None:
+                    disk.execute("DELETE FROM query_cache WHERE version != ?", (version,))
+                self._version = version
+            self._checked = now
+        return self._version
+    
+    def get_or_compute(self, conn: sqlite3.Connection, key: Tuple, compute):
+        """Return the cached result for key, or compute() and cache it"""
+        if self.max_entries <= 0:
+            return compute()
+        
+        now = time.time()
+        with self._lock:
+            version = self._check_version(conn)
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[0] < self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            
+            value = self._MISSING
+            disk = self._disk_conn()
+            if disk is not None:
+                row = disk.execute(
+                    "SELECT value FROM query_cache WHERE key = ? AND version = ? AND created > ?",
+                    (json.dumps(key), version, now - self.ttl)
+                ).fetchone()
+                if row is not None:
+                    value = json.loads(row[0])
+                    self.disk_hits += 1
+        
+        if value is self._MISSING:
+            value = compute()
+            with self._lock:
+                self.misses += 1
+                disk = self._disk_conn()
+                if disk is not None:
+                    disk.execute(
+                        "INSERT OR REPLACE INTO query_cache (key, version, created, value) VALUES (?, ?, ?, ?)",
+                        (json.dumps(key), version, now, json.dumps(value))
+                    )
+        
+        with self._lock:
+            self._entries[key] = (now, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            disk = self._disk_conn()
+            if disk is not None:
+                disk.execute("DELETE FROM query_cache")
+    
+    def stats(self) -> Dict:
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'hit_rate': round((self.hits + self.disk_hits) / lookups, 3) if lookups else None,
+        }
+
+
+_query_cache = QueryCache(disk_path=QUERY_CACHE_DB_PATH if QUERY_CACHE_DISK else None)
+
+
+def _query_key(query: str) -> str:
+    """Cache key for a search query: whitespace-insensitive, and case-insensitive
+    unless it uses FTS5 operators (which must be upper case)"""
+    query = ' '.join(query.split())
+    if re.search(r'\b(?:AND|OR|NOT|NEAR)\b', query):
+        return query
+    return query.casefold()
+
+
+def search_articles(query: str, limit: int = 10, conn: sqlite3.Connection = None,
+                    mode: str = 'keyword') -> List[Dict]:
+    """
+    Search articles (cached, see QueryCache). mode is 'keyword' (FTS5 bm25),
+    'semantic' (summary embeddings) or 'hybrid' (both, scores fused); the
+    last two rank the query's words by bm25 alone without a semantic index.
+    """
+    if mode not in SEARCH_MODES:
+        raise ValueError(f"Unknown search mode: {mode}")
+    if conn is None:
+        conn = get_read_connection()
+    if mode == 'keyword':
+        compute = lambda: _search_articles(query, limit, conn)
+    else:
+        compute = lambda: _semantic_search(query, limit, conn, mode)
+    return _query_cache.get_or_compute(conn, ('search', _query_key(query), limit, mode), compute)
+
+
+def _search_articles(query: str, limit: int, conn: sqlite3.Connection) -> List[Dict]:
+    """Run a full-text search without the cache"""
     cursor = conn.cursor()
     
     results = []
     
-    # Check which columns exist (support both old and new schema)
-    cursor.execute("PRAGMA table_info(articles)")
-    columns = {row[1] for row in cursor.fetchall()}
-    
     # Determine column names based on schema
-    content_col = 'full_text' if 'full_text' in columns else 'content'
-    summary_col = 'abstract' if 'abstract' in columns else 'summary'
+    content_col, summary_col = _article_columns(conn)
     
     try:
         # Try FTS5 match query first
@@ -213,31 +856,531 @@ def search_articles(query: str, limit: int = 10) -> List[Dict]:
                 'summary': row['summary']
             })
     
-    conn.close()
     return results
 
 
-def get_article(title: str) -> Optional[Dict]:
-    """Get a specific article by title"""
-    conn = get_db_connection()
+# === Semantic search ===
+
+def embed_texts(texts: List[str]):
+    """
+    Unit-length float32 embeddings, one row per text, from embedding_service:
+    a running embedding server, or the model loaded in this process.
+    """
+    return np.asarray(embedding_service.embed(texts), dtype=np.float32)
+
+
+def _quantize(vectors) -> Tuple[Any, Any]:
+    """Per-row symmetric int8 quantization: vector ~= codes * scale"""
+    scales = np.abs(vectors).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    codes = np.round(vectors / scales[:, None]).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+def _load_semantic_meta(directory: Path = SEMANTIC_DIR) -> Dict:
+    """Build progress of the embeddings in directory (rows written, last article id)"""
+    try:
+        with open(directory / 'meta.json') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {'model': embedding_service.EMBEDDING_MODEL_NAME, 'dim': 0, 'rows': 0, 'last_id': 0}
+
+
+def _save_semantic_meta(meta: Dict, directory: Path = SEMANTIC_DIR):
+    tmp = directory / 'meta.json.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(meta, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, directory / 'meta.json')
+
+
+def _map_rows(path: Path, dtype, rows: int, dim: int = None):
+    """Read-only memory map of the first rows of a row file"""
+    shape = (rows, dim) if dim else (rows,)
+    if rows == 0:
+        return np.zeros(shape, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode='r', shape=shape)
+
+
+class SemanticIndex:
+    """
+    Read-only view of the article embeddings written by build_embeddings.
+    
+    Vectors are int8 with a float32 scale per row and memory-mapped, so
+    only the page cache holds them (~2.7 GB for all of English Wikipedia).
+    Rows covered by the IVF file (build_semantic_index) are searched
+    through the nprobe nearest k-means lists; rows embedded after it was
+    built are scanned directly.
+    """
+    
+    SCAN_CHUNK = 65536
+    
+    def __init__(self, directory: Path = SEMANTIC_DIR):
+        meta = _load_semantic_meta(directory)
+        self.model = meta['model']
+        self.rows = meta['rows']
+        self.dim = meta['dim']
+        self.vectors = _map_rows(directory / 'vectors.i8', np.int8, self.rows, self.dim)
+        self.scales = _map_rows(directory / 'scales.f32', np.float32, self.rows)
+        self.ids = _map_rows(directory / 'ids.i64', np.int64, self.rows)
+        
+        self.centroids = None
+        self.offsets = None
+        self.order = None
+        self.indexed_rows = 0
+        ivf_path = directory / 'ivf.npz'
+        if ivf_path.exists():
+            with np.load(ivf_path) as ivf:
+                if int(ivf['rows']) <= self.rows:
+                    self.centroids = ivf['centroids']
+                    self.offsets = ivf['offsets']
+                    self.order = ivf['order']
+                    self.indexed_rows = int(ivf['rows'])
+    
+    def dequantize(self, start: int, end: int):
+        return self.vectors[start:end].astype(np.float32) * self.scales[start:end, None]
+    
+    def _score_rows(self, rows, query):
+        return (self.vectors[rows].astype(np.float32) @ query) * self.scales[rows]
+    
+    def _score_range(self, start: int, end: int, query):
+        return (self.vectors[start:end].astype(np.float32) @ query) * self.scales[start:end]
+    
+    def search(self, query, k: int, nprobe: int = SEMANTIC_NPROBE, exact: bool = False) -> List[Tuple[int, float]]:
+        """(article id, cosine) of the k nearest rows, best first"""
+        if k <= 0 or self.rows == 0:
+            return []
+        
+        parts = []
+        scan_from = 0
+        if self.centroids is not None and not exact:
+            lists = np.argsort(self.centroids @ query)[-nprobe:]
+            rows = np.concatenate([self.order[self.offsets[l]:self.offsets[l + 1]] for l in lists])
+            rows.sort()  # sequential reads through the memory map
+            parts.append((rows, self._score_rows(rows, query)))
+            scan_from = self.indexed_rows
+        for start in range(scan_from, self.rows, self.SCAN_CHUNK):
+            end = min(start + self.SCAN_CHUNK, self.rows)
+            parts.append((np.arange(start, end), self._score_range(start, end, query)))
+        if not parts:
+            return []
+        
+        rows = np.concatenate([p[0] for p in parts])
+        scores = np.concatenate([p[1] for p in parts])
+        k = min(k, len(rows))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(self.ids[rows[i]]), float(scores[i])) for i in top]
+    
+    def similarity(self, query, article_ids: List[int]) -> Dict[int, float]:
+        """Cosine between query and each embedded article in article_ids"""
+        if not article_ids or self.rows == 0:
+            return {}
+        ids = np.asarray(article_ids, dtype=np.int64)
+        # Articles are embedded in id order, so ids is sorted
+        pos = np.minimum(np.searchsorted(self.ids, ids), self.rows - 1)
+        found = self.ids[pos] == ids
+        scores = self._score_rows(pos[found], query)
+        return dict(zip(ids[found].tolist(), scores.tolist()))
+
+
+_semantic_lock = threading.Lock()
+_semantic_cache: Tuple[Any, Optional[SemanticIndex]] = (None, None)
+
+
+def _semantic_index() -> Optional[SemanticIndex]:
+    """Shared SemanticIndex, reopened after 'semantic build' / 'semantic index' update it"""
+    global _semantic_cache
+    if not HAS_NUMPY:
+        return None
+    stamp = tuple(
+        (SEMANTIC_DIR / name).stat().st_mtime_ns if (SEMANTIC_DIR / name).exists() else 0
+        for name in ('meta.json', 'ivf.npz')
+    )
+    with _semantic_lock:
+        if _semantic_cache[0] != stamp:
+            index = SemanticIndex() if stamp[0] else None
+            if index is not None and (index.rows == 0 or index.model != embedding_service.EMBEDDING_MODEL_NAME):
+                index = None
+            _semantic_cache = (stamp, index)
+        return _semantic_cache[1]
+
+
+_QUESTION_STOPWORDS = frozenset("""
+    a about an and are as at be by can did do does for from how i in is it me
+    of on or tell that the there this to was what when where which who whom why
+    with you your
+""".split())
+
+
+def _keyword_terms_query(query: str) -> Optional[str]:
+    """
+    FTS5 query for a spoken question: any of its content words, quoted so
+    punctuation can't break the syntax. bm25 ranks articles matching more
+    (and rarer) words first.
+    """
+    words = re.findall(r'\w+', query.casefold())
+    content = [w for w in words if w not in _QUESTION_STOPWORDS] or words
+    if not content:
+        return None
+    return ' OR '.join(f'"{w}"' for w in dict.fromkeys(content))
+
+
+def _keyword_candidates(query: str, limit: int, conn: sqlite3.Connection) -> List[Tuple[int, float]]:
+    """(article id, bm25) for the best full-text matches of a question"""
+    fts_query = _keyword_terms_query(query)
+    if fts_query is None:
+        return []
+    try:
+        return conn.execute("""
+            SELECT rowid, bm25(articles_fts) AS score FROM articles_fts
+            WHERE articles_fts MATCH ?
+            ORDER BY score
+            LIMIT ?
+        """, (fts_query, limit)).fetchall()
+    except sqlite3.OperationalError:
+        return []
+
+
+def _semantic_search(query: str, limit: int, conn: sqlite3.Connection, mode: str) -> List[Dict]:
+    """
+    Embedding search, or with mode='hybrid' the union of the best embedding
+    and bm25 candidates ranked by
+    
+        HYBRID_SEMANTIC_WEIGHT * cosine + (1 - HYBRID_SEMANTIC_WEIGHT) * bm25 / best bm25
+    """
+    index = _semantic_index()
+    if index is not None and embedding_service.available():
+        query_vector = embed_texts([query])[0]
+        semantic = index.search(query_vector, max(limit * 2, SEMANTIC_CANDIDATES))
+    else:
+        # No embeddings: rank the question's words by bm25 alone
+        index = None
+        semantic = []
+    cosines = dict(semantic)
+    
+    if mode == 'semantic' and index is not None:
+        ranked = semantic
+    else:
+        keyword = _keyword_candidates(query, SEMANTIC_CANDIDATES, conn)
+        if index is not None:
+            cosines.update(index.similarity(query_vector, [i for i, _ in keyword if i not in cosines]))
+        # bm25 is negative, lower is better
+        best = keyword[0][1] if keyword and keyword[0][1] < 0 else None
+        keyword_scores = {i: score / best for i, score in keyword} if best else {}
+        weight = HYBRID_SEMANTIC_WEIGHT
+        ranked = sorted(
+            ((i, weight * cosines.get(i, 0.0) + (1 - weight) * keyword_scores.get(i, 0.0))
+             for i in set(cosines) | set(keyword_scores)),
+            key=lambda item: (-item[1], item[0])
+        )
+    
+    # Embeddings of since-replaced articles may linger, so fetch a few spare
+    ranked = ranked[:limit * 2]
+    _, summary_col = _article_columns(conn)
+    rows = conn.execute(f"""
+        SELECT id, title, {summary_col} AS summary FROM articles
+        WHERE id IN ({','.join('?' * len(ranked))})
+    """, [i for i, _ in ranked]).fetchall()
+    by_id = {row['id']: row for row in rows}
+    
+    results = []
+    for article_id, score in ranked:
+        row = by_id.get(article_id)
+        if row is None:
+            continue
+        results.append({
+            'id': article_id,
+            'title': row['title'],
+            'summary': row['summary'],
+            'score': round(score, 4),
+            'similarity': round(cosines.get(article_id, 0.0), 4)
+        })
+        if len(results) >= limit:
+            break
+    return results
+
+
+# === Passage search ===
+
+_SENTENCE_END_RE = re.compile(r'(?<=[.!?])\s+')
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough LLM token count (~4 characters per token for English)"""
+    return (len(text) + 3) // 4
+
+
+def split_passages(content: str, max_chars: int = PASSAGE_MAX_CHARS) -> List[Tuple[Optional[str], str]]:
+    """
+    (section heading, text) passages of a cleaned article: its paragraphs,
+    with long ones cut at sentence boundaries into pieces of up to max_chars.
+    """
+    passages = []
+    section = None
+    for block in _BLANK_LINES_RE.split(content):
+        block = block.strip()
+        if not block:
+            continue
+        # clean_wikitext strips the ='s from "== History ==", leaving the bare
+        # heading as a short first line without closing punctuation
+        first, _, rest = block.partition('\n')
+        if len(first) <= 80 and not first.rstrip().endswith(('.', '!', '?', ':', ';', ',')):
+            if not rest:
+                section = first.strip()
+                continue
+            if rest[:1].isupper():
+                section = first.strip()
+                block = rest.strip()
+        
+        piece = ''
+        for sentence in _SENTENCE_END_RE.split(block):
+            if piece and len(piece) + len(sentence) + 1 > max_chars:
+                passages.append((section, piece))
+                piece = sentence
+            else:
+                piece = f"{piece} {sentence}" if piece else sentence
+        if piece:
+            passages.append((section, piece))
+    return passages
+
+
+def _article_texts(conn: sqlite3.Connection, article_ids: List[int]) -> List[Tuple[int, str, str]]:
+    """(id, title, plain-text content) of the given articles, in that order"""
+    if not article_ids:
+        return []
+    content_col, summary_col = _article_columns(conn)
+    compressed = content_col == 'content' and _has_compressed_column(conn)
+    content_sql = "content, content_z" if compressed else f"{content_col} AS content"
+    rows = conn.execute(f"""
+        SELECT id, title, {content_sql}, {summary_col} AS summary FROM articles
+        WHERE id IN ({','.join('?' * len(article_ids))})
+    """, article_ids).fetchall()
+    by_id = {row['id']: row for row in rows}
+    
+    texts = []
+    for article_id in article_ids:
+        row = by_id.get(article_id)
+        if row is None:
+            continue
+        content = row['content']
+        if content is None and compressed and row['content_z'] is not None:
+            content = _decompress_content(conn, row['content_z'])
+        texts.append((article_id, row['title'], content or row['summary'] or ''))
+    return texts
+
+
+def _terms_pattern(terms) -> Optional[re.Pattern]:
+    if not terms:
+        return None
+    return re.compile(r'\b(?:' + '|'.join(map(re.escape, sorted(terms, key=len, reverse=True))) + r')\b',
+                      re.IGNORECASE)
+
+
+def _trim_passage(text: str, max_chars: int, pattern: Optional[re.Pattern]) -> str:
+    """Cut text to max_chars at word boundaries, keeping the first query match in view"""
+    if len(text) <= max_chars:
+        return text
+    match = pattern.search(text) if pattern else None
+    start = max(0, (match.start() if match else 0) - max_chars // 4)
+    if start:
+        start = text.rfind(' ', 0, start) + 1
+    end = start + max_chars
+    if end < len(text):
+        end = max(text.rfind(' ', start, end), start + 1)
+    return ('...' if start else '') + text[start:end].strip() + ('...' if end < len(text) else '')
+
+
+def search_passages(
+    query: str,
+    limit: int = 3,
+    conn: sqlite3.Connection = None,
+    token_budget: int = PASSAGE_TOKEN_BUDGET,
+    mode: str = 'keyword',
+    highlight: bool = False
+) -> List[Dict]:
+    """
+    The passages that best match query, taken from its top articles and
+    fitted into token_budget - small enough to put in an LLM prompt in
+    place of whole summaries or articles. Cached like search_articles.
+    With highlight, matched words are wrapped in **...**.
+    """
+    if mode not in SEARCH_MODES:
+        raise ValueError(f"Unknown search mode: {mode}")
+    if conn is None:
+        conn = get_read_connection()
+    return _query_cache.get_or_compute(
+        conn, ('passages', _query_key(query), limit, token_budget, mode, highlight),
+        lambda: _search_passages(query, limit, conn, token_budget, mode, highlight)
+    )
+
+
+def _search_passages(query: str, limit: int, conn: sqlite3.Connection, token_budget: int,
+                     mode: str, highlight: bool) -> List[Dict]:
+    """Rank the paragraphs of the top articles with bm25 among themselves, then fill the budget"""
+    if mode == 'keyword':
+        article_ids = [i for i, _ in _keyword_candidates(query, PASSAGE_ARTICLES, conn)]
+    else:
+        article_ids = [r['id'] for r in _semantic_search(query, PASSAGE_ARTICLES, conn, mode)]
+    
+    words = re.findall(r'\w+', query.casefold())
+    terms = {w for w in words if w not in _QUESTION_STOPWORDS} or set(words)
+    
+    candidates = []
+    for rank, (article_id, title, content) in enumerate(_article_texts(conn, article_ids)):
+        for position, (section, text) in enumerate(split_passages(content)):
+            passage_words = re.findall(r'\w+', text.casefold())
+            counts = Counter(w for w in passage_words if w in terms)
+            candidates.append((rank, position, article_id, title, section, text, counts, len(passage_words)))
+    if not candidates:
+        return []
+    
+    # bm25 over the candidate passages (k1=1.2, b=0.75)
+    total = len(candidates)
+    average_length = sum(c[7] for c in candidates) / total or 1
+    document_frequency = Counter(term for c in candidates for term in c[6])
+    idf = {t: math.log(1 + (total - n + 0.5) / (n + 0.5)) for t, n in document_frequency.items()}
+    scored = []
+    for rank, position, article_id, title, section, text, counts, length in candidates:
+        norm = 1.2 * (0.25 + 0.75 * length / average_length)
+        score = sum(idf[t] * tf * 2.2 / (tf + norm) for t, tf in counts.items())
+        # Prefer better-ranked articles; an article's lead paragraph breaks ties
+        score = score / (1 + 0.25 * rank) + (0.5 / (1 + rank) if position == 0 else 0.0)
+        scored.append((score, article_id, title, section, text))
+    scored.sort(key=lambda item: -item[0])
+    
+    pattern = _terms_pattern(terms)
+    results = []
+    used = 0
+    for score, article_id, title, section, text in scored:
+        if len(results) >= limit or (results and score <= 0):
+            break
+        tokens = estimate_tokens(text)
+        if used + tokens > token_budget:
+            if results:
+                continue  # a shorter passage may still fit
+            text = _trim_passage(text, token_budget * 4, pattern)
+            tokens = estimate_tokens(text)
+        if highlight and pattern:
+            text = pattern.sub(lambda m: f"**{m.group(0)}**", text)
+        results.append({
+            'id': article_id,
+            'title': title,
+            'section': section,
+            'passage': text,
+            'score': round(score, 4),
+            'tokens': tokens
+        })
+        used += tokens
+    return results
+
+
+def normalize_title(title: str) -> str:
+    """Lookup key for a title: case-folded, underscores as spaces, whitespace collapsed"""
+    return ' '.join(title.replace('_', ' ').split()).casefold()
+
+
+def _find_title(conn: sqlite3.Connection, title: str) -> Optional[int]:
+    """Article id for an exact or case-insensitive title match (index lookups only)"""
+    row = conn.execute("SELECT id FROM articles WHERE title = ?", (title,)).fetchone()
+    if row is None:
+        # Prefer the canonically capitalised title if several only differ in case
+        row = conn.execute("""
+            SELECT id FROM articles WHERE title_norm = ?
+            ORDER BY title = ? DESC, title LIMIT 1
+        """, (normalize_title(title), title[:1].upper() + title[1:])).fetchone()
+    return row[0] if row else None
+
+
+def resolve_title(title: str, conn: sqlite3.Connection = None) -> Tuple[Optional[int], Optional[str]]:
+    """
+    Find the article a title refers to: (article id, redirect title used).
+    
+    Tries the exact title, then a case-insensitive match, then redirects
+    (following short chains), then the first title, in normalized
+    (case-folded) order, starting with it. Each step is an index lookup,
+    so this stays O(log n).
+    """
+    if conn is None:
+        conn = get_read_connection()
+    title = ' '.join(title.replace('_', ' ').split())
+    if not title:
+        return None, None
+    
+    article_id = _find_title(conn, title)
+    if article_id is not None:
+        return article_id, None
+    
+    redirected_from = None
+    target = title
+    for _ in range(3):
+        row = conn.execute("""
+            SELECT title, target FROM redirects WHERE title_norm = ?
+            ORDER BY title = ? DESC LIMIT 1
+        """, (normalize_title(target), target)).fetchone()
+        if row is None:
+            break
+        redirected_from = redirected_from or row['title']
+        target = row['target']
+        article_id = _find_title(conn, target)
+        if article_id is not None:
+            return article_id, redirected_from
+    
+    # Prefix match as a range scan over the normalized index
+    prefix = normalize_title(title)
+    row = conn.execute("""
+        SELECT id FROM articles WHERE title_norm >= ? AND title_norm < ?
+        ORDER BY title_norm LIMIT 1
+    """, (prefix, prefix + '\U0010ffff')).fetchone()
+    return (row[0], None) if row else (None, None)
+
+
+def get_article(title: str, conn: sqlite3.Connection = None, full_text: bool = True) -> Optional[Dict]:
+    """
+    Get a specific article by title (case-insensitive, following redirects).
+    
+    Without full_text only the summary is read, so compressed content
+    is never decompressed. Results are cached, see QueryCache.
+    """
+    if conn is None:
+        conn = get_read_connection()
+    return _query_cache.get_or_compute(
+        conn, ('get', ' '.join(title.split()), full_text),
+        lambda: _fetch_article(title, conn, full_text)
+    )
+
+
+def _fetch_article(title: str, conn: sqlite3.Connection, full_text: bool) -> Optional[Dict]:
+    """Look up an article without the cache"""
     cursor = conn.cursor()
     
-    # Check which columns exist
-    cursor.execute("PRAGMA table_info(articles)")
-    columns = {row[1] for row in cursor.fetchall()}
+    content_col, summary_col = _article_columns(conn)
+    if not full_text:
+        content_sql = "NULL as content"
+    elif content_col == 'content' and _has_compressed_column(conn):
+        content_sql = "content, content_z"
+    else:
+        content_sql = f"{content_col} as content"
     
-    content_col = 'full_text' if 'full_text' in columns else 'content'
-    summary_col = 'abstract' if 'abstract' in columns else 'summary'
+    try:
+        article_id, redirected_from = resolve_title(title, conn=conn)
+    except sqlite3.OperationalError:
+        # Database from before the title index (run init / index-titles)
+        row = conn.execute(
+            "SELECT id FROM articles WHERE title = ? OR title LIKE ? LIMIT 1", (title, f'{title}%')
+        ).fetchone()
+        article_id, redirected_from = (row[0] if row else None), None
+    if article_id is None:
+        return None
     
     cursor.execute(f"""
-        SELECT id, title, {content_col} as content, {summary_col} as summary, categories
+        SELECT id, title, {content_sql}, {summary_col} as summary, categories
         FROM articles
-        WHERE title = ? OR title LIKE ?
-        LIMIT 1
-    """, (title, f'{title}%'))
+        WHERE id = ?
+    """, (article_id,))
     
     row = cursor.fetchone()
-    conn.close()
     
     if row:
         # Parse categories (may be JSON or simple string)
@@ -251,33 +1394,133 @@ def get_article(title: str) -> Optional[Dict]:
             cats = []
         
         # Use summary or first part of content
-        content = row['content'] or row['summary'] or ''
+        content = row['content']
+        if content is None and 'content_z' in row.keys() and row['content_z'] is not None:
+            content = _decompress_content(conn, row['content_z'])
+        content = content or row['summary'] or ''
         summary = row['summary'] or (content[:500] + '...' if len(content) > 500 else content)
         
-        return {
+        article = {
             'id': row['id'],
             'title': row['title'],
-            'content': content,
             'summary': summary,
             'categories': cats
         }
+        if full_text:
+            article['content'] = content
+        if redirected_from:
+            article['redirected_from'] = redirected_from
+        return article
     return None
 
 
-def search_entities(query: str, limit: int = 10) -> List[Dict]:
-    """Search Wikidata entities"""
-    conn = get_db_connection()
+def _entity_fts_query(query: str) -> Optional[str]:
+    """
+    FTS5 query for free text: every word required. Whole words only -
+    prefix queries longer than the prefix index merge the entire doclist,
+    and name prefixes are already covered by entity_aliases.
+    """
+    words = re.findall(r'\w+', query)
+    if not words:
+        return None
+    return ' '.join(f'"{w}"' for w in words)
+
+
+# Full-text candidates scored per entity search; bounds latency for common words
+ENTITY_FTS_CANDIDATES = 500
+
+
+def _rank_entity_ids(conn: sqlite3.Connection, query: str, limit: int) -> List[str]:
+    """
+    Entity ids for a query, best first: exact label/alias matches, labels
+    and aliases starting with the query, then full-text matches on
+    label/aliases and finally description.
+    
+    Every step is an index search or a bounded scan, so the cost doesn't
+    grow with the number of entities matching a common word.
+    """
+    norm = normalize_title(query)
+    if not norm:
+        return []
+    
+    # Exact matches; entities with an article and lower Q-numbers (older,
+    # usually better known) first
+    ids = [row[0] for row in conn.execute("""
+        SELECT a.entity_id FROM entity_aliases a
+        JOIN entities e ON e.id = a.entity_id
+        WHERE a.alias_norm = ?
+        ORDER BY a.is_label DESC, e.wikipedia_title IS NULL, CAST(SUBSTR(e.id, 2) AS INTEGER)
+        LIMIT ?
+    """, (norm, limit))]
+    seen = set(ids)
+    
+    def extend(rows):
+        for row in rows:
+            if len(ids) >= limit:
+                return
+            if row[0] not in seen:
+                seen.add(row[0])
+                ids.append(row[0])
+    
+    # Prefix matches, shortest (closest) names first. Sorted here: SQLite
+    # flattens a LIMIT subquery and would sort the whole prefix range.
+    if len(ids) < limit:
+        candidates = conn.execute("""
+            SELECT entity_id, alias_norm, is_label FROM entity_aliases
+            WHERE alias_norm > ? AND alias_norm < ?
+            LIMIT ?
+        """, (norm, norm + '\U0010ffff', ENTITY_FTS_CANDIDATES)).fetchall()
+        candidates.sort(key=lambda row: (len(row[1]), -row[2]))
+        extend(candidates)
+    
+    fts_query = _entity_fts_query(query)
+    if fts_query is None:
+        return ids
+    
+    for match in (f"{{label aliases}} : ({fts_query})", fts_query):
+        if len(ids) >= limit:
+            break
+        candidates = conn.execute("""
+            SELECT rowid, bm25(entities_fts, 10.0, 5.0, 1.0) FROM entities_fts
+            WHERE entities_fts MATCH ?
+            LIMIT ?
+        """, (match, ENTITY_FTS_CANDIDATES)).fetchall()
+        candidates.sort(key=lambda row: row[1])
+        rowids = [row[0] for row in candidates[:limit * 2]]
+        by_rowid = dict(conn.execute(f"""
+            SELECT rowid, id FROM entities WHERE rowid IN ({','.join('?' * len(rowids))})
+        """, rowids).fetchall())
+        extend((by_rowid[r],) for r in rowids if r in by_rowid)
+    return ids
+
+
+def search_entities(query: str, limit: int = 10, conn: sqlite3.Connection = None) -> List[Dict]:
+    """Search Wikidata entities (exact label/alias matches first, then full-text)"""
+    if conn is None:
+        conn = get_read_connection()
     cursor = conn.cursor()
     
-    cursor.execute("""
-        SELECT id, label, description, aliases, wikipedia_title
-        FROM entities
-        WHERE label LIKE ? OR aliases LIKE ? OR description LIKE ?
-        LIMIT ?
-    """, (f'%{query}%', f'%{query}%', f'%{query}%', limit))
+    try:
+        ids = _rank_entity_ids(conn, query, limit)
+        cursor.execute(f"""
+            SELECT id, label, description, aliases, wikipedia_title
+            FROM entities
+            WHERE id IN ({','.join('?' * len(ids))})
+        """, ids)
+        by_id = {row['id']: row for row in cursor.fetchall()}
+        rows = [by_id[i] for i in ids if i in by_id]
+    except sqlite3.OperationalError:
+        # Database from before the entity index (run init / index-entities)
+        cursor.execute("""
+            SELECT id, label, description, aliases, wikipedia_title
+            FROM entities
+            WHERE label LIKE ? OR aliases LIKE ? OR description LIKE ?
+            LIMIT ?
+        """, (f'%{query}%', f'%{query}%', f'%{query}%', limit))
+        rows = cursor.fetchall()
     
     results = []
-    for row in cursor.fetchall():
+    for row in rows:
         results.append({
             'id': row['id'],
             'label': row['label'],
@@ -286,23 +1529,22 @@ def search_entities(query: str, limit: int = 10) -> List[Dict]:
             'wikipedia_title': row['wikipedia_title']
         })
     
-    conn.close()
     return results
 
 
-def get_entity(entity_id: str) -> Optional[Dict]:
+def get_entity(entity_id: str, conn: sqlite3.Connection = None) -> Optional[Dict]:
     """Get a specific Wikidata entity by ID"""
-    conn = get_db_connection()
+    if conn is None:
+        conn = get_read_connection()
     cursor = conn.cursor()
     
     cursor.execute("""
-        SELECT id, label, description, aliases, wikipedia_title, properties
+        SELECT *
         FROM entities
         WHERE id = ?
     """, (entity_id,))
     
     row = cursor.fetchone()
-    conn.close()
     
     if row:
         return {
@@ -311,14 +1553,17 @@ def get_entity(entity_id: str) -> Optional[Dict]:
             'description': row['description'],
             'aliases': json.loads(row['aliases']) if row['aliases'] else [],
             'wikipedia_title': row['wikipedia_title'],
-            'properties': json.loads(row['properties']) if row['properties'] else {}
+            'properties': json.loads(row['properties']) if row['properties'] else {},
+            'instance_of': row['instance_of'] if 'instance_of' in row.keys() else None,
+            'sitelinks': json.loads(row['sitelinks']) if 'sitelinks' in row.keys() and row['sitelinks'] else {}
         }
     return None
 
 
-def get_stats() -> Dict:
+def get_stats(conn: sqlite3.Connection = None) -> Dict:
     """Get knowledge base statistics"""
-    conn = get_db_connection()
+    if conn is None:
+        conn = get_read_connection()
     cursor = conn.cursor()
     
     cursor.execute("SELECT COUNT(*) FROM articles")
@@ -327,67 +1572,1176 @@ def get_stats() -> Dict:
     cursor.execute("SELECT COUNT(*) FROM entities")
     entity_count = cursor.fetchone()[0]
     
+    try:
+        cursor.execute("SELECT COUNT(*) FROM redirects")
+        redirect_count = cursor.fetchone()[0]
+    except sqlite3.OperationalError:
+        redirect_count = 0
+    
     # Get database file size
     db_size = os.path.getsize(DB_PATH) if DB_PATH.exists() else 0
     
-    conn.close()
     
     return {
         'articles': article_count,
         'entities': entity_count,
+        'redirects': redirect_count,
         'database_size_mb': round(db_size / (1024 * 1024), 2),
-        'database_path': str(DB_PATH)
+        'database_path': str(DB_PATH),
+        'cache': _query_cache.stats()
     }
 
 
-def download_wikipedia():
-    """Download and import Wikipedia dump"""
-    print("Starting Wikipedia download...")
-    print(f"URL: {WIKI_URL}")
-    
-    local_file = DATA_DIR / "enwiki-pages-articles.xml.bz2"
-    
-    # Check if already downloading/downloaded
-    if local_file.exists():
-        size_gb = local_file.stat().st_size / (1024**3)
-        print(f"Found existing file: {size_gb:.2f} GB")
-        if size_gb > 20:  # Full dump is ~22GB
-            print("File appears complete, skipping download")
-            import_wikipedia(local_file)
-            return
-        else:
-            print("File incomplete, resuming download...")
-    
-    # Download with progress
-    def report_progress(block_num, block_size, total_size):
-        downloaded = block_num * block_size
-        percent = (downloaded / total_size) * 100 if total_size > 0 else 0
-        downloaded_gb = downloaded / (1024**3)
-        total_gb = total_size / (1024**3)
-        print(f"\rDownloading: {downloaded_gb:.2f} / {total_gb:.2f} GB ({percent:.1f}%)", end='', flush=True)
+class ConnectionPool:
+    """Fixed-size pool of SQLite connections shared by the query daemon's threads"""
+    
+    def __init__(self, size: int = 4):
+        self._idle = queue.Queue()
+        for _ in range(size):
+            self._idle.put(get_db_connection('read', check_same_thread=False))
+    
+    @contextmanager
+    def connection(self):
+        """Borrow a connection for the duration of a request"""
+        conn = self._idle.get()
+        try:
+            yield conn
+        finally:
+            self._idle.put(conn)
     
-    try:
-        urllib.request.urlretrieve(WIKI_URL, local_file, report_progress)
-        print("\nDownload complete!")
-        import_wikipedia(local_file)
-    except Exception as e:
-        print(f"\nDownload error: {e}")
-        raise
+    def close(self):
+        while not self._idle.empty():
+            self._idle.get_nowait().close()
 
 
-def import_wikipedia(dump_file: Path):
-    """Import Wikipedia from a dump file"""
-    print(f"Importing from: {dump_file}")
+def handle_request(request: Dict, conn: sqlite3.Connection) -> Dict:
+    """Answer one daemon request: {"cmd": "search"|"passages"|"get"|"entity"|"entities"|"stats"|"ping", ...}"""
+    cmd = request.get('cmd')
+    
+    if cmd == 'ping':
+        return {'success': True}
+    
+    if cmd == 'search':
+        results = search_articles(request['query'], limit=int(request.get('limit', 5)), conn=conn,
+                                  mode=request.get('mode', 'keyword'))
+        return {'success': True, 'results': results}
+    
+    if cmd == 'passages':
+        results = search_passages(
+            request['query'], limit=int(request.get('limit', 3)), conn=conn,
+            token_budget=int(request.get('budget', PASSAGE_TOKEN_BUDGET)),
+            mode=request.get('mode', 'keyword'), highlight=bool(request.get('highlight', False))
+        )
+        return {'success': True, 'results': results}
     
-    init_database()
-    conn = get_db_connection()
-    cursor = conn.cursor()
+    if cmd == 'get':
+        article = get_article(request['title'], conn=conn, full_text=bool(request.get('full', True)))
+        return {'success': article is not None, 'article': article}
     
-    # Parse XML with streaming
-    import xml.etree.ElementTree as ET
+    if cmd == 'entity':
+        entity = get_entity(request['id'], conn=conn)
+        return {'success': entity is not None, 'entity': entity}
     
-    article_count = 0
+    if cmd == 'entities':
+        results = search_entities(request['query'], limit=int(request.get('limit', 10)), conn=conn)
+        return {'success': True, 'results': results}
+    
+    if cmd == 'stats':
+        return {'success': True, 'stats': get_stats(conn=conn)}
+    
+    return {'success': False, 'error': f"Unknown command: {cmd}"}
+
+
+class _KnowledgeRequestHandler(socketserver.StreamRequestHandler):
+    """JSON lines: one request object per line, one response object per line"""
+    
+    def handle(self):
+        for line in self.rfile:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                request = json.loads(line)
+                with self.server.pool.connection() as conn:
+                    response = handle_request(request, conn)
+            except KeyError as e:
+                response = {'success': False, 'error': f"Missing field: {e.args[0]}"}
+            except Exception as e:
+                response = {'success': False, 'error': str(e)}
+            self.wfile.write((json.dumps(response) + '\n').encode('utf-8'))
+            self.wfile.flush()
+
+
+class KnowledgeTCPServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class KnowledgeUnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def serve(host: str = SERVER_HOST, port: int = SERVER_PORT, socket_path: str = None, pool_size: int = 4):
+    """Run the long-lived query daemon so tool calls skip interpreter and DB startup"""
+    pool = ConnectionPool(pool_size)
+    
+    # Warm up: detect the schema once and pull the table roots into the page cache
+    with pool.connection() as conn:
+        _article_columns(conn)
+        get_stats(conn=conn)
+    # Load the embedding model up front (seconds) if there is a semantic index
+    if _semantic_index() is not None and embedding_service.available():
+        embed_texts([""])
+    
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        server = KnowledgeUnixServer(socket_path, _KnowledgeRequestHandler)
+        where = socket_path
+    else:
+        server = KnowledgeTCPServer((host, port), _KnowledgeRequestHandler)
+        where = f"{host}:{port}"
+    server.pool = pool
+    
+    print(f"[Knowledge] Serving {DB_PATH} on {where}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        pool.close()
+        if socket_path and os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+
+# === Downloading ===
+
+def fetch_published_checksum(sums_url: str, file_url: str) -> Optional[str]:
+    """
+    Look up a file's digest in a Wikimedia sha1sums/md5sums listing.
+    
+    The listing uses dated names (enwiki-20240601-...) while we download the
+    "latest" aliases, so entries are matched on the part after "latest".
+    """
+    suffix = os.path.basename(file_url).split('latest', 1)[-1]
+    try:
+        with urllib.request.urlopen(sums_url, timeout=30) as response:
+            listing = response.read().decode('utf-8', errors='replace')
+    except Exception as e:
+        print(f"Could not fetch checksums ({sums_url}): {e}")
+        return None
+    for line in listing.splitlines():
+        parts = line.split()
+        if len(parts) == 2 and parts[1].endswith(suffix):
+            return parts[0].lower()
+    return None
+
+
+class RangeDownloader:
+    """
+    Resumable, multi-connection HTTP download into a preallocated file.
+    
+    The file is split into fixed segments fetched with Range requests by a
+    few threads. Per-segment progress is saved next to the file
+    (<name>.download), so an interrupted download continues where it
+    stopped; the state file is removed once the download is complete and
+    verified. available() is the contiguous prefix on disk, which the
+    streaming import waits on, and the checksum is computed over that prefix
+    as it grows so verification finishes with the download.
+    """
+    
+    def __init__(self, url: str, dest: Path, connections: int = DOWNLOAD_CONNECTIONS,
+                 segment_size: int = DOWNLOAD_SEGMENT_SIZE, checksum: Tuple[str, str] = None):
+        self.url = url
+        self.dest = Path(dest)
+        self.state_file = self.dest.with_name(self.dest.name + '.download')
+        self.connections = max(1, connections)
+        self.segment_size = segment_size
+        self.checksum = checksum  # (algorithm, hex digest) or None
+        self.size = 0
+        self.ranged = False
+        self.segments: List[List[int]] = []  # [start, end, bytes done]
+        self.error: Optional[str] = None
+        self.digest: Optional[str] = None
+        self._tag = ''
+        self._fd = None
+        self._lock = threading.Lock()
+        self._todo = queue.Queue()
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._started = 0.0
+        self._resumed_bytes = 0
+    
+    def _probe(self):
+        request = urllib.request.Request(self.url, method='HEAD')
+        with urllib.request.urlopen(request, timeout=30) as response:
+            self.size = int(response.headers.get('Content-Length') or 0)
+            self.ranged = response.headers.get('Accept-Ranges', '').lower() == 'bytes'
+            self._tag = response.headers.get('ETag') or response.headers.get('Last-Modified') or ''
+        if not self.size:
+            raise RuntimeError(f"Server did not report a size for {self.url}")
+    
+    def _plan(self):
+        """Load saved progress if it matches the remote file, else plan fresh segments"""
+        state = None
+        if self.state_file.exists():
+            try:
+                state = json.loads(self.state_file.read_text())
+            except ValueError:
+                state = None
+        
+        if (state and state.get('url') == self.url and state.get('size') == self.size
+                and state.get('tag') == self._tag and self.dest.exists()):
+            self.segments = state['segments']
+            if not self.ranged:
+                # Can't continue a partial segment without Range support
+                for segment in self.segments:
+                    if segment[2] < segment[1] - segment[0]:
+                        segment[2] = 0
+            print(f"Resuming download ({self.downloaded() / (1024**3):.2f} GB already on disk)")
+        elif self.dest.exists() and not self.state_file.exists() and self.dest.stat().st_size == self.size:
+            # Finished by an earlier run; still verified below
+            self.segments = [[0, self.size, self.size]]
+        else:
+            step = self.segment_size if self.ranged else self.size
+            self.segments = [[start, min(start + step, self.size), 0]
+                             for start in range(0, self.size, step)]
+            with open(self.dest, 'wb') as f:
+                f.truncate(self.size)
+            self._save_state()
+    
+    def _save_state(self):
+        with self._lock:
+            snapshot = [list(segment) for segment in self.segments]
+        # Make the bytes durable before recording them as done
+        if self._fd is not None:
+            os.fsync(self._fd)
+        tmp = self.state_file.with_name(self.state_file.name + '.tmp')
+        tmp.write_text(json.dumps({'url': self.url, 'size': self.size, 'tag': self._tag, 'segments': snapshot}))
+        os.replace(tmp, self.state_file)
+    
+    def downloaded(self) -> int:
+        with self._lock:
+            return sum(segment[2] for segment in self.segments)
+    
+    def complete(self) -> bool:
+        return bool(self.segments) and self.downloaded() == self.size
+    
+    def available(self) -> int:
+        """Bytes from the start of the file that are on disk; raises if the download failed"""
+        if self.error:
+            raise RuntimeError(f"Download failed: {self.error}")
+        total = 0
+        with self._lock:
+            for start, end, done in self.segments:
+                total += done
+                if done < end - start:
+                    break
+        return total
+    
+    def _fetch_segment(self, segment: List[int]):
+        start, end, _ = segment
+        for attempt in range(DOWNLOAD_RETRIES):
+            pos = start + segment[2]
+            if pos >= end or self._stop.is_set():
+                return
+            headers = {'Range': f"bytes={pos}-{end - 1}"} if self.ranged else {}
+            try:
+                request = urllib.request.Request(self.url, headers=headers)
+                with urllib.request.urlopen(request, timeout=60) as response:
+                    if self.ranged and response.status != 206:
+                        raise RuntimeError(f"Server ignored Range request (HTTP {response.status})")
+                    while pos < end and not self._stop.is_set():
+                        chunk = response.read(min(1024 * 1024, end - pos))
+                        if not chunk:
+                            break
+                        os.pwrite(self._fd, chunk, pos)
+                        pos += len(chunk)
+                        with self._lock:
+                            segment[2] = pos - start
+                if pos >= end or self._stop.is_set():
+                    return
+                raise RuntimeError(f"Connection closed at byte {pos:,}")
+            except Exception as e:
+                if attempt == DOWNLOAD_RETRIES - 1:
+                    raise
+                if not self.ranged:
+                    with self._lock:
+                        segment[2] = 0
+                print(f"\nDownload retry ({e})")
+                time.sleep(2 ** attempt)
+    
+    def _worker(self):
+        while not self._stop.is_set():
+            try:
+                segment = self._todo.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                self._fetch_segment(segment)
+            except Exception as e:
+                self.error = str(e)
+                self._stop.set()
+    
+    def _hasher(self):
+        """Hash the contiguous downloaded prefix as it grows"""
+        algorithm, _ = self.checksum
+        h = hashlib.new(algorithm)
+        pos = 0
+        while pos < self.size:
+            try:
+                limit = self.available()
+            except RuntimeError:
+                return
+            if limit <= pos:
+                if self._stop.is_set():
+                    return
+                time.sleep(0.2)
+                continue
+            data = os.pread(self._fd, min(8 * 1024 * 1024, limit - pos), pos)
+            h.update(data)
+            pos += len(data)
+        self.digest = h.hexdigest()
+    
+    def start(self) -> 'RangeDownloader':
+        """Probe the server, plan or resume segments and start the download threads"""
+        self._probe()
+        self._plan()
+        self._fd = os.open(self.dest, os.O_RDWR)
+        self._resumed_bytes = self.downloaded()
+        self._started = time.time()
+        
+        for segment in self.segments:
+            if segment[2] < segment[1] - segment[0]:
+                self._todo.put(segment)
+        workers = self.connections if self.ranged else 1
+        self._threads = [threading.Thread(target=self._worker, daemon=True) for _ in range(workers)]
+        if self.checksum:
+            self._threads.append(threading.Thread(target=self._hasher, daemon=True))
+        self._threads.append(threading.Thread(target=self._monitor, daemon=True))
+        for thread in self._threads:
+            thread.start()
+        return self
+    
+    def _monitor(self):
+        """Periodically persist progress while the workers run"""
+        while not self._stop.wait(2.0):
+            self._save_state()
+            if self.complete():
+                return
+    
+    def progress_line(self) -> str:
+        done = self.downloaded()
+        elapsed = max(time.time() - self._started, 1e-6)
+        rate = (done - self._resumed_bytes) / elapsed / (1024 * 1024)
+        return (f"Downloading: {done / (1024**3):.2f} / {self.size / (1024**3):.2f} GB "
+                f"({done / self.size:.1%}, {rate:.1f} MB/s)")
+    
+    def wait(self, show_progress: bool = True):
+        """Wait for the download, then verify it. Raises on failure."""
+        try:
+            while not self.complete() and not self.error:
+                if show_progress:
+                    print(f"\r{self.progress_line()}", end='', flush=True)
+                time.sleep(1.0)
+            if show_progress:
+                print(f"\r{self.progress_line()}")
+            self._stop.set()
+            for thread in self._threads:
+                thread.join()
+        except KeyboardInterrupt:
+            self.close()
+            print("\nDownload interrupted (run the same command again to resume)")
+            raise
+        finally:
+            if self._fd is not None and self.state_file.exists():
+                self._save_state()
+        
+        if self.error:
+            raise RuntimeError(f"Download failed: {self.error}")
+        self._verify()
+        self.close()
+    
+    def _verify(self):
+        if self.checksum:
+            algorithm, expected = self.checksum
+            if self.digest is None:
+                # Hasher stopped early (e.g. resumed after it was set up); hash now
+                self._stop.clear()
+                self._hasher()
+            if self.digest != expected:
+                self.close()
+                self.state_file.unlink(missing_ok=True)
+                self.dest.unlink(missing_ok=True)
+                raise RuntimeError(f"{algorithm} mismatch for {self.dest.name}: "
+                                   f"expected {expected}, got {self.digest} (file removed)")
+            print(f"{algorithm} verified: {self.digest}")
+        self.state_file.unlink(missing_ok=True)
+    
+    def close(self):
+        """Stop the threads and save progress"""
+        self._stop.set()
+        for thread in self._threads:
+            thread.join()
+        if self._fd is not None:
+            if self.state_file.exists():
+                self._save_state()
+            os.close(self._fd)
+            self._fd = None
+
+
+def download_file(url: str, dest: Path, connections: int = DOWNLOAD_CONNECTIONS,
+                  checksum: Tuple[str, str] = None) -> Path:
+    """Download (or resume) a file and verify it"""
+    RangeDownloader(url, dest, connections, checksum=checksum).start().wait()
+    return dest
+
+
+def _dump_checksum(url: str, sha1_url: str, md5_url: str) -> Optional[Tuple[str, str]]:
+    """Published (algorithm, digest) for a dump file, preferring sha1"""
+    for algorithm, sums_url in (('sha1', sha1_url), ('md5', md5_url)):
+        if sums_url:
+            digest = fetch_published_checksum(sums_url, url)
+            if digest:
+                return algorithm, digest
+    print(f"No published checksum found for {os.path.basename(url)}, skipping verification")
+    return None
+
+
+def download_wikipedia(
+    url: str = WIKI_URL,
+    index_url: str = WIKI_INDEX_URL,
+    connections: int = DOWNLOAD_CONNECTIONS,
+    verify: bool = True,
+    stream: bool = True,
+    sha1_url: str = WIKI_SHA1_URL,
+    md5_url: str = WIKI_MD5_URL,
+    workers: int = None
+):
+    """
+    Download and import the Wikipedia dump.
+    
+    The multistream index is fetched first; with it the parallel import
+    runs while the dump downloads, parsing each stream as soon as its bytes
+    are on disk. Both downloads resume after interruption.
+    """
+    print("Starting Wikipedia download...")
+    print(f"URL: {url}")
+    
+    checksum = (lambda u: _dump_checksum(u, sha1_url, md5_url)) if verify else (lambda u: None)
+    
+    # The multistream index is small and enables the parallel importer
+    has_index = False
+    try:
+        if INDEX_FILE.exists() and not INDEX_FILE.with_name(INDEX_FILE.name + '.download').exists():
+            has_index = True
+        else:
+            print(f"Downloading multistream index: {index_url}")
+            download_file(index_url, INDEX_FILE, connections=1, checksum=checksum(index_url))
+            has_index = True
+    except Exception as e:
+        print(f"Index download failed ({e}), falling back to serial import")
+    
+    downloader = RangeDownloader(url, DUMP_FILE, connections, checksum=checksum(url))
+    downloader.start()
+    
+    if downloader.complete():
+        print("Dump already downloaded")
+        downloader.wait(show_progress=False)
+        _import_dump(DUMP_FILE)
+        return
+    
+    if not (stream and has_index):
+        downloader.wait()
+        print("Download complete!")
+        _import_dump(DUMP_FILE)
+        return
+    
+    # Pipelined: import streams as the download makes them available
+    print(f"Importing while downloading ({connections} connections)...")
+    try:
+        if not import_wikipedia_parallel(DUMP_FILE, INDEX_FILE, workers=workers, available=downloader.available):
+            print("Stopping download (run the same command again to resume)")
+            return
+        downloader.wait(show_progress=False)
+        print("Download complete and verified!")
+    except RuntimeError as e:
+        # bz2 blocks carry their own CRCs, so corruption also shows up as import errors
+        print(f"\n{e}")
+        print("Run the download again to resume; the import resumes from its last committed stream")
+        raise
+    finally:
+        downloader.close()
+
+
+# === Full-text index management ===
+#
+# articles_fts is an external-content FTS5 table, so it only contains what is
+# explicitly inserted into it. Articles are indexed in rowid order; the
+# highest indexed rowid (from FTS5's own docsize table) is the watermark, so a
+# partial build is always a usable index plus a resumable tail.
+
+def _fts_watermark(conn: sqlite3.Connection) -> int:
+    """Highest article rowid present in the FTS index"""
+    return conn.execute("SELECT COALESCE(MAX(id), 0) FROM articles_fts_docsize").fetchone()[0]
+
+
+def _index_fts_rows(conn: sqlite3.Connection, after: int, limit: int = -1) -> Tuple[int, int]:
+    """Index articles with rowid > after (up to limit rows). Returns (new watermark, rows indexed)"""
+    upto = conn.execute("""
+        SELECT MAX(id) FROM (SELECT id FROM articles WHERE id > ? ORDER BY id LIMIT ?)
+    """, (after, limit)).fetchone()[0]
+    if upto is None:
+        return after, 0
+    cur = conn.execute("""
+        INSERT INTO articles_fts(rowid, title, content, summary)
+        SELECT id, title, kb_content(content, content_z), summary FROM articles WHERE id > ? AND id <= ?
+    """, (after, upto))
+    return upto, cur.rowcount
+
+
+def configure_fts(conn: sqlite3.Connection, automerge: int = None, crisismerge: int = None):
+    """Set FTS5 segment merge behaviour (persisted in the index config)"""
+    if automerge is not None:
+        conn.execute("INSERT INTO articles_fts(articles_fts, rank) VALUES('automerge', ?)", (automerge,))
+    if crisismerge is not None:
+        conn.execute("INSERT INTO articles_fts(articles_fts, rank) VALUES('crisismerge', ?)", (crisismerge,))
+    conn.commit()
+
+
+def _write_articles(conn: sqlite3.Connection, rows: List[Tuple], index_fts: bool = True, compressor=None):
+    """
+    Insert or replace a batch of article rows (caller commits).
+    
+    With index_fts the new rows are added to the FTS index in the same
+    transaction. Rows replacing an already-indexed title (re-imported
+    streams after a resume) are removed from the index first, since an
+    external-content table can't notice the replacement itself.
+    
+    With a compressor (see _content_compressor) content goes to content_z.
+    """
+    watermark = _fts_watermark(conn) if index_fts else 0
+    if watermark:
+        titles = [row[0] for row in rows]
+        stale = conn.execute(f"""
+            SELECT id, title, kb_content(content, content_z), summary FROM articles
+            WHERE title IN ({','.join('?' * len(titles))}) AND id <= ?
+        """, (*titles, watermark)).fetchall()
+        conn.executemany("""
+            INSERT INTO articles_fts(articles_fts, rowid, title, content, summary)
+            VALUES('delete', ?, ?, ?, ?)
+        """, [tuple(row) for row in stale])
+    
+    if compressor is None:
+        values = [(title, normalize_title(title), content, None, summary, categories)
+                  for title, content, summary, categories in rows]
+    else:
+        values = [(title, normalize_title(title), None, compressor.compress(content.encode('utf-8')), summary, categories)
+                  for title, content, summary, categories in rows]
+    conn.executemany("""
+        INSERT OR REPLACE INTO articles (title, title_norm, content, content_z, summary, categories)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, values)
+    
+    if index_fts:
+        _index_fts_rows(conn, watermark)
+    _bump_data_version(conn)
+
+
+def build_fts_index(conn: sqlite3.Connection, chunk_size: int = FTS_CHUNK_SIZE) -> int:
+    """Index all articles past the watermark, committing chunk by chunk. Returns rows indexed."""
+    after = _fts_watermark(conn)
+    pending = conn.execute("SELECT COUNT(*) FROM articles WHERE id > ?", (after,)).fetchone()[0]
+    if not pending:
+        return 0
+    
+    print(f"Indexing {pending:,} articles for full-text search...")
+    indexed = 0
+    started = time.time()
+    while True:
+        after, count = _index_fts_rows(conn, after, chunk_size)
+        if not count:
+            break
+        _bump_data_version(conn)
+        conn.commit()
+        indexed += count
+        rate = indexed / max(time.time() - started, 1e-6)
+        print(f"\rIndexed {indexed:,}/{pending:,} ({rate:.0f}/s)...", end='', flush=True)
+    print()
+    return indexed
+
+
+def rebuild_fts_index(conn: sqlite3.Connection, chunk_size: int = FTS_CHUNK_SIZE) -> int:
+    """Drop the FTS index contents and rebuild them in resumable chunks"""
+    conn.execute("INSERT INTO articles_fts(articles_fts) VALUES('delete-all')")
+    _bump_data_version(conn)
+    conn.commit()
+    return build_fts_index(conn, chunk_size)
+
+
+def optimize_fts_index(conn: sqlite3.Connection):
+    """Merge all FTS segments into one (fastest queries; needs temp space ~ index size)"""
+    print("Optimizing full-text search index...")
+    conn.execute("INSERT INTO articles_fts(articles_fts) VALUES('optimize')")
+    conn.commit()
+
+
+def merge_fts_index(conn: sqlite3.Connection, pages: int = 500):
+    """Do a bounded amount of incremental segment merging"""
+    conn.execute("INSERT INTO articles_fts(articles_fts, rank) VALUES('merge', ?)", (pages,))
+    conn.commit()
+
+
+def fts_status(conn: sqlite3.Connection, check: bool = False) -> Dict:
+    """Report how much of the articles table is searchable"""
+    articles = conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+    indexed = conn.execute("SELECT COUNT(*) FROM articles_fts_docsize").fetchone()[0]
+    watermark = _fts_watermark(conn)
+    pending = conn.execute("SELECT COUNT(*) FROM articles WHERE id > ?", (watermark,)).fetchone()[0]
+    status = {
+        'articles': articles,
+        'indexed': indexed,
+        'pending': pending,
+        'watermark': watermark,
+        'segments_pages': conn.execute("SELECT COUNT(*) FROM articles_fts_data").fetchone()[0],
+    }
+    if check:
+        # Comparing against the content table only works while content is plain text
+        compressed = conn.execute("SELECT 1 FROM articles WHERE content_z IS NOT NULL LIMIT 1").fetchone()
+        try:
+            conn.execute("INSERT INTO articles_fts(articles_fts, rank) VALUES('integrity-check', ?)",
+                         (0 if compressed else 1,))
+            status['integrity'] = 'ok (index only, content is compressed)' if compressed else 'ok'
+        except sqlite3.DatabaseError as e:
+            status['integrity'] = str(e)
+    return status
+
+
+def _write_redirects(conn: sqlite3.Connection, redirects: List[Tuple[str, str]]):
+    """Insert or replace a batch of (title, target) redirects (caller commits)"""
+    conn.executemany("""
+        INSERT OR REPLACE INTO redirects (title, title_norm, target) VALUES (?, ?, ?)
+    """, [(title, normalize_title(title), target) for title, target in redirects])
+
+
+def index_titles(conn: sqlite3.Connection, chunk_size: int = 50000) -> int:
+    """Fill in title_norm for articles imported before the column existed"""
+    filled = 0
+    while True:
+        rows = conn.execute(
+            "SELECT id, title FROM articles WHERE title_norm IS NULL LIMIT ?", (chunk_size,)
+        ).fetchall()
+        if not rows:
+            break
+        conn.executemany(
+            "UPDATE articles SET title_norm = ? WHERE id = ?",
+            [(normalize_title(row[1]), row[0]) for row in rows]
+        )
+        conn.commit()
+        filled += len(rows)
+        print(f"\rNormalized {filled:,} titles...", end='', flush=True)
+    if filled:
+        print()
+    return filled
+
+
+def _finish_import(conn: sqlite3.Connection, optimize: bool = True):
+    """Rebuild indexes and bring the FTS index fully up to date after an import"""
+    _end_bulk_load(conn)
+    index_titles(conn)
+    try:
+        build_fts_index(conn)
+        if optimize:
+            optimize_fts_index(conn)
+    except sqlite3.DatabaseError as e:
+        print(f"Full-text index error: {e}")
+        print("Check and resume with: knowledge_base.py fts status / fts resume")
+
+
+# === Compressed content storage ===
+#
+# Optionally, full article text lives zstd-compressed in content_z (content
+# is NULL), while titles, summaries and the FTS index stay plain. Search
+# never touches content_z; it is only decompressed when full text is asked
+# for. The trained dictionary's id is recorded in every zstd frame, so rows
+# compressed with an older dictionary stay readable.
+
+def _content_compressor(conn: sqlite3.Connection):
+    """zstd compressor for newly written content, or None if stored as plain text"""
+    if _get_import_state(conn, 'content_compression') != 'zstd':
+        return None
+    if not HAS_ZSTD:
+        raise RuntimeError("Content compression is enabled; install zstandard")
+    dict_id = int(_get_import_state(conn, 'content_dict') or 0)
+    if not dict_id:
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL)
+    row = conn.execute("SELECT data FROM zstd_dicts WHERE id = ?", (dict_id,)).fetchone()
+    return zstandard.ZstdCompressor(level=ZSTD_LEVEL, dict_data=zstandard.ZstdCompressionDict(row[0]))
+
+
+def _sample_content(conn: sqlite3.Connection, samples: int) -> List[bytes]:
+    """Evenly spaced article texts for dictionary training"""
+    max_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM articles").fetchone()[0]
+    step = max(1, max_id // max(samples, 1))
+    rows = conn.execute("""
+        SELECT kb_content(content, content_z) FROM articles
+        WHERE id % ? = 0 LIMIT ?
+    """, (step, samples)).fetchall()
+    return [row[0].encode('utf-8') for row in rows if row[0]]
+
+
+def _train_dictionary(samples: List[bytes], dict_size: int = ZSTD_DICT_SIZE):
+    """Train a zstd dictionary, or None if there is too little data for one"""
+    if len(samples) < 100:
+        return None
+    try:
+        return zstandard.train_dictionary(dict_size, samples, level=ZSTD_LEVEL)
+    except zstandard.ZstdError as e:
+        print(f"Dictionary training failed ({e}), compressing without one")
+        return None
+
+
+def compress_articles(
+    conn: sqlite3.Connection,
+    dict_size: int = ZSTD_DICT_SIZE,
+    samples: int = ZSTD_TRAIN_SAMPLES,
+    chunk_size: int = 2000
+) -> int:
+    """
+    Migrate plain-text content to zstd and enable compression for future imports.
+    
+    Resumable: works through rows still holding plain content in rowid
+    order, committing per chunk. Returns the number of rows compressed.
+    """
+    if not HAS_ZSTD:
+        raise RuntimeError("zstandard is not installed (pip install zstandard)")
+    if _article_columns(conn)[0] != 'content':
+        raise RuntimeError("Compression needs the current articles schema (re-import first)")
+    
+    # Train (once) and switch new writes to compressed storage
+    if _get_import_state(conn, 'content_compression') != 'zstd':
+        dictionary = None
+        if dict_size:
+            print(f"Training {dict_size // 1024} KB dictionary on up to {samples:,} articles...")
+            dictionary = _train_dictionary(_sample_content(conn, samples), dict_size)
+        if dictionary is not None:
+            conn.execute("INSERT OR REPLACE INTO zstd_dicts (id, data) VALUES (?, ?)",
+                         (dictionary.dict_id(), dictionary.as_bytes()))
+            _set_import_state(conn, 'content_dict', str(dictionary.dict_id()))
+        _set_import_state(conn, 'content_compression', 'zstd')
+        conn.commit()
+    
+    compressor = _content_compressor(conn)
+    pending = conn.execute("SELECT COUNT(*) FROM articles WHERE content IS NOT NULL").fetchone()[0]
+    print(f"Compressing {pending:,} articles...")
+    
+    compressed = 0
+    plain_bytes = 0
+    packed_bytes = 0
+    after = 0
+    while True:
+        rows = conn.execute("""
+            SELECT id, content FROM articles
+            WHERE id > ? AND content IS NOT NULL
+            ORDER BY id LIMIT ?
+        """, (after, chunk_size)).fetchall()
+        if not rows:
+            break
+        updates = []
+        for article_id, content in rows:
+            raw = content.encode('utf-8')
+            blob = compressor.compress(raw)
+            plain_bytes += len(raw)
+            packed_bytes += len(blob)
+            updates.append((blob, article_id))
+        conn.executemany("UPDATE articles SET content = NULL, content_z = ? WHERE id = ?", updates)
+        conn.commit()
+        after = rows[-1][0]
+        compressed += len(rows)
+        ratio = plain_bytes / packed_bytes if packed_bytes else 0
+        print(f"\rCompressed {compressed:,}/{pending:,} ({ratio:.1f}x)...", end='', flush=True)
+    print()
+    
+    if compressed:
+        print(f"Content: {plain_bytes / (1024 * 1024):,.1f} MB -> {packed_bytes / (1024 * 1024):,.1f} MB")
+        print("Run 'knowledge_base.py storage vacuum' to return the freed pages to the filesystem")
+    return compressed
+
+
+def decompress_articles(conn: sqlite3.Connection, chunk_size: int = 2000) -> int:
+    """Migrate compressed content back to plain text and disable compression"""
+    _set_import_state(conn, 'content_compression', 'none')
+    conn.commit()
+    
+    restored = 0
+    after = 0
+    while True:
+        rows = conn.execute("""
+            SELECT id, content_z FROM articles
+            WHERE id > ? AND content_z IS NOT NULL
+            ORDER BY id LIMIT ?
+        """, (after, chunk_size)).fetchall()
+        if not rows:
+            break
+        conn.executemany(
+            "UPDATE articles SET content = ?, content_z = NULL WHERE id = ?",
+            [(_decompress_content(conn, blob), article_id) for article_id, blob in rows]
+        )
+        conn.commit()
+        after = rows[-1][0]
+        restored += len(rows)
+        print(f"\rDecompressed {restored:,} articles...", end='', flush=True)
+    print()
+    return restored
+
+
+def storage_status(conn: sqlite3.Connection) -> Dict:
+    """How article content is stored and how much space it takes"""
+    row = conn.execute("""
+        SELECT COUNT(content), COALESCE(SUM(LENGTH(CAST(content AS BLOB))), 0),
+               COUNT(content_z), COALESCE(SUM(LENGTH(content_z)), 0),
+               COALESCE(SUM(LENGTH(CAST(summary AS BLOB))), 0)
+        FROM articles
+    """).fetchone()
+    page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+    free_pages = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    return {
+        'compression': _get_import_state(conn, 'content_compression') or 'none',
+        'dictionary': int(_get_import_state(conn, 'content_dict') or 0) or None,
+        'plain_articles': row[0],
+        'plain_content_mb': round(row[1] / (1024 * 1024), 2),
+        'compressed_articles': row[2],
+        'compressed_content_mb': round(row[3] / (1024 * 1024), 2),
+        'summary_mb': round(row[4] / (1024 * 1024), 2),
+        'free_mb': round(free_pages * page_size / (1024 * 1024), 2),
+        'database_size_mb': round(os.path.getsize(DB_PATH) / (1024 * 1024), 2),
+    }
+
+
+def benchmark_storage(conn: sqlite3.Connection, sample: int = 500) -> Dict:
+    """
+    Compare plain vs zstd (with and without a trained dictionary) content
+    storage on a sample of articles, plus get_article latency on this database.
+    
+    Compression is measured in memory, so this works before migrating.
+    """
+    if not HAS_ZSTD:
+        return {'error': 'zstandard is not installed'}
+    
+    texts = _sample_content(conn, sample * 2)
+    if len(texts) < 2:
+        return {'error': 'Not enough articles'}
+    
+    # Train on one half, measure on the other
+    train, test = texts[::2], texts[1::2]
+    dictionary = _train_dictionary(train)
+    plain = sum(len(t) for t in test)
+    
+    def measure(cctx, dctx):
+        blobs = [cctx.compress(t) for t in test]
+        started = time.perf_counter()
+        for blob in blobs:
+            dctx.decompress(blob)
+        decompress_ms = (time.perf_counter() - started) * 1000 / len(blobs)
+        return sum(len(b) for b in blobs), decompress_ms
+    
+    no_dict_bytes, no_dict_ms = measure(
+        zstandard.ZstdCompressor(level=ZSTD_LEVEL), zstandard.ZstdDecompressor()
+    )
+    result = {
+        'articles': len(test),
+        'plain_kb_per_article': round(plain / len(test) / 1024, 2),
+        'zstd_ratio': round(plain / no_dict_bytes, 2),
+        'zstd_decompress_ms': round(no_dict_ms, 3),
+    }
+    if dictionary is not None:
+        dict_bytes, dict_ms = measure(
+            zstandard.ZstdCompressor(level=ZSTD_LEVEL, dict_data=dictionary),
+            zstandard.ZstdDecompressor(dict_data=dictionary)
+        )
+        result['zstd_dict_ratio'] = round(plain / dict_bytes, 2)
+        result['zstd_dict_decompress_ms'] = round(dict_ms, 3)
+    
+    # Lookup latency against the database as currently stored
+    titles = [row[0] for row in conn.execute("""
+        SELECT title FROM articles WHERE id % ? = 0 LIMIT ?
+    """, (max(1, len(texts) // 50), 200))]
+    for full_text in (False, True):
+        started = time.perf_counter()
+        for title in titles:
+            _fetch_article(title, conn, full_text)
+        key = 'get_article_full_ms' if full_text else 'get_article_summary_ms'
+        result[key] = round((time.perf_counter() - started) * 1000 / max(len(titles), 1), 3)
+    result['storage'] = _get_import_state(conn, 'content_compression') or 'none'
+    return result
+
+
+# === Semantic index ===
+
+# Row files under SEMANTIC_DIR (name -> bytes per row, dim-sized for vectors)
+SEMANTIC_FILES = {'vectors.i8': None, 'scales.f32': 4, 'ids.i64': 8}
+
+
+def build_embeddings(
+    conn: sqlite3.Connection,
+    batch_size: int = EMBEDDING_BATCH_SIZE,
+    limit: int = None,
+    restart: bool = False
+) -> int:
+    """
+    Embed article titles + summaries into SEMANTIC_DIR.
+    
+    Resumable: articles are embedded in id order and meta.json records the
+    rows committed, so an interrupted run picks up after the last batch.
+    Returns the number of articles embedded.
+    """
+    if not HAS_NUMPY:
+        raise RuntimeError("numpy is not installed (pip install numpy)")
+    if not embedding_service.available():
+        raise RuntimeError("sentence-transformers is not installed (pip install sentence-transformers)")
+    model_name = embedding_service.EMBEDDING_MODEL_NAME
+    
+    SEMANTIC_DIR.mkdir(parents=True, exist_ok=True)
+    if restart:
+        for name in ('meta.json', 'ivf.npz', *SEMANTIC_FILES):
+            (SEMANTIC_DIR / name).unlink(missing_ok=True)
+    
+    meta = _load_semantic_meta()
+    if meta['rows'] and meta['model'] != model_name:
+        raise RuntimeError(f"Embeddings were built with {meta['model']}; rebuild with --restart")
+    dim = embedding_service.EMBEDDING_DIM
+    meta.update(model=model_name, dim=dim)
+    
+    # Drop anything written after the last committed batch
+    files = []
+    for name, row_bytes in SEMANTIC_FILES.items():
+        f = open(SEMANTIC_DIR / name, 'ab')
+        f.truncate(meta['rows'] * (row_bytes or dim))
+        files.append(f)
+    
+    _, summary_col = _article_columns(conn)
+    pending = conn.execute("SELECT COUNT(*) FROM articles WHERE id > ?", (meta['last_id'],)).fetchone()[0]
+    if limit is not None:
+        pending = min(pending, limit)
+    print(f"Embedding {pending:,} articles with {model_name}...")
+    
+    embedded = 0
+    started = time.time()
+    try:
+        while embedded < pending:
+            rows = conn.execute(f"""
+                SELECT id, title, {summary_col} FROM articles
+                WHERE id > ? ORDER BY id LIMIT ?
+            """, (meta['last_id'], min(batch_size, pending - embedded))).fetchall()
+            if not rows:
+                break
+            codes, scales = _quantize(embed_texts([f"{title}. {summary or ''}" for _, title, summary in rows]))
+            ids = np.array([row[0] for row in rows], dtype=np.int64)
+            for f, data in zip(files, (codes, scales, ids)):
+                f.write(data.tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+            meta['rows'] += len(rows)
+            meta['last_id'] = rows[-1][0]
+            _save_semantic_meta(meta)
+            
+            embedded += len(rows)
+            rate = embedded / max(time.time() - started, 1e-6)
+            print(f"\rEmbedded {embedded:,}/{pending:,} ({rate:.0f}/s)...", end='', flush=True)
+    finally:
+        for f in files:
+            f.close()
+    print()
+    
+    if embedded:
+        _bump_data_version(conn)
+        conn.commit()
+    return embedded
+
+
+def _nearest_centroids(vectors, centroids, chunk_size: int = 4096):
+    """Index of the most similar centroid for each row"""
+    assign = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), chunk_size):
+        assign[start:start + chunk_size] = np.argmax(vectors[start:start + chunk_size] @ centroids.T, axis=1)
+    return assign
+
+
+def _spherical_kmeans(vectors, k: int, iterations: int):
+    """k unit-length centroids clustering vectors by cosine"""
+    rng = np.random.default_rng(0)
+    centroids = vectors[rng.choice(len(vectors), k, replace=False)].copy()
+    for _ in range(iterations):
+        assign = _nearest_centroids(vectors, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, vectors)
+        # Re-seed empty lists with random vectors
+        empty = np.bincount(assign, minlength=k) == 0
+        sums[empty] = vectors[rng.choice(len(vectors), int(empty.sum()))]
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        centroids = sums / np.maximum(norms, 1e-12)
+    return centroids.astype(np.float32)
+
+
+def build_semantic_index(
+    conn: sqlite3.Connection,
+    lists: int = None,
+    samples: int = SEMANTIC_TRAIN_SAMPLES,
+    iterations: int = 10
+) -> Dict:
+    """
+    Cluster the embeddings into k-means lists (an IVF index) so a query
+    scans only the SEMANTIC_NPROBE nearest lists instead of every row.
+    Defaults to sqrt(rows) lists; rows embedded later are scanned directly
+    until this is re-run.
+    """
+    if not HAS_NUMPY:
+        raise RuntimeError("numpy is not installed (pip install numpy)")
+    index = SemanticIndex()
+    if index.rows == 0:
+        raise RuntimeError("No embeddings yet (run 'semantic build' first)")
+    
+    lists = min(lists or max(1, int(index.rows ** 0.5)), index.rows)
+    rng = np.random.default_rng(0)
+    picks = np.sort(rng.choice(index.rows, min(index.rows, max(samples, lists)), replace=False))
+    train = index.vectors[picks].astype(np.float32) * index.scales[picks, None]
+    print(f"Training {lists:,} lists on {len(picks):,} embeddings...")
+    centroids = _spherical_kmeans(train, lists, iterations)
+    
+    assign = np.empty(index.rows, dtype=np.int32)
+    for start in range(0, index.rows, SemanticIndex.SCAN_CHUNK):
+        end = min(start + SemanticIndex.SCAN_CHUNK, index.rows)
+        assign[start:end] = _nearest_centroids(index.dequantize(start, end), centroids)
+        print(f"\rAssigned {end:,}/{index.rows:,} embeddings...", end='', flush=True)
+    print()
+    
+    order = np.argsort(assign, kind='stable').astype(np.int32 if index.rows < 2 ** 31 else np.int64)
+    offsets = np.concatenate([[0], np.cumsum(np.bincount(assign, minlength=lists))]).astype(np.int64)
+    tmp = SEMANTIC_DIR / 'ivf.tmp.npz'
+    np.savez(tmp, centroids=centroids, offsets=offsets, order=order, rows=np.int64(index.rows))
+    os.replace(tmp, SEMANTIC_DIR / 'ivf.npz')
+    
+    _bump_data_version(conn)
+    conn.commit()
+    sizes = np.diff(offsets)
+    return {'rows': index.rows, 'lists': lists, 'mean_list_size': round(float(sizes.mean()), 1),
+            'max_list_size': int(sizes.max())}
+
+
+def semantic_status(conn: sqlite3.Connection) -> Dict:
+    """Embedding coverage of the articles table and the semantic index's size"""
+    meta = _load_semantic_meta()
+    articles = conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+    pending = conn.execute("SELECT COUNT(*) FROM articles WHERE id > ?", (meta['last_id'],)).fetchone()[0]
+    index = _semantic_index()
+    size = sum(path.stat().st_size for path in SEMANTIC_DIR.glob('*')) if SEMANTIC_DIR.exists() else 0
+    return {
+        'numpy': HAS_NUMPY,
+        'sentence_transformers': importlib.util.find_spec('sentence_transformers') is not None,
+        'model': meta['model'],
+        'articles': articles,
+        'embedded': meta['rows'],
+        'pending': pending,
+        'ivf_rows': index.indexed_rows if index else 0,
+        'ivf_lists': len(index.centroids) if index is not None and index.centroids is not None else 0,
+        'size_mb': round(size / (1024 * 1024), 2),
+    }
+
+
+def benchmark_semantic(sample: int = 200, k: int = 10, nprobe: int = SEMANTIC_NPROBE) -> Dict:
+    """
+    Recall@k and latency of the IVF search against an exact scan, using
+    embedded articles as queries (no model needed).
+    """
+    index = _semantic_index()
+    if index is None:
+        return {'error': 'No semantic index (run semantic build)'}
+    
+    rng = np.random.default_rng(1)
+    queries = rng.choice(index.rows, min(sample, index.rows), replace=False)
+    hits = 0
+    ivf_time = exact_time = 0.0
+    for row in queries:
+        query = index.dequantize(row, row + 1)[0]
+        query /= np.linalg.norm(query)
+        started = time.perf_counter()
+        approx = index.search(query, k, nprobe=nprobe)
+        ivf_time += time.perf_counter() - started
+        started = time.perf_counter()
+        exact = index.search(query, k, exact=True)
+        exact_time += time.perf_counter() - started
+        hits += len({i for i, _ in approx} & {i for i, _ in exact})
+    
+    return {
+        'rows': index.rows,
+        'ivf_rows': index.indexed_rows,
+        'nprobe': nprobe,
+        'queries': len(queries),
+        f'recall_at_{k}': round(hits / (len(queries) * k), 3),
+        'ivf_ms': round(ivf_time * 1000 / len(queries), 2),
+        'exact_ms': round(exact_time * 1000 / len(queries), 2),
+    }
+
+
+def _import_dump(dump_file: Path):
+    """Import a downloaded dump, in parallel when the multistream index is available"""
+    if INDEX_FILE.exists():
+        import_wikipedia_parallel(dump_file, INDEX_FILE)
+    else:
+        import_wikipedia(dump_file)
+
+
+_REDIRECT_RE = re.compile(r'#redirect\s*:?\s*\[\[([^\]|#]+)', re.IGNORECASE)
+
+
+def _parse_redirect(raw_text: str) -> Optional[str]:
+    """Get the target title of a redirect page (without any #section), or None"""
+    match = _REDIRECT_RE.match(raw_text.lstrip())
+    if not match:
+        return None
+    target = ' '.join(match.group(1).replace('_', ' ').split())
+    return target[:1].upper() + target[1:] if target else None
+
+
+def _page_to_row(title: str, raw_text: str) -> Optional[Tuple[str, str, str, str]]:
+    """Convert a raw wiki page to an articles row, or None for redirects"""
+    if raw_text.lower().startswith('#redirect'):
+        return None
+    
+    # Clean text
+    content = clean_wikitext(raw_text)
+    summary = extract_summary(content)
+    
+    # Extract categories
+    categories = re.findall(r'\[\[Category:([^\]|]+)', raw_text)
+    
+    return (title, content, summary, json.dumps(categories[:10]))
+
+
+def import_wikipedia(
+    dump_file: Path,
+    defer_fts: bool = False,
+    optimize: bool = True,
+    automerge: int = FTS_IMPORT_AUTOMERGE,
+    crisismerge: int = FTS_IMPORT_CRISISMERGE
+):
+    """Import Wikipedia from a dump file"""
+    print(f"Importing from: {dump_file}")
+    
+    init_database()
+    conn = get_db_connection('bulk')
+    cursor = conn.cursor()
+    _begin_bulk_load(conn)
+    configure_fts(conn, automerge, crisismerge)
+    compressor = _content_compressor(conn)
+    
+    # Parse XML with streaming
+    import xml.etree.ElementTree as ET
+    
+    article_count = 0
     batch = []
+    redirects = []
     batch_size = 1000
     
     print("Parsing Wikipedia dump (this may take hours)...")
@@ -415,32 +2769,26 @@ def import_wikipedia(dump_file: Path):
                     # Only process main namespace (articles)
                     if ns_elem is not None and ns_elem.text == '0':
                         if title_elem is not None and text_elem is not None:
-                            title = title_elem.text or ""
-                            raw_text = text_elem.text or ""
+                            row = _page_to_row(title_elem.text or "", text_elem.text or "")
                             
-                            # Skip redirects
-                            if raw_text.lower().startswith('#redirect'):
+                            # Redirects only go into the lookup table
+                            if row is None:
+                                target = _parse_redirect(text_elem.text or "")
+                                if target:
+                                    redirects.append((title_elem.text or "", target))
                                 elem.clear()
                                 continue
                             
-                            # Clean text
-                            content = clean_wikitext(raw_text)
-                            summary = extract_summary(content)
-                            
-                            # Extract categories
-                            categories = re.findall(r'\[\[Category:([^\]|]+)', raw_text)
-                            
-                            batch.append((title, content, summary, json.dumps(categories[:10])))
+                            batch.append(row)
                             article_count += 1
                             
                             if len(batch) >= batch_size:
-                                cursor.executemany("""
-                                    INSERT OR REPLACE INTO articles (title, content, summary, categories)
-                                    VALUES (?, ?, ?, ?)
-                                """, batch)
+                                _write_articles(conn, batch, index_fts=not defer_fts, compressor=compressor)
+                                _write_redirects(conn, redirects)
                                 conn.commit()
                                 print(f"\rImported {article_count:,} articles...", end='', flush=True)
                                 batch = []
+                                redirects = []
                     
                     # Clear element to free memory
                     elem.clear()
@@ -451,54 +2799,292 @@ def import_wikipedia(dump_file: Path):
         print(f"\nImport error: {e}")
     
     # Insert remaining batch
-    if batch:
-        cursor.executemany("""
-            INSERT OR REPLACE INTO articles (title, content, summary, categories)
-            VALUES (?, ?, ?, ?)
-        """, batch)
+    if batch or redirects:
+        _write_articles(conn, batch, index_fts=not defer_fts, compressor=compressor)
+        _write_redirects(conn, redirects)
         conn.commit()
     
     print(f"\nImported {article_count:,} articles total")
     
-    # Rebuild FTS index
-    print("Rebuilding full-text search index...")
-    try:
-        cursor.execute("INSERT INTO articles_fts(articles_fts) VALUES('rebuild')")
+    _finish_import(conn, optimize=optimize)
+    
+    conn.close()
+    print("Import complete!")
+
+
+def read_multistream_offsets(index_file: Path) -> List[int]:
+    """Read the sorted, unique bz2 stream offsets from a multistream index"""
+    offsets = set()
+    opener = bz2.open if str(index_file).endswith('.bz2') else open
+    with opener(index_file, 'rt', encoding='utf-8', errors='replace') as f:
+        for line in f:
+            offset, _, _ = line.partition(':')
+            if offset:
+                offsets.add(int(offset))
+    return sorted(offsets)
+
+
+def _parse_stream_block(dump_file: str, start: int, end: int) -> Tuple[int, int, List[Tuple], List[Tuple]]:
+    """
+    Worker: decompress one bz2 stream block, parse its pages and clean them.
+    
+    Blocks from a multistream dump are bare <page> elements without the
+    <mediawiki> wrapper or namespace, so they are parsed as a fragment.
+    Redirect pages are returned separately as (title, target) pairs.
+    Returns (start, end, rows, redirects).
+    """
+    import xml.etree.ElementTree as ET
+    
+    with open(dump_file, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+    
+    # The final block may also contain the closing </mediawiki> stream
+    text = bz2.decompress(data).decode('utf-8', errors='replace')
+    text = text.replace('</mediawiki>', '')
+    
+    rows = []
+    redirects = []
+    root = ET.fromstring(f"<pages>{text}</pages>")
+    for page in root.iter('page'):
+        if page.findtext('ns') != '0':
+            continue
+        title = page.findtext('title')
+        raw_text = page.findtext('revision/text')
+        if title is None or raw_text is None:
+            continue
+        row = _page_to_row(title, raw_text)
+        if row is not None:
+            rows.append(row)
+        else:
+            target = _parse_redirect(raw_text)
+            if target:
+                redirects.append((title, target))
+    
+    return start, end, rows, redirects
+
+
+def _sample_pages(dump_file: Path, sample: int) -> List[str]:
+    """Read the raw wikitext of the first `sample` articles in a dump"""
+    import xml.etree.ElementTree as ET
+    
+    pages = []
+    with bz2.open(dump_file, 'rt', encoding='utf-8', errors='replace') as f:
+        for _, elem in ET.iterparse(f, events=('end',)):
+            if elem.tag.rsplit('}', 1)[-1] != 'page':
+                continue
+            ns = next((c.text for c in elem if c.tag.endswith('ns')), None)
+            text = next((t.text for t in elem.iter() if t.tag.endswith('text')), None)
+            if ns == '0' and text and not text.lower().startswith('#redirect'):
+                pages.append(text)
+                if len(pages) >= sample:
+                    break
+            elem.clear()
+    return pages
+
+
+def benchmark_cleaner(dump_file: Path, sample: int = 1000, rounds: int = 3) -> Dict:
+    """Compare clean_wikitext against the legacy regex chain on real articles"""
+    pages = _sample_pages(dump_file, sample)
+    if not pages:
+        return {'error': 'No articles found in dump'}
+    
+    def run(cleaner):
+        best = None
+        for _ in range(rounds):
+            started = time.perf_counter()
+            outputs = [cleaner(p) for p in pages]
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        # Markup that survived cleaning
+        leaked = sum(o.count('{{') + o.count('}}') + o.count('[[') + o.count(']]') for o in outputs)
+        return best, leaked, sum(len(o) for o in outputs)
+    
+    legacy_time, legacy_leaked, legacy_chars = run(clean_wikitext_legacy)
+    new_time, new_leaked, new_chars = run(clean_wikitext)
+    
+    return {
+        'articles': len(pages),
+        'input_mb': round(sum(len(p) for p in pages) / (1024 * 1024), 2),
+        'legacy_ms_per_article': round(legacy_time * 1000 / len(pages), 3),
+        'single_pass_ms_per_article': round(new_time * 1000 / len(pages), 3),
+        'speedup': round(legacy_time / new_time, 2) if new_time > 0 else None,
+        'legacy_leaked_markup': legacy_leaked,
+        'single_pass_leaked_markup': new_leaked,
+        'legacy_output_chars': legacy_chars,
+        'single_pass_output_chars': new_chars,
+    }
+
+
+def _get_import_state(conn: sqlite3.Connection, key: str) -> Optional[str]:
+    """Read an import bookkeeping value"""
+    row = conn.execute("SELECT value FROM import_state WHERE key = ?", (key,)).fetchone()
+    return row[0] if row else None
+
+
+def _set_import_state(conn: sqlite3.Connection, key: str, value: str):
+    """Write an import bookkeeping value (caller commits)"""
+    conn.execute("INSERT OR REPLACE INTO import_state (key, value) VALUES (?, ?)", (key, value))
+
+
+def import_wikipedia_parallel(
+    dump_file: Path,
+    index_file: Path,
+    workers: int = None,
+    resume: bool = True,
+    start_offset: int = None,
+    batch_size: int = 1000,
+    defer_fts: bool = False,
+    optimize: bool = True,
+    automerge: int = FTS_IMPORT_AUTOMERGE,
+    crisismerge: int = FTS_IMPORT_CRISISMERGE,
+    available: Callable[[], int] = None
+) -> bool:
+    """
+    Import a multistream Wikipedia dump using a process pool.
+    
+    Each bz2 stream listed in the index is decompressed, parsed and cleaned
+    by a worker; this process is the single SQLite writer. Results are written
+    in offset order, so the committed offset is a safe resume point.
+    
+    Unless defer_fts is set, each committed batch is also added to the FTS
+    index, so search works on everything imported so far.
+    
+    available, if given, returns how many leading bytes of the dump are on
+    disk (RangeDownloader.available); blocks are only parsed once fully
+    downloaded, so the import can run while the dump is still downloading.
+    Returns True if every stream was imported.
+    """
+    workers = workers or os.cpu_count() or 1
+    print(f"Importing from: {dump_file}")
+    print(f"Index: {index_file}")
+    
+    init_database()
+    conn = get_db_connection('bulk')
+    _begin_bulk_load(conn)
+    configure_fts(conn, automerge, crisismerge)
+    compressor = _content_compressor(conn)
+    
+    print("Reading multistream index...")
+    offsets = read_multistream_offsets(index_file)
+    file_size = os.path.getsize(dump_file)
+    blocks = list(zip(offsets, offsets[1:] + [file_size]))
+    
+    # Resume from the last committed offset of the same dump
+    if start_offset is None and resume:
+        if _get_import_state(conn, 'parallel_dump') == str(dump_file):
+            start_offset = int(_get_import_state(conn, 'parallel_offset') or 0)
+    if start_offset:
+        blocks = [b for b in blocks if b[0] >= start_offset]
+        print(f"Resuming from offset {start_offset:,}")
+    
+    _set_import_state(conn, 'parallel_dump', str(dump_file))
+    conn.commit()
+    
+    total_blocks = len(blocks)
+    print(f"Parsing {total_blocks:,} streams with {workers} workers...")
+    
+    article_count = 0
+    blocks_done = 0
+    batch = []
+    redirects = []
+    started = time.time()
+    
+    def flush(next_offset: int):
+        _write_articles(conn, batch, index_fts=not defer_fts, compressor=compressor)
+        _write_redirects(conn, redirects)
+        _set_import_state(conn, 'parallel_offset', str(next_offset))
         conn.commit()
-    except:
-        pass
+        batch.clear()
+        redirects.clear()
+    
+    # Keep a bounded number of blocks in flight so memory stays flat
+    # even when the writer falls behind the workers
+    max_inflight = workers * 4
+    completed = False
+    block_iter = iter(blocks)
+    waiting = next(block_iter, None)
+    
+    # Downloader threads are running while streaming; don't fork() under them
+    context = multiprocessing.get_context('forkserver' if available else None)
+    pool = context.Pool(workers)
+    
+    try:
+        pending = deque()
+        
+        def submit_ready():
+            """Top up the in-flight blocks with ones that are on disk"""
+            nonlocal waiting
+            while waiting is not None and len(pending) < max_inflight:
+                if available is not None and available() < waiting[1]:
+                    return
+                pending.append(pool.apply_async(_parse_stream_block, (str(dump_file), *waiting)))
+                waiting = next(block_iter, None)
+        
+        submit_ready()
+        while pending or waiting is not None:
+            if not pending:
+                # Parsing caught up with the download
+                time.sleep(0.5)
+                submit_ready()
+                continue
+            
+            _, end, rows, block_redirects = pending.popleft().get()
+            submit_ready()
+            
+            batch.extend(rows)
+            redirects.extend(block_redirects)
+            article_count += len(rows)
+            blocks_done += 1
+            
+            if len(batch) >= batch_size:
+                flush(end)
+                elapsed = time.time() - started
+                rate = article_count / elapsed if elapsed > 0 else 0
+                eta = (total_blocks - blocks_done) * (elapsed / blocks_done) / 60
+                downloaded = f", {available() / file_size:.0%} downloaded" if available else ""
+                print(f"\rImported {article_count:,} articles "
+                      f"({blocks_done:,}/{total_blocks:,} streams, {rate:.0f}/s, ETA {eta:.0f} min{downloaded})...",
+                      end='', flush=True)
+        
+        if batch or blocks_done:
+            flush(file_size)
+        pool.close()
+        completed = True
+    
+    except KeyboardInterrupt:
+        print("\nImport interrupted (resume with: knowledge_base.py import --workers N)")
+        pool.terminate()
+    except Exception as e:
+        print(f"\nImport error: {e}")
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+        if not completed:
+            # Lookups need the title indexes meanwhile; FTS catch-up and
+            # optimizing are left to the run that completes
+            try:
+                _end_bulk_load(conn)
+            finally:
+                conn.close()
+    
+    print(f"\nImported {article_count:,} articles total")
+    if not completed:
+        return False
+    
+    _finish_import(conn, optimize=optimize)
     
     conn.close()
     print("Import complete!")
+    return completed
 
 
 def fetch_wikidata_entities(entity_types: List[str] = None):
     """Fetch entities from Wikidata API for specific types"""
     
-    # Entity type to Wikidata class mapping
-    TYPE_MAPPING = {
-        'people': ('Q5', 20000),        # human
-        'countries': ('Q6256', 300),    # country
-        'cities': ('Q515', 10000),      # city
-        'companies': ('Q4830453', 5000), # business enterprise
-        'films': ('Q11424', 10000),     # film
-        'tv_series': ('Q5398426', 5000), # television series
-        'video_games': ('Q7889', 5000), # video game
-        'albums': ('Q482994', 5000),    # album
-        'books': ('Q571', 10000),       # book
-        'diseases': ('Q12136', 2000),   # disease
-        'species': ('Q16521', 10000),   # taxon
-        'mountains': ('Q8502', 2000),   # mountain
-        'lakes': ('Q23397', 1000),      # lake
-        'rivers': ('Q4022', 2000),      # river
-        'schools': ('Q3914', 5000),     # school
-        'universities': ('Q3918', 3000), # university
-        'websites': ('Q35127', 2000),   # website
-        'events': ('Q1656682', 5000),   # event
-    }
-    
     if entity_types is None:
-        entity_types = list(TYPE_MAPPING.keys())
+        entity_types = list(WIKIDATA_TYPES.keys())
     
     init_database()
     conn = get_db_connection()
@@ -510,11 +3096,11 @@ def fetch_wikidata_entities(entity_types: List[str] = None):
     WIKIDATA_API = "https://query.wikidata.org/sparql"
     
     for entity_type in entity_types:
-        if entity_type not in TYPE_MAPPING:
+        if entity_type not in WIKIDATA_TYPES:
             print(f"Unknown entity type: {entity_type}")
             continue
         
-        wikidata_class, max_items = TYPE_MAPPING[entity_type]
+        wikidata_class, max_items = WIKIDATA_TYPES[entity_type]
         
         print(f"  Fetching {entity_type} (up to {max_items})...", end=' ', flush=True)
         
@@ -544,7 +3130,7 @@ def fetch_wikidata_entities(entity_types: List[str] = None):
                 data = json.loads(response.read().decode('utf-8'))
             
             results = data.get('results', {}).get('bindings', [])
-            added = 0
+            rows = []
             
             for item in results:
                 entity_id = item.get('item', {}).get('value', '').split('/')[-1]
@@ -558,17 +3144,11 @@ def fetch_wikidata_entities(entity_types: List[str] = None):
                     wikipedia_title = urllib.parse.unquote(wikipedia_url.split('/wiki/')[-1]).replace('_', ' ')
                 
                 if entity_id and label:
-                    try:
-                        cursor.execute("""
-                            INSERT OR REPLACE INTO entities (id, label, description, wikipedia_title, instance_of)
-                            VALUES (?, ?, ?, ?, ?)
-                        """, (entity_id, label, description, wikipedia_title, entity_type))
-                        added += 1
-                    except Exception as e:
-                        pass
+                    rows.append((entity_id, label, description, None, wikipedia_title, None, entity_type, None))
             
+            _write_entities(conn, rows)
             conn.commit()
-            print(f"{added} added")
+            print(f"{len(rows)} added")
             
         except urllib.error.HTTPError as e:
             print(f"error: HTTP Error {e.code}: {e.reason}")
@@ -582,23 +3162,405 @@ def fetch_wikidata_entities(entity_types: List[str] = None):
     print("Done!")
 
 
+def _entity_alias_rows(entity_id: str, label: Optional[str], aliases_json: Optional[str]) -> List[Tuple]:
+    """entity_aliases rows for one entity: its label and each alias, normalized"""
+    rows = {}
+    for alias in json.loads(aliases_json) if aliases_json else []:
+        norm = normalize_title(alias)
+        if norm:
+            rows[norm] = (norm, entity_id, 0)
+    if label and normalize_title(label):
+        norm = normalize_title(label)
+        rows[norm] = (norm, entity_id, 1)
+    return list(rows.values())
+
+
+def _write_entities(conn: sqlite3.Connection, rows: List[Tuple]):
+    """
+    Insert or replace entity rows (id, label, description, aliases,
+    wikipedia_title, properties, instance_of, sitelinks), keeping
+    entity_aliases and entities_fts in step. Caller commits.
+    """
+    ids = [row[0] for row in rows]
+    placeholders = ','.join('?' * len(ids))
+    
+    # Replaced rows get a new rowid, so drop their old index entries first
+    stale = conn.execute(f"""
+        SELECT rowid, label, aliases, description FROM entities WHERE id IN ({placeholders})
+    """, ids).fetchall()
+    conn.executemany("""
+        INSERT INTO entities_fts(entities_fts, rowid, label, aliases, description)
+        VALUES('delete', ?, ?, ?, ?)
+    """, [tuple(row) for row in stale])
+    if stale:
+        conn.executemany("DELETE FROM entity_aliases WHERE entity_id = ?", [(row[0],) for row in rows])
+    
+    conn.executemany("""
+        INSERT OR REPLACE INTO entities
+            (id, label, description, aliases, wikipedia_title, properties, instance_of, sitelinks)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    """, rows)
+    conn.execute(f"""
+        INSERT INTO entities_fts(rowid, label, aliases, description)
+        SELECT rowid, label, aliases, description FROM entities WHERE id IN ({placeholders})
+    """, ids)
+    conn.executemany("""
+        INSERT OR REPLACE INTO entity_aliases (alias_norm, entity_id, is_label) VALUES (?, ?, ?)
+    """, [alias for row in rows for alias in _entity_alias_rows(row[0], row[1], row[3])])
+
+
+def index_entities(conn: sqlite3.Connection, chunk_size: int = 50000) -> int:
+    """Rebuild entity_aliases and entities_fts from the entities table"""
+    print("Rebuilding entity search index...")
+    conn.execute("DELETE FROM entity_aliases")
+    indexed = 0
+    after = None
+    while True:
+        rows = conn.execute("""
+            SELECT id, label, aliases FROM entities WHERE id > ? ORDER BY id LIMIT ?
+        """, (after or '', chunk_size)).fetchall()
+        if not rows:
+            break
+        conn.executemany("""
+            INSERT OR REPLACE INTO entity_aliases (alias_norm, entity_id, is_label) VALUES (?, ?, ?)
+        """, [alias for row in rows for alias in _entity_alias_rows(row[0], row[1], row[2])])
+        after = rows[-1][0]
+        indexed += len(rows)
+        print(f"\rIndexed aliases of {indexed:,} entities...", end='', flush=True)
+    print()
+    conn.execute("INSERT INTO entities_fts(entities_fts) VALUES('rebuild')")
+    conn.commit()
+    return indexed
+
+
+def _open_wikidata_dump(dump_file: Path):
+    """
+    Open a Wikidata JSON dump as text lines.
+    
+    .bz2 decompression is the bottleneck of the whole load, so a parallel
+    decompressor (lbzip2/pbzip2) is used when installed.
+    """
+    name = str(dump_file)
+    if name.endswith('.bz2'):
+        tool = shutil.which('lbzip2') or shutil.which('pbzip2')
+        if tool:
+            proc = subprocess.Popen([tool, '-dc', name], stdout=subprocess.PIPE, bufsize=1024 * 1024)
+            return io.TextIOWrapper(proc.stdout, encoding='utf-8', errors='replace')
+        return bz2.open(name, 'rt', encoding='utf-8', errors='replace')
+    if name.endswith('.gz'):
+        return gzip.open(name, 'rt', encoding='utf-8', errors='replace')
+    return open(name, 'r', encoding='utf-8', errors='replace')
+
+
+# Set in each worker by _init_wikidata_worker
+_wikidata_filter: Dict[str, Any] = {}
+
+
+def _init_wikidata_worker(classes: Dict[str, str], require_wikipedia: bool):
+    """Pool initializer: class filter shared by all chunks"""
+    _wikidata_filter['classes'] = classes
+    _wikidata_filter['require_wikipedia'] = require_wikipedia
+    # Cheap substring check that rejects most lines without parsing them
+    _wikidata_filter['prefilter'] = (
+        re.compile('|'.join(f'"{qid}"' for qid in classes)) if classes else None
+    )
+
+
+def _claim_value(snak: Dict) -> Any:
+    """Plain value of a Wikidata main snak (entity id, string, time, coordinates, amount)"""
+    value = snak.get('datavalue', {}).get('value')
+    if isinstance(value, dict):
+        if 'id' in value:
+            return value['id']
+        if 'time' in value:
+            return value['time']
+        if 'latitude' in value:
+            return [value['latitude'], value['longitude']]
+        if 'amount' in value:
+            return value['amount']
+        if 'text' in value:
+            return value['text']
+    return value
+
+
+def _parse_wikidata_chunk(lines: List[str]) -> Tuple[int, List[Tuple]]:
+    """
+    Worker: parse dump lines and keep items in the configured classes.
+    Returns (lines seen, entity rows).
+    """
+    classes = _wikidata_filter['classes']
+    prefilter = _wikidata_filter['prefilter']
+    require_wikipedia = _wikidata_filter['require_wikipedia']
+    
+    rows = []
+    for line in lines:
+        if prefilter is not None and not prefilter.search(line):
+            continue
+        line = line.rstrip().rstrip(',')
+        if not line.startswith('{'):
+            continue
+        try:
+            item = json.loads(line)
+        except ValueError:
+            continue
+        if item.get('type') != 'item':
+            continue
+        
+        claims = item.get('claims', {})
+        instance_of = [_claim_value(c.get('mainsnak', {})) for c in claims.get('P31', [])]
+        types = [classes[qid] for qid in instance_of if qid in classes]
+        if classes and not types:
+            continue
+        
+        sitelinks = {site: link['title'] for site, link in item.get('sitelinks', {}).items()
+                     if site in WIKIDATA_SITES}
+        wikipedia_title = sitelinks.get('enwiki')
+        if require_wikipedia and not wikipedia_title:
+            continue
+        
+        labels = item.get('labels', {})
+        label = (labels.get('en') or labels.get('mul') or {}).get('value')
+        if not label:
+            continue
+        description = (item.get('descriptions', {}).get('en') or {}).get('value')
+        aliases = [a['value'] for lang in ('en', 'mul') for a in item.get('aliases', {}).get(lang, [])]
+        
+        properties = {}
+        for pid, name in WIKIDATA_PROPERTIES.items():
+            values = [_claim_value(c.get('mainsnak', {})) for c in claims.get(pid, [])]
+            values = [v for v in values if v is not None]
+            if values:
+                properties[name] = values
+        
+        rows.append((
+            item['id'], label, description,
+            json.dumps(aliases) if aliases else None,
+            wikipedia_title,
+            json.dumps(properties),
+            ','.join(dict.fromkeys(types)) or None,
+            json.dumps(sitelinks) if sitelinks else None,
+        ))
+    return len(lines), rows
+
+
+def import_wikidata_dump(
+    dump_file: Path,
+    entity_types: List[str] = None,
+    workers: int = None,
+    require_wikipedia: bool = False,
+    chunk_lines: int = 2000,
+    batch_size: int = 5000
+) -> bool:
+    """
+    Load entities from a Wikidata JSON dump (latest-all.json[.bz2|.gz]).
+    
+    The dump is read as lines by this process and parsed/filtered in
+    chunks by a process pool; matching items (P31 in one of the selected
+    classes) are batch-inserted with aliases, sitelinks and a few common
+    claims. entity_types are WIKIDATA_TYPES names or raw class ids
+    (Q...); an empty list keeps every item.
+    Returns True if the whole dump was imported.
+    """
+    workers = workers or os.cpu_count() or 1
+    if entity_types is None:
+        entity_types = list(WIKIDATA_TYPES.keys())
+    
+    classes = {}
+    for entity_type in entity_types:
+        if entity_type in WIKIDATA_TYPES:
+            classes[WIKIDATA_TYPES[entity_type][0]] = entity_type
+        elif re.fullmatch(r'Q\d+', entity_type):
+            classes[entity_type] = entity_type
+        else:
+            print(f"Unknown entity type: {entity_type}")
+    if entity_types and not classes:
+        return False
+    
+    print(f"Importing entities from: {dump_file}")
+    print(f"Classes: {', '.join(f'{name} ({qid})' for qid, name in classes.items()) or 'all'}")
+    
+    init_database()
+    conn = get_db_connection('bulk')
+    _begin_bulk_load(conn, ENTITY_INDEXES)
+    
+    lines_seen = 0
+    entity_count = 0
+    batch = []
+    started = time.time()
+    
+    def flush():
+        _write_entities(conn, batch)
+        conn.commit()
+        batch.clear()
+    
+    def chunks(f):
+        chunk = []
+        for line in f:
+            chunk.append(line)
+            if len(chunk) >= chunk_lines:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+    
+    # Same bounded in-flight scheme as import_wikipedia_parallel
+    max_inflight = workers * 4
+    completed = False
+    pool = multiprocessing.Pool(workers, initializer=_init_wikidata_worker,
+                                initargs=(classes, require_wikipedia))
+    
+    try:
+        with _open_wikidata_dump(dump_file) as f:
+            chunk_iter = chunks(f)
+            pending = deque()
+            for chunk in chunk_iter:
+                pending.append(pool.apply_async(_parse_wikidata_chunk, (chunk,)))
+                if len(pending) >= max_inflight:
+                    break
+            
+            while pending:
+                seen, rows = pending.popleft().get()
+                
+                nxt = next(chunk_iter, None)
+                if nxt is not None:
+                    pending.append(pool.apply_async(_parse_wikidata_chunk, (nxt,)))
+                
+                lines_seen += seen
+                entity_count += len(rows)
+                batch.extend(rows)
+                if len(batch) >= batch_size:
+                    flush()
+                    rate = lines_seen / max(time.time() - started, 1e-6)
+                    print(f"\rScanned {lines_seen:,} items, kept {entity_count:,} ({rate:.0f} items/s)...",
+                          end='', flush=True)
+        
+        if batch:
+            flush()
+        pool.close()
+        completed = True
+    
+    except KeyboardInterrupt:
+        print("\nEntity import interrupted (re-running is safe: rows are replaced)")
+        pool.terminate()
+    except Exception as e:
+        print(f"\nEntity import error: {e}")
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+        try:
+            _end_bulk_load(conn, ENTITY_INDEXES)
+        finally:
+            conn.close()
+    
+    print(f"\nScanned {lines_seen:,} items, imported {entity_count:,} entities")
+    if completed:
+        print("Entity import complete!")
+    return completed
+
+
 def main():
     parser = argparse.ArgumentParser(description="Jarvis Knowledge Base")
     subparsers = parser.add_subparsers(dest="command", help="Command")
     
     # Download command
-    subparsers.add_parser("download", help="Download Wikipedia dump")
+    download_parser = subparsers.add_parser("download", help="Download (and import) the Wikipedia dump")
+    download_parser.add_argument("--url", default=WIKI_URL, help="Dump URL")
+    download_parser.add_argument("--index-url", default=WIKI_INDEX_URL, help="Multistream index URL")
+    download_parser.add_argument("--sha1-url", default=WIKI_SHA1_URL, help="Published sha1sums listing")
+    download_parser.add_argument("--md5-url", default=WIKI_MD5_URL, help="Published md5sums listing")
+    download_parser.add_argument("--connections", "-c", type=int, default=DOWNLOAD_CONNECTIONS, help="Parallel range requests")
+    download_parser.add_argument("--workers", "-w", type=int, default=None, help="Import worker processes")
+    download_parser.add_argument("--no-verify", action="store_true", help="Skip checksum verification")
+    download_parser.add_argument("--no-stream", action="store_true", help="Finish the download before importing")
     
     # Fetch entities command
     fetch_parser = subparsers.add_parser("fetch-entities", help="Fetch Wikidata entities")
     fetch_parser.add_argument("types", nargs="*", help="Entity types to fetch (e.g., people companies books)")
     
+    # Offline Wikidata dump import
+    wikidata_parser = subparsers.add_parser("import-wikidata", help="Import entities from a Wikidata JSON dump")
+    wikidata_parser.add_argument("types", nargs="*", help="Entity types or class ids (default: all known types)")
+    wikidata_parser.add_argument("--dump", default=str(WIKIDATA_DUMP_FILE), help=f"Dump file ({WIKIDATA_DUMP_URL})")
+    wikidata_parser.add_argument("--workers", "-w", type=int, default=None, help="Parser processes (default: all cores)")
+    wikidata_parser.add_argument("--all", action="store_true", help="Keep every item, not just the selected classes")
+    wikidata_parser.add_argument("--require-wikipedia", action="store_true", help="Only entities with an English Wikipedia article")
+    
+    # Import command
+    import_parser = subparsers.add_parser("import", help="Import a downloaded Wikipedia dump")
+    import_parser.add_argument("--dump", default=str(DUMP_FILE), help="Multistream .xml.bz2 dump file")
+    import_parser.add_argument("--index", default=str(INDEX_FILE), help="Multistream index file")
+    import_parser.add_argument("--workers", "-w", type=int, default=None, help="Parser processes (default: all cores)")
+    import_parser.add_argument("--start-offset", type=int, default=None, help="Start at this byte offset")
+    import_parser.add_argument("--no-resume", action="store_true", help="Ignore the saved resume offset")
+    import_parser.add_argument("--serial", action="store_true", help="Single-process import (no index needed)")
+    import_parser.add_argument("--defer-fts", action="store_true", help="Build the search index after the import instead of per batch")
+    import_parser.add_argument("--no-optimize", action="store_true", help="Skip the final FTS optimize (saves temp space)")
+    import_parser.add_argument("--automerge", type=int, default=FTS_IMPORT_AUTOMERGE, help="FTS5 automerge during import")
+    import_parser.add_argument("--crisismerge", type=int, default=FTS_IMPORT_CRISISMERGE, help="FTS5 crisismerge during import")
+    
+    # Full-text index command
+    fts_parser = subparsers.add_parser("fts", help="Check, resume or rebuild the full-text search index")
+    fts_parser.add_argument("action", choices=["status", "resume", "rebuild", "optimize", "merge"])
+    fts_parser.add_argument("--chunk", type=int, default=FTS_CHUNK_SIZE, help="Articles per committed chunk")
+    fts_parser.add_argument("--pages", type=int, default=500, help="Pages of work for 'merge'")
+    fts_parser.add_argument("--check", action="store_true", help="Run the FTS5 integrity check with 'status'")
+    fts_parser.add_argument("--json", action="store_true")
+    
+    # Entity search index command
+    subparsers.add_parser("index-entities", help="Rebuild the entity alias/full-text index (older databases)")
+    
+    # Entity search command
+    entities_parser = subparsers.add_parser("entities", help="Search Wikidata entities")
+    entities_parser.add_argument("query", help="Name or alias")
+    entities_parser.add_argument("--limit", "-l", type=int, default=10)
+    entities_parser.add_argument("--json", action="store_true")
+    
+    # Title lookup index command
+    subparsers.add_parser("index-titles", help="Fill the normalized title index on databases from older imports")
+    
+    # Content storage command
+    storage_parser = subparsers.add_parser("storage", help="Compress article content or report storage use")
+    storage_parser.add_argument("action", choices=["status", "compress", "decompress", "vacuum", "bench"])
+    storage_parser.add_argument("--dict-size", type=int, default=ZSTD_DICT_SIZE, help="Trained dictionary bytes (0 = none)")
+    storage_parser.add_argument("--samples", type=int, default=ZSTD_TRAIN_SAMPLES, help="Articles to train the dictionary on")
+    storage_parser.add_argument("--sample", "-n", type=int, default=500, help="Articles for 'bench'")
+    storage_parser.add_argument("--json", action="store_true")
+    
+    # Semantic index command
+    semantic_parser = subparsers.add_parser("semantic", help="Build or check the semantic (embedding) search index")
+    semantic_parser.add_argument("action", choices=["status", "build", "index", "bench"])
+    semantic_parser.add_argument("--batch-size", type=int, default=EMBEDDING_BATCH_SIZE, help="Articles per committed batch")
+    semantic_parser.add_argument("--limit", type=int, default=None, help="Embed at most this many articles")
+    semantic_parser.add_argument("--restart", action="store_true", help="Discard existing embeddings first")
+    semantic_parser.add_argument("--lists", type=int, default=None, help="k-means lists for 'index' (default sqrt(rows))")
+    semantic_parser.add_argument("--nprobe", type=int, default=SEMANTIC_NPROBE, help="Lists searched per query for 'bench'")
+    semantic_parser.add_argument("--sample", "-n", type=int, default=200, help="Queries for 'bench'")
+    semantic_parser.add_argument("--json", action="store_true")
+    
+    # Cleaner benchmark command
+    bench_parser = subparsers.add_parser("bench-clean", help="Benchmark the wikitext cleaner against the legacy regex chain")
+    bench_parser.add_argument("--dump", default=str(DUMP_FILE), help="Dump file to sample articles from")
+    bench_parser.add_argument("--sample", "-n", type=int, default=1000, help="Number of articles")
+    bench_parser.add_argument("--json", action="store_true")
+    
     # Search command
     search_parser = subparsers.add_parser("search", help="Search articles")
     search_parser.add_argument("query", help="Search query")
     search_parser.add_argument("--limit", "-l", type=int, default=5)
+    search_parser.add_argument("--mode", choices=SEARCH_MODES, default="keyword",
+                               help="keyword (bm25), semantic (embeddings) or hybrid (both)")
     search_parser.add_argument("--json", action="store_true")
     
+    # Passage search command
+    passages_parser = subparsers.add_parser("passages", help="Best-matching passages within a token budget")
+    passages_parser.add_argument("query", help="Search query or question")
+    passages_parser.add_argument("--limit", "-l", type=int, default=3)
+    passages_parser.add_argument("--budget", "-b", type=int, default=PASSAGE_TOKEN_BUDGET, help="Approximate LLM tokens")
+    passages_parser.add_argument("--mode", choices=SEARCH_MODES, default="keyword")
+    passages_parser.add_argument("--highlight", action="store_true", help="Mark matched words with **")
+    passages_parser.add_argument("--json", action="store_true")
+    
     # Article command
     article_parser = subparsers.add_parser("article", help="Get article by title")
     article_parser.add_argument("title", help="Article title")
@@ -615,7 +3577,15 @@ def main():
     entity_parser.add_argument("--json", action="store_true")
     
     # Stats command
-    subparsers.add_parser("stats", help="Show knowledge base statistics")
+    stats_parser = subparsers.add_parser("stats", help="Show knowledge base statistics")
+    stats_parser.add_argument("--json", action="store_true")
+    
+    # Serve command
+    serve_parser = subparsers.add_parser("serve", help="Run the query daemon (JSON lines over TCP or a Unix socket)")
+    serve_parser.add_argument("--host", default=SERVER_HOST)
+    serve_parser.add_argument("--port", type=int, default=SERVER_PORT)
+    serve_parser.add_argument("--socket", default=None, help="Listen on this Unix socket path instead of TCP")
+    serve_parser.add_argument("--pool-size", type=int, default=4, help="Number of pooled database connections")
     
     # Init command
     subparsers.add_parser("init", help="Initialize database")
@@ -623,10 +3593,64 @@ def main():
     args = parser.parse_args()
     
     if args.command == "download":
-        download_wikipedia()
+        download_wikipedia(
+            args.url, args.index_url,
+            connections=args.connections,
+            verify=not args.no_verify,
+            stream=not args.no_stream,
+            sha1_url=args.sha1_url,
+            md5_url=args.md5_url,
+            workers=args.workers
+        )
+    
+    elif args.command == "import":
+        fts_options = {
+            'defer_fts': args.defer_fts,
+            'optimize': not args.no_optimize,
+            'automerge': args.automerge,
+            'crisismerge': args.crisismerge,
+        }
+        if args.serial or not Path(args.index).exists():
+            import_wikipedia(Path(args.dump), **fts_options)
+        elif not import_wikipedia_parallel(
+                Path(args.dump), Path(args.index),
+                workers=args.workers,
+                resume=not args.no_resume,
+                start_offset=args.start_offset,
+                **fts_options
+        ):
+            sys.exit(1)
+    
+    elif args.command == "fts":
+        init_database()
+        conn = get_db_connection()
+        if args.action == "status":
+            status = fts_status(conn, check=args.check)
+            if args.json:
+                print(json.dumps(status, indent=2))
+            else:
+                for k, v in status.items():
+                    print(f"{k}: {v:,}" if isinstance(v, int) else f"{k}: {v}")
+        elif args.action == "resume":
+            print(f"Indexed {build_fts_index(conn, args.chunk):,} articles")
+        elif args.action == "rebuild":
+            print(f"Indexed {rebuild_fts_index(conn, args.chunk):,} articles")
+        elif args.action == "optimize":
+            optimize_fts_index(conn)
+        elif args.action == "merge":
+            merge_fts_index(conn, args.pages)
+        conn.close()
+    
+    elif args.command == "bench-clean":
+        result = benchmark_cleaner(Path(args.dump), sample=args.sample)
+        if args.json:
+            print(json.dumps(result, indent=2))
+        else:
+            for k, v in result.items():
+                print(f"{k}: {v}")
     
     elif args.command == "search":
-        results = search_articles(args.query, limit=args.limit)
+        results = search_articles(args.query, limit=args.limit, mode=args.mode)
         if args.json:
             print(json.dumps(results, indent=2))
         else:
@@ -634,8 +3658,81 @@ def main():
                 print(f"\n== {r['title']} ==")
                 print(r.get('summary', '')[:200])
     
+    elif args.command == "passages":
+        results = search_passages(args.query, limit=args.limit, token_budget=args.budget,
+                                  mode=args.mode, highlight=args.highlight)
+        if args.json:
+            print(json.dumps(results, indent=2))
+        else:
+            for r in results:
+                heading = f"{r['title']} - {r['section']}" if r['section'] else r['title']
+                print(f"\n== {heading} ==")
+                print(r['passage'])
+    
+    elif args.command == "semantic":
+        init_database()
+        conn = get_db_connection()
+        result = None
+        if args.action == "build":
+            print(f"Embedded {build_embeddings(conn, args.batch_size, args.limit, args.restart):,} articles")
+        elif args.action == "index":
+            result = build_semantic_index(conn, lists=args.lists)
+        elif args.action == "bench":
+            result = benchmark_semantic(args.sample, nprobe=args.nprobe)
+        if args.action == "status":
+            result = semantic_status(conn)
+        if result is not None:
+            if args.json:
+                print(json.dumps(result, indent=2))
+            else:
+                for k, v in result.items():
+                    print(f"{k}: {v}")
+        conn.close()
+    
+    elif args.command == "storage":
+        init_database()
+        conn = get_db_connection()
+        if args.action == "compress":
+            print(f"Compressed {compress_articles(conn, args.dict_size, args.samples):,} articles")
+        elif args.action == "decompress":
+            print(f"Decompressed {decompress_articles(conn):,} articles")
+        elif args.action == "vacuum":
+            print("Vacuuming (needs free space about the size of the database)...")
+            conn.execute("VACUUM")
+            # VACUUM may renumber entities' implicit rowids, which entities_fts refers to
+            conn.execute("INSERT INTO entities_fts(entities_fts) VALUES('rebuild')")
+            conn.commit()
+        if args.action in ("status", "bench", "vacuum"):
+            result = benchmark_storage(conn, args.sample) if args.action == "bench" else storage_status(conn)
+            if args.json:
+                print(json.dumps(result, indent=2))
+            else:
+                for k, v in result.items():
+                    print(f"{k}: {v}")
+        conn.close()
+    
+    elif args.command == "index-entities":
+        init_database()
+        conn = get_db_connection()
+        print(f"Indexed {index_entities(conn):,} entities")
+        conn.close()
+    
+    elif args.command == "entities":
+        results = search_entities(args.query, args.limit)
+        if args.json:
+            print(json.dumps(results, indent=2))
+        else:
+            for r in results:
+                print(f"{r['id']}: {r['label']} - {r['description'] or ''}")
+    
+    elif args.command == "index-titles":
+        init_database()
+        conn = get_db_connection()
+        print(f"Normalized {index_titles(conn):,} titles")
+        conn.close()
+    
     elif args.command == "article":
-        article = get_article(args.title)
+        article = get_article(args.title, full_text=args.json)
         if article:
             if args.json:
                 print(json.dumps(article, indent=2))
@@ -658,17 +3755,36 @@ def main():
         else:
             print(f"Entity not found: {args.entity_id}")
     
+    elif args.command == "serve":
+        serve(args.host, args.port, socket_path=args.socket, pool_size=args.pool_size)
+    
+    elif args.command == "stats" and args.json:
+        print(json.dumps(get_stats(), indent=2))
+    
     elif args.command == "stats":
         stats = get_stats()
         print(f"Articles: {stats['articles']:,}")
         print(f"Entities: {stats['entities']:,}")
+        print(f"Redirects: {stats['redirects']:,}")
         print(f"Database: {stats['database_size_mb']} MB")
         print(f"Path: {stats['database_path']}")
+        cache = stats['cache']
+        print(f"Query cache: {cache['entries']} entries, {cache['hits']} hits, "
+              f"{cache['disk_hits']} disk hits, {cache['misses']} misses")
     
     elif args.command == "init":
         init_database()
         print("Database initialized")
     
+    elif args.command == "import-wikidata":
+        if not import_wikidata_dump(
+                Path(args.dump),
+                entity_types=[] if args.all else (args.types or None),
+                workers=args.workers,
+                require_wikipedia=args.require_wikipedia
+        ):
+            sys.exit(1)
+    
     elif args.command == "fetch-entities":
         types = args.types if args.types else None
         if types:
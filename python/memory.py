@@ -15,59 +15,85 @@ Usage:
 
 import os
 import sys
+import threading
 
-# Try PostgreSQL backend first
-_USE_POSTGRES = False
-_backend = None
+# Names re-exported from whichever backend is selected
+_EXPORTS = ('JarvisMemory', 'Episode', 'EdgeType', 'Mission')
 
-try:
-    # Check if PostgreSQL is available
-    import psycopg2
-    
-    # Try to connect
-    conn = psycopg2.connect(
-        host=os.environ.get("JARVIS_DB_HOST", "localhost"),
-        port=os.environ.get("JARVIS_DB_PORT", "5432"),
-        database=os.environ.get("JARVIS_DB_NAME", "jarvis_memory"),
-        user=os.environ.get("JARVIS_DB_USER", "jarvis"),
-        password=os.environ.get("JARVIS_DB_PASSWORD", "jarvis_memory_2024"),
-        connect_timeout=2
-    )
-    conn.close()
-    
-    # PostgreSQL available, use it
-    from jarvis_memory_pg import JarvisMemoryPG as JarvisMemory, Episode, EdgeType, Mission
-    _USE_POSTGRES = True
-    _backend = "postgresql"
-    print("[Memory] Using PostgreSQL + pgvector backend", file=sys.stderr)
-    
-except Exception as e:
-    # Fall back to JSON/NetworkX
-    from jarvis_memory import JarvisMemory, Episode, EdgeType, Mission
-    _backend = "json"
-    print(f"[Memory] Using JSON/NetworkX backend (PostgreSQL unavailable: {e})", file=sys.stderr)
+# Optional override: "postgresql" or "json" skips the probe
+BACKEND_OVERRIDE = os.environ.get("JARVIS_MEMORY_BACKEND", "").lower()
 
+_lock = threading.RLock()
+_backend = None
+_exports = None
 
 # Singleton instance
 _memory_instance = None
 
 
-def get_memory() -> JarvisMemory:
-    """Get the singleton memory instance"""
+def _select_backend() -> dict:
+    """
+    Pick the backend the first time it is needed and cache the choice.
+    
+    PostgreSQL is probed by opening the memory instance itself, which is
+    kept, so the probe costs no extra connection; the JSON backend is only
+    loaded when the instance is first requested.
+    """
+    global _backend, _exports, _memory_instance
+    with _lock:
+        if _exports is not None:
+            return _exports
+        
+        reason = "disabled by JARVIS_MEMORY_BACKEND"
+        if BACKEND_OVERRIDE != "json":
+            try:
+                from jarvis_memory_pg import JarvisMemoryPG, Episode, EdgeType, Mission
+                _memory_instance = JarvisMemoryPG()
+                _exports = {'JarvisMemory': JarvisMemoryPG, 'Episode': Episode,
+                            'EdgeType': EdgeType, 'Mission': Mission}
+                _backend = "postgresql"
+                print("[Memory] Using PostgreSQL + pgvector backend", file=sys.stderr)
+                return _exports
+            except Exception as e:
+                if BACKEND_OVERRIDE == "postgresql":
+                    raise
+                reason = f"PostgreSQL unavailable: {e}"
+        
+        # Fall back to JSON/NetworkX
+        from jarvis_memory import JarvisMemory, Episode, EdgeType, Mission
+        _exports = {'JarvisMemory': JarvisMemory, 'Episode': Episode,
+                    'EdgeType': EdgeType, 'Mission': Mission}
+        _backend = "json"
+        print(f"[Memory] Using JSON/NetworkX backend ({reason})", file=sys.stderr)
+        return _exports
+
+
+def __getattr__(name):
+    # Backend classes are resolved on first use rather than at import
+    if name in _EXPORTS:
+        return _select_backend()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def get_memory() -> 'JarvisMemory':
+    """Get the singleton memory instance, safe to share between threads"""
     global _memory_instance
-    if _memory_instance is None:
-        _memory_instance = JarvisMemory()
-    return _memory_instance
+    exports = _select_backend()
+    with _lock:
+        if _memory_instance is None:
+            _memory_instance = exports['JarvisMemory']()
+        return _memory_instance
 
 
 def get_backend() -> str:
     """Get the current backend type"""
+    _select_backend()
     return _backend
 
 
 def is_postgres() -> bool:
     """Check if using PostgreSQL backend"""
-    return _USE_POSTGRES
+    return get_backend() == "postgresql"
 
 
 # Re-export common classes
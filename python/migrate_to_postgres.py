@@ -5,28 +5,162 @@ Migrate Jarvis Memory from JSON/NetworkX to PostgreSQL + pgvector
 This script migrates existing memory data from the JSON-based storage
 to the PostgreSQL database with vector embeddings.
 
+Rows are written in bulk, one multi-row statement per batch. Progress is
+checkpointed after every committed batch, so an interrupted run resumes
+where it stopped. Secondary indexes of the bulk-loaded tables are built
+once after loading rather than maintained row by row.
+
 Usage:
-    python3 migrate_to_postgres.py [--dry-run] [--embeddings]
+    python3 migrate_to_postgres.py [--dry-run] [--no-embeddings] [--restart]
 """
 
 import os
+import re
 import sys
 import json
+import time
 import argparse
 from datetime import datetime
 from pathlib import Path
 
 # Paths
 DATA_DIR = Path(os.path.expanduser("~/optidex/data/memory"))
-GRAPH_FILE = DATA_DIR / "knowledge_graph.json"
+GRAPH_FILE = DATA_DIR / "knowledge_graph.snap"
+GRAPH_LOG_FILE = DATA_DIR / "knowledge_graph.log"
+LEGACY_GRAPH_FILE = DATA_DIR / "knowledge_graph.json"
 EPISODES_DIR = DATA_DIR / "episodes"
+EPISODE_INDEX_FILE = DATA_DIR / "episode_index.db"
 MISSIONS_DIR = DATA_DIR / "missions"
+CHECKPOINT_FILE = DATA_DIR / "migration_checkpoint.json"
+
+# Rows per statement (and commit), and texts per embedding model call
+BATCH_SIZE = 2000
+EMBED_BATCH_SIZE = 256
+
+# Tables whose secondary indexes are dropped for the load and rebuilt after
+DEFERRED_INDEX_TABLES = ('nodes', 'episodes')
+
+
+def load_checkpoint() -> dict:
+    try:
+        with open(CHECKPOINT_FILE) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def save_checkpoint(checkpoint: dict):
+    """Replace the checkpoint atomically, so a crash leaves the previous one"""
+    tmp = CHECKPOINT_FILE.with_suffix('.tmp')
+    with open(tmp, 'w') as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp, CHECKPOINT_FILE)
+
+
+def chunks(items, size: int):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def rate(count: int, started: float) -> str:
+    elapsed = time.monotonic() - started
+    return f"{elapsed:.1f}s, {count / elapsed if elapsed > 0 else 0:.0f}/s"
+
+
+def write_rows(pg_memory, sql: str, rows: list, describe, template: str = None) -> int:
+    """
+    Write rows with one statement and commit; returns the rows affected.
+    If the statement fails, the rows are retried one at a time so a bad row
+    is reported and skipped instead of failing its whole batch. Lost
+    connections are raised: the checkpoint lets a rerun pick up from here.
+    """
+    from psycopg2 import Error
+    from psycopg2.extras import execute_values
+    from jarvis_memory_pg import CONNECTION_ERRORS
+    
+    try:
+        with pg_memory.batch(), pg_memory.conn.cursor() as cur:
+            execute_values(cur, sql, rows, template=template, page_size=len(rows))
+            return cur.rowcount
+    except CONNECTION_ERRORS:
+        raise
+    except Error as e:
+        if len(rows) == 1:
+            print(f"  Error migrating {describe(rows[0])}: {str(e).strip()}")
+            return 0
+    
+    return sum(write_rows(pg_memory, sql, [row], describe, template) for row in rows)
+
+
+def drop_indexes(pg_memory, checkpoint: dict):
+    """Drop the secondary indexes of DEFERRED_INDEX_TABLES, recording them in the checkpoint first"""
+    with pg_memory.batch(), pg_memory.conn.cursor() as cur:
+        # Indexes backing primary keys and unique constraints stay
+        cur.execute("""
+            SELECT i.indexname, i.indexdef FROM pg_indexes i
+            WHERE i.schemaname = current_schema() AND i.tablename = ANY(%s)
+              AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conname = i.indexname)
+        """, (list(DEFERRED_INDEX_TABLES),))
+        indexes = dict(cur.fetchall())
+        if not indexes:
+            return
+        checkpoint.setdefault('indexes', {}).update(indexes)
+        save_checkpoint(checkpoint)
+        for name in indexes:
+            cur.execute(f'DROP INDEX IF EXISTS "{name}"')
+    print(f"Deferred {len(indexes)} indexes until the data is loaded")
+
+
+def restore_indexes(pg_memory, checkpoint: dict, vector: bool):
+    """Rebuild the indexes drop_indexes() removed: vector indexes, or all the others"""
+    indexes = {name: definition for name, definition in checkpoint.get('indexes', {}).items()
+               if bool(re.search(r"USING (hnsw|ivfflat)", definition)) == vector}
+    for name, definition in indexes.items():
+        started = time.monotonic()
+        with pg_memory.batch(), pg_memory.conn.cursor() as cur:
+            cur.execute(re.sub(r"^CREATE (UNIQUE )?INDEX ", r"CREATE \1INDEX IF NOT EXISTS ", definition))
+        print(f"  Built {name} in {time.monotonic() - started:.1f}s")
+        del checkpoint['indexes'][name]
+        save_checkpoint(checkpoint)
+
+
+def count_episodes() -> int:
+    """
+    Episodes in EPISODES_DIR, counted without opening an EpisodeStore (which
+    would index the directory and move ep_*.json files into segments)
+    """
+    ids = set()
+    for segment in EPISODES_DIR.glob("episodes_*.jsonl"):
+        with open(segment, 'rb') as f:
+            for line in f:
+                try:
+                    ids.add(json.loads(line)['id'])
+                except (ValueError, KeyError, TypeError):
+                    pass  # torn or corrupt record
+    for episode_file in EPISODES_DIR.glob("ep_*.json"):
+        try:
+            with open(episode_file, 'r') as f:
+                ids.add(json.load(f)['id'])
+        except (ValueError, KeyError, TypeError):
+            pass
+    return len(ids)
+
 
-def migrate_to_postgres(dry_run: bool = False, generate_embeddings: bool = True):
+def migrate_to_postgres(dry_run: bool = False, generate_embeddings: bool = True,
+                        restart: bool = False, batch_size: int = BATCH_SIZE,
+                        defer_indexes: bool = True):
     """Migrate all data from JSON to PostgreSQL"""
     
     # Import PostgreSQL backend
     sys.path.insert(0, str(Path(__file__).parent))
+    # Vector indexes are built once after the embeddings, not while loading
+    os.environ.setdefault('JARVIS_VECTOR_INDEX_AUTO', '0')
     
     try:
         from jarvis_memory_pg import JarvisMemoryPG, Episode, Mission
@@ -41,9 +175,18 @@ def migrate_to_postgres(dry_run: bool = False, generate_embeddings: bool = True)
     print(f"Generate embeddings: {generate_embeddings}")
     print()
     
+    checkpoint = {}
     if dry_run:
         print("[DRY RUN] No changes will be made to the database")
         print()
+    else:
+        checkpoint = load_checkpoint()
+        if restart:
+            # Indexes dropped by the interrupted run still need rebuilding
+            checkpoint = {'indexes': checkpoint.get('indexes', {})}
+        elif checkpoint:
+            print(f"Resuming from {CHECKPOINT_FILE} (--restart to start over)")
+            print()
     
     # Initialize PostgreSQL connection
     if not dry_run:
@@ -54,66 +197,88 @@ def migrate_to_postgres(dry_run: bool = False, generate_embeddings: bool = True)
             print(f"Error connecting to PostgreSQL: {e}")
             print("Make sure the database is running: ./docker/start-db.sh start")
             sys.exit(1)
+        if defer_indexes:
+            drop_indexes(pg_memory, checkpoint)
+    
+    migration_started = time.monotonic()
     
     # Migrate knowledge graph (nodes and edges)
     print("\n--- Migrating Knowledge Graph ---")
     nodes_migrated = 0
     edges_migrated = 0
     
-    if GRAPH_FILE.exists():
-        with open(GRAPH_FILE, 'r') as f:
-            graph_data = json.load(f)
+    if GRAPH_FILE.exists() or GRAPH_LOG_FILE.exists() or LEGACY_GRAPH_FILE.exists():
+        # Snapshot plus the changes logged since it was written, read without
+        # converting or compacting the source files
+        from jarvis_memory import read_graph
+        graph = read_graph(GRAPH_FILE, GRAPH_LOG_FILE, LEGACY_GRAPH_FILE)
         
-        nodes = graph_data.get('nodes', [])
-        edges = graph_data.get('edges', [])
+        nodes = [{'id': node_id, **attrs} for node_id, attrs in graph.nodes(data=True)]
+        edges = [{'source': u, 'target': v, 'key': key, **attrs}
+                 for u, v, key, attrs in graph.edges(keys=True, data=True)]
         
         print(f"Found {len(nodes)} nodes and {len(edges)} edges")
         
         if not dry_run:
-            with pg_memory.conn.cursor() as cur:
-                # Migrate nodes
-                for node in nodes:
+            # Migrate nodes
+            core_fields = {'id', 'type', 'name', 'category', 'created_at', 'updated_at'}
+            done = checkpoint.get('nodes', 0)
+            started = time.monotonic()
+            for batch in chunks(nodes[done:], batch_size):
+                rows = {}  # by id: a statement can't upsert the same row twice
+                for node in batch:
                     node_id = node.get('id')
-                    node_type = node.get('type', 'unknown')
                     name = node.get('name', node_id.split(':')[-1] if ':' in node_id else node_id)
-                    category = node.get('category')
-                    
-                    # Extract attributes (everything except core fields)
-                    core_fields = {'id', 'type', 'name', 'category', 'created_at', 'updated_at'}
+                    # Attributes are everything except core fields
                     attributes = {k: v for k, v in node.items() if k not in core_fields}
-                    
-                    try:
-                        cur.execute("""
-                            INSERT INTO nodes (id, node_type, name, category, attributes)
-                            VALUES (%s, %s, %s, %s, %s)
-                            ON CONFLICT (id) DO UPDATE SET
-                                name = EXCLUDED.name,
-                                category = EXCLUDED.category,
-                                attributes = nodes.attributes || EXCLUDED.attributes
-                        """, (node_id, node_type, name, category, json.dumps(attributes)))
-                        nodes_migrated += 1
-                    except Exception as e:
-                        print(f"  Error migrating node {node_id}: {e}")
-                
-                # Migrate edges
-                for edge in edges:
-                    source = edge.get('source')
-                    target = edge.get('target')
-                    edge_type = edge.get('type', 'relates_to')
-                    
-                    attributes = {k: v for k, v in edge.items() 
+                    rows[node_id] = (node_id, node.get('type', 'unknown'), name,
+                                     node.get('category'), json.dumps(attributes))
+                nodes_migrated += write_rows(pg_memory, """
+                    INSERT INTO nodes (id, node_type, name, category, attributes)
+                    VALUES %s
+                    ON CONFLICT (id) DO UPDATE SET
+                        name = EXCLUDED.name,
+                        category = EXCLUDED.category,
+                        attributes = nodes.attributes || EXCLUDED.attributes
+                """, list(rows.values()), lambda row: f"node {row[0]}")
+                done += len(batch)
+                checkpoint['nodes'] = done
+                save_checkpoint(checkpoint)
+            if nodes_migrated:
+                print(f"  Nodes: {nodes_migrated} ({rate(nodes_migrated, started)})")
+            
+            # Migrate edges; ones already present (written by an earlier run)
+            # or pointing at a missing node are skipped
+            done = checkpoint.get('edges', 0)
+            skipped = 0
+            started = time.monotonic()
+            for batch in chunks(edges[done:], batch_size):
+                rows = []
+                for edge in batch:
+                    attributes = {k: v for k, v in edge.items()
                                   if k not in {'source', 'target', 'key', 'type', 'created_at'}}
-                    
-                    try:
-                        cur.execute("""
-                            INSERT INTO edges (source_id, target_id, edge_type, attributes)
-                            VALUES (%s, %s, %s, %s)
-                        """, (source, target, edge_type, json.dumps(attributes)))
-                        edges_migrated += 1
-                    except Exception as e:
-                        print(f"  Error migrating edge {source}->{target}: {e}")
-                
-                pg_memory.conn.commit()
+                    rows.append((edge.get('source'), edge.get('target'),
+                                 edge.get('type', 'relates_to'), json.dumps(attributes)))
+                written = write_rows(pg_memory, """
+                    INSERT INTO edges (source_id, target_id, edge_type, attributes)
+                    SELECT v.source, v.target, v.type, v.attributes::jsonb
+                    FROM (VALUES %s) AS v(source, target, type, attributes)
+                    WHERE EXISTS (SELECT 1 FROM nodes WHERE id = v.source)
+                      AND EXISTS (SELECT 1 FROM nodes WHERE id = v.target)
+                      AND NOT EXISTS (
+                          SELECT 1 FROM edges e
+                          WHERE e.source_id = v.source AND e.target_id = v.target
+                            AND e.edge_type = v.type AND e.attributes = v.attributes::jsonb
+                      )
+                """, rows, lambda row: f"edge {row[0]}->{row[1]}")
+                edges_migrated += written
+                skipped += len(rows) - written
+                done += len(batch)
+                checkpoint['edges'] = done
+                save_checkpoint(checkpoint)
+            if edges_migrated or skipped:
+                print(f"  Edges: {edges_migrated} ({rate(edges_migrated, started)}), "
+                      f"{skipped} already present or dangling")
         
         print(f"Migrated {nodes_migrated} nodes, {edges_migrated} edges")
     else:
@@ -123,67 +288,58 @@ def migrate_to_postgres(dry_run: bool = False, generate_embeddings: bool = True)
     print("\n--- Migrating Episodes ---")
     episodes_migrated = 0
     
-    if EPISODES_DIR.exists():
-        episode_files = list(EPISODES_DIR.glob("ep_*.json"))
-        print(f"Found {len(episode_files)} episode files")
-        
-        for ep_file in episode_files:
-            try:
-                with open(ep_file, 'r') as f:
-                    ep_data = json.load(f)
-                
-                if not dry_run:
-                    # Create episode in PostgreSQL
-                    timestamp = datetime.fromtimestamp(ep_data.get('timestamp', 0))
-                    
-                    # Generate embedding if requested
-                    embedding = None
-                    if generate_embeddings and hasattr(pg_memory, '_get_embedding'):
-                        embed_text = ep_data.get('summary', '')
-                        if ep_data.get('transcription'):
-                            embed_text += ' ' + ep_data['transcription']
-                        embedding = pg_memory._get_embedding(embed_text)
-                    
-                    with pg_memory.conn.cursor() as cur:
-                        cur.execute("""
-                            INSERT INTO episodes (
-                                id, timestamp, episode_type, summary, importance,
-                                video_path, audio_path, image_path, transcription,
-                                detected_objects, entities_mentioned, mission_id, 
-                                metadata, embedding
-                            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                            ON CONFLICT (id) DO UPDATE SET
-                                summary = EXCLUDED.summary,
-                                metadata = episodes.metadata || EXCLUDED.metadata
-                        """, (
-                            ep_data.get('id'),
-                            timestamp,
-                            ep_data.get('episode_type', 'observation'),
-                            ep_data.get('summary', ''),
-                            ep_data.get('importance', 0.5),
-                            ep_data.get('video_path'),
-                            ep_data.get('audio_path'),
-                            ep_data.get('image_path'),
-                            ep_data.get('transcription'),
-                            ep_data.get('detected_objects', []),
-                            ep_data.get('entities_mentioned', []),
-                            ep_data.get('mission_id'),
-                            json.dumps(ep_data.get('metadata', {})),
-                            embedding
-                        ))
-                    
-                episodes_migrated += 1
-                
-                if episodes_migrated % 100 == 0:
-                    print(f"  Migrated {episodes_migrated} episodes...")
-                    if not dry_run:
-                        pg_memory.conn.commit()
-                        
-            except Exception as e:
-                print(f"  Error migrating {ep_file.name}: {e}")
+    if EPISODES_DIR.exists() and dry_run:
+        episodes_migrated = count_episodes()
+        print(f"Found {episodes_migrated} episodes")
+    elif EPISODES_DIR.exists():
+        # Segments plus any per-episode files from older versions (opening
+        # the store indexes them and moves those files into segments)
+        from jarvis_memory import EpisodeStore
+        store = EpisodeStore(EPISODES_DIR, EPISODE_INDEX_FILE)
+        print(f"Found {store.count()} episodes")
         
-        if not dry_run:
-            pg_memory.conn.commit()
+        # Newest first: everything newer than the checkpoint is already in
+        before = checkpoint.get('episodes_before')
+        if before is not None:
+            print(f"  {checkpoint.get('episodes', 0)} migrated by an earlier run")
+        started = time.monotonic()
+        for batch in chunks(store.iter_episodes(end=before), batch_size):
+            rows = {}
+            for episode in batch:
+                # Fields read directly: to_dict() deep-copies every episode
+                rows[episode.id] = (
+                    episode.id,
+                    datetime.fromtimestamp(episode.timestamp or 0),
+                    episode.episode_type or 'observation',
+                    episode.summary or '',
+                    episode.importance,
+                    episode.video_path,
+                    episode.audio_path,
+                    episode.image_path,
+                    episode.transcription,
+                    episode.detected_objects or [],
+                    episode.entities_mentioned or [],
+                    episode.mission_id,
+                    json.dumps(episode.metadata or {})
+                )
+            
+            episodes_migrated += write_rows(pg_memory, """
+                INSERT INTO episodes (
+                    id, timestamp, episode_type, summary, importance,
+                    video_path, audio_path, image_path, transcription,
+                    detected_objects, entities_mentioned, mission_id,
+                    metadata
+                ) VALUES %s
+                ON CONFLICT (id) DO UPDATE SET
+                    summary = EXCLUDED.summary,
+                    metadata = episodes.metadata || EXCLUDED.metadata
+            """, list(rows.values()), lambda row: row[0],
+                template="(%s, %s, %s, %s, %s, %s, %s, %s, %s, %s::text[], %s::text[], %s, %s)")
+            
+            checkpoint['episodes_before'] = batch[-1].timestamp
+            checkpoint['episodes'] = checkpoint.get('episodes', 0) + len(batch)
+            save_checkpoint(checkpoint)
+            print(f"  Migrated {episodes_migrated} episodes ({rate(episodes_migrated, started)})")
         
         print(f"Migrated {episodes_migrated} episodes")
     else:
@@ -201,58 +357,82 @@ def migrate_to_postgres(dry_run: bool = False, generate_embeddings: bool = True)
             
             print(f"Found {len(missions_data)} missions")
             
-            if not dry_run:
-                for m_data in missions_data:
-                    try:
-                        created_at = m_data.get('created_at')
-                        if isinstance(created_at, (int, float)):
-                            created_at = datetime.fromtimestamp(created_at)
-                        
-                        completed_at = m_data.get('completed_at')
-                        if completed_at and isinstance(completed_at, (int, float)):
-                            completed_at = datetime.fromtimestamp(completed_at)
-                        
-                        with pg_memory.conn.cursor() as cur:
-                            cur.execute("""
-                                INSERT INTO missions (
-                                    id, objective, mission_type, status, priority,
-                                    created_at, completed_at, target_entities,
-                                    trigger_conditions, results
-                                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                                ON CONFLICT (id) DO UPDATE SET
-                                    status = EXCLUDED.status,
-                                    results = EXCLUDED.results
-                            """, (
-                                m_data.get('id'),
-                                m_data.get('objective', ''),
-                                m_data.get('mission_type', 'general'),
-                                m_data.get('status', 'active'),
-                                m_data.get('priority', 'normal'),
-                                created_at,
-                                completed_at,
-                                m_data.get('target_entities', []),
-                                json.dumps(m_data.get('trigger_conditions', {})),
-                                json.dumps(m_data.get('results', []))
-                            ))
-                        missions_migrated += 1
-                    except Exception as e:
-                        print(f"  Error migrating mission {m_data.get('id')}: {e}")
+            rows = {}
+            for m_data in missions_data:
+                created_at = m_data.get('created_at')
+                if isinstance(created_at, (int, float)):
+                    created_at = datetime.fromtimestamp(created_at)
+                
+                completed_at = m_data.get('completed_at')
+                if completed_at and isinstance(completed_at, (int, float)):
+                    completed_at = datetime.fromtimestamp(completed_at)
                 
-                pg_memory.conn.commit()
+                rows[m_data.get('id')] = (
+                    m_data.get('id'),
+                    m_data.get('objective', ''),
+                    m_data.get('mission_type', 'general'),
+                    m_data.get('status', 'active'),
+                    m_data.get('priority', 'normal'),
+                    created_at,
+                    completed_at,
+                    m_data.get('target_entities', []),
+                    json.dumps(m_data.get('trigger_conditions', {})),
+                    json.dumps(m_data.get('results', []))
+                )
             
-            print(f"Migrated {missions_migrated} missions")
+            if not dry_run and rows:
+                missions_migrated = write_rows(pg_memory, """
+                    INSERT INTO missions (
+                        id, objective, mission_type, status, priority,
+                        created_at, completed_at, target_entities,
+                        trigger_conditions, results
+                    ) VALUES %s
+                    ON CONFLICT (id) DO UPDATE SET
+                        status = EXCLUDED.status,
+                        results = EXCLUDED.results
+                """, list(rows.values()), lambda row: f"mission {row[0]}",
+                    template="(%s, %s, %s, %s, %s, %s, %s, %s::text[], %s, %s)")
             
+            print(f"Migrated {missions_migrated} missions")
+        
         except Exception as e:
             print(f"Error loading missions file: {e}")
     else:
         print("No missions file found")
     
+    loaded = nodes_migrated + edges_migrated + episodes_migrated + missions_migrated
+    load_time = time.monotonic() - migration_started
+    
+    if not dry_run and checkpoint.get('indexes'):
+        print("\n--- Building Indexes ---")
+        restore_indexes(pg_memory, checkpoint, vector=False)
+    
+    # Embed everything migrated without an embedding, in large batches
+    embeddings_generated = 0
+    if generate_embeddings and not dry_run:
+        print("\n--- Generating Embeddings ---")
+        started = time.monotonic()
+        embeddings_generated = pg_memory.backfill_embeddings(batch_size=EMBED_BATCH_SIZE)
+        print(f"Embedded {embeddings_generated} rows ({rate(embeddings_generated, started)})")
+    
+    if not dry_run:
+        print("\n--- Building Vector Indexes ---")
+        restore_indexes(pg_memory, checkpoint, vector=True)
+        for table, action in pg_memory.ensure_vector_indexes().items():
+            print(f"  {table}: {action}")
+        # Everything is in: the next run starts from scratch
+        CHECKPOINT_FILE.unlink(missing_ok=True)
+    
     # Summary
     print("\n=== Migration Summary ===")
     print(f"Nodes: {nodes_migrated}")
     print(f"Edges: {edges_migrated}")
     print(f"Episodes: {episodes_migrated}")
     print(f"Missions: {missions_migrated}")
+    print(f"Embeddings: {embeddings_generated}")
+    print(f"Loaded {loaded} rows in {load_time:.1f}s "
+          f"({loaded / load_time if load_time > 0 else 0:.0f} rows/s), "
+          f"{time.monotonic() - migration_started:.1f}s in total")
     
     if not dry_run:
         # Show database stats
@@ -280,16 +460,24 @@ def main():
     parser.add_argument("--dry-run", action="store_true",
                        help="Show what would be migrated without making changes")
     parser.add_argument("--no-embeddings", action="store_true",
-                       help="Skip generating vector embeddings (faster, but no semantic search)")
+                       help="Skip generating vector embeddings (backfill later with: jarvis_memory_pg.py backfill-embeddings)")
+    parser.add_argument("--restart", action="store_true",
+                       help="Ignore the checkpoint of an interrupted run and migrate everything again")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE,
+                       help=f"Rows written per statement and commit (default: {BATCH_SIZE})")
+    parser.add_argument("--keep-indexes", action="store_true",
+                       help="Maintain indexes during the load instead of rebuilding them after")
     
     args = parser.parse_args()
     
     migrate_to_postgres(
         dry_run=args.dry_run,
-        generate_embeddings=not args.no_embeddings
+        generate_embeddings=not args.no_embeddings,
+        restart=args.restart,
+        batch_size=args.batch_size,
+        defer_indexes=not args.keep_indexes
     )
 
 
 if __name__ == "__main__":
     main()
-
@@ -8,12 +8,59 @@
 import { LLMTool } from "../../type";
 import { exec } from "child_process";
 import { promisify } from "util";
+import * as net from "net";
 import path from "path";
 
 const execAsync = promisify(exec);
 
 const KNOWLEDGE_SCRIPT = path.join(__dirname, "../../../python/knowledge_base.py");
 
+// Query daemon started with `knowledge_base.py serve`
+const DAEMON_HOST = process.env.JARVIS_KB_HOST || "127.0.0.1";
+const DAEMON_PORT = parseInt(process.env.JARVIS_KB_PORT || "5610", 10);
+
+/**
+ * Send one JSON-lines request to the knowledge daemon.
+ * Resolves null if the daemon isn't running so callers can fall back to the CLI.
+ */
+function sendDaemonRequest(request: object, timeoutMs: number): Promise<any | null> {
+  return new Promise((resolve) => {
+    const client = new net.Socket();
+    let buffer = "";
+    let resolved = false;
+
+    const finish = (value: any | null) => {
+      if (!resolved) {
+        resolved = true;
+        clearTimeout(timeout);
+        client.destroy();
+        resolve(value);
+      }
+    };
+
+    const timeout = setTimeout(() => finish(null), timeoutMs);
+
+    client.connect(DAEMON_PORT, DAEMON_HOST, () => {
+      client.write(JSON.stringify(request) + "\n");
+    });
+
+    client.on("data", (data) => {
+      buffer += data.toString("utf-8");
+      const newline = buffer.indexOf("\n");
+      if (newline >= 0) {
+        try {
+          finish(JSON.parse(buffer.slice(0, newline)));
+        } catch {
+          finish(null);
+        }
+      }
+    });
+
+    client.on("error", () => finish(null));
+    client.on("close", () => finish(null));
+  });
+}
+
 const knowledgeTools: LLMTool[] = [
   {
     type: "function",
@@ -42,41 +89,48 @@ const knowledgeTools: LLMTool[] = [
         
         console.log(`[Knowledge] Searching for: ${query}`);
         
-        const command = `python3 ${KNOWLEDGE_SCRIPT} search "${query.replace(/"/g, '\\"')}" --limit ${maxResults} --json`;
+        let results: any[];
+        // Only the best-matching passages (within a token budget) go into the prompt;
+        // hybrid keyword + semantic ranking copes better with paraphrased or misheard questions
+        const reply = await sendDaemonRequest({ cmd: "passages", query, limit: maxResults, mode: "hybrid" }, 10000);
         
-        const { stdout, stderr } = await execAsync(command, { 
-          timeout: 30000,
-          maxBuffer: 1024 * 1024
-        });
-        
-        if (stderr) {
-          console.log("[Knowledge] Stderr:", stderr);
-        }
-        
-        try {
-          const results = JSON.parse(stdout);
-          
-          if (!results || results.length === 0) {
-            return `No information found for "${query}" in the knowledge base.`;
-          }
+        if (reply && reply.success) {
+          results = reply.results;
+        } else {
+          // Without the daemon every call is a fresh process, and hybrid ranking
+          // would load the embedding model each time: keyword ranking only
+          const command = `python3 ${KNOWLEDGE_SCRIPT} passages "${query.replace(/"/g, '\\"')}" --limit ${maxResults} --mode keyword --json`;
           
-          let response = `Knowledge Base Results for "${query}":\n\n`;
+          const { stdout, stderr } = await execAsync(command, { 
+            timeout: 30000,
+            maxBuffer: 1024 * 1024
+          });
           
-          for (const result of results) {
-            response += `**${result.title}**\n`;
-            // Truncate content to reasonable length
-            const content = result.content || result.text || "";
-            const truncated = content.length > 500 ? content.substring(0, 500) + "..." : content;
-            response += `${truncated}\n\n`;
+          if (stderr) {
+            console.log("[Knowledge] Stderr:", stderr);
           }
           
-          return response;
-          
-        } catch (parseError) {
-          // If not JSON, return raw output
-          return stdout || `No results found for "${query}".`;
+          try {
+            results = JSON.parse(stdout);
+          } catch (parseError) {
+            // If not JSON, return raw output
+            return stdout || `No results found for "${query}".`;
+          }
+        }
+        
+        if (!results || results.length === 0) {
+          return `No information found for "${query}" in the knowledge base.`;
+        }
+        
+        let response = `Knowledge Base Results for "${query}":\n\n`;
+        
+        for (const result of results) {
+          response += result.section ? `**${result.title}** (${result.section})\n` : `**${result.title}**\n`;
+          response += `${result.passage || result.summary || ""}\n\n`;
         }
         
+        return response;
+        
       } catch (error: any) {
         console.error("[Knowledge] Search error:", error);
         
@@ -111,34 +165,43 @@ const knowledgeTools: LLMTool[] = [
         
         console.log(`[Knowledge] Getting article: ${title}`);
         
-        const command = `python3 ${KNOWLEDGE_SCRIPT} get "${title.replace(/"/g, '\\"')}" --json`;
+        let article: any;
+        const reply = await sendDaemonRequest({ cmd: "get", title }, 10000);
         
-        const { stdout } = await execAsync(command, { 
-          timeout: 15000,
-          maxBuffer: 2 * 1024 * 1024
-        });
-        
-        try {
-          const article = JSON.parse(stdout);
-          
-          if (!article || article.error) {
-            return `Article "${title}" not found in the knowledge base.`;
-          }
-          
-          let response = `**${article.title}**\n\n`;
+        if (reply && !reply.error) {
+          article = reply.article;
+        } else {
+          const command = `python3 ${KNOWLEDGE_SCRIPT} get "${title.replace(/"/g, '\\"')}" --json`;
           
-          // Truncate long articles
-          const content = article.content || article.text || "";
-          const truncated = content.length > 2000 ? content.substring(0, 2000) + "\n\n[Article truncated - " + content.length + " characters total]" : content;
+          const { stdout } = await execAsync(command, { 
+            timeout: 15000,
+            maxBuffer: 2 * 1024 * 1024
+          });
           
-          response += truncated;
-          
-          return response;
-          
-        } catch (parseError) {
-          return stdout || `Article "${title}" not found.`;
+          try {
+            article = JSON.parse(stdout);
+          } catch (parseError) {
+            return stdout || `Article "${title}" not found.`;
+          }
         }
         
+        if (!article || article.error) {
+          return `Article "${title}" not found in the knowledge base.`;
+        }
+        
+        let response = `**${article.title}**\n\n`;
+        if (article.redirected_from) {
+          response = `**${article.title}** (redirected from "${article.redirected_from}")\n\n`;
+        }
+        
+        // Truncate long articles
+        const content = article.content || article.text || "";
+        const truncated = content.length > 2000 ? content.substring(0, 2000) + "\n\n[Article truncated - " + content.length + " characters total]" : content;
+        
+        response += truncated;
+        
+        return response;
+        
       } catch (error: any) {
         console.error("[Knowledge] Get article error:", error);
         return `[error]Failed to get article: ${error.message}`;
@@ -155,28 +218,34 @@ const knowledgeTools: LLMTool[] = [
     },
     func: async () => {
       try {
-        const command = `python3 ${KNOWLEDGE_SCRIPT} stats --json`;
-        
-        const { stdout } = await execAsync(command, { timeout: 10000 });
+        let stats: any;
+        const reply = await sendDaemonRequest({ cmd: "stats" }, 5000);
         
-        try {
-          const stats = JSON.parse(stdout);
+        if (reply && reply.success) {
+          stats = reply.stats;
+        } else {
+          const command = `python3 ${KNOWLEDGE_SCRIPT} stats --json`;
           
-          let response = "Knowledge Base Statistics:\n";
-          response += `- Articles: ${stats.articles?.toLocaleString() || 'N/A'}\n`;
-          response += `- Entities: ${stats.entities?.toLocaleString() || 'N/A'}\n`;
-          response += `- Database Size: ${stats.size || 'N/A'}\n`;
+          const { stdout } = await execAsync(command, { timeout: 10000 });
           
-          if (stats.last_updated) {
-            response += `- Last Updated: ${stats.last_updated}\n`;
+          try {
+            stats = JSON.parse(stdout);
+          } catch (parseError) {
+            return stdout || "Knowledge base statistics unavailable.";
           }
-          
-          return response;
-          
-        } catch (parseError) {
-          return stdout || "Knowledge base statistics unavailable.";
         }
         
+        let response = "Knowledge Base Statistics:\n";
+        response += `- Articles: ${stats.articles?.toLocaleString() || 'N/A'}\n`;
+        response += `- Entities: ${stats.entities?.toLocaleString() || 'N/A'}\n`;
+        response += `- Database Size: ${stats.database_size_mb != null ? stats.database_size_mb + ' MB' : 'N/A'}\n`;
+        
+        if (stats.last_updated) {
+          response += `- Last Updated: ${stats.last_updated}\n`;
+        }
+        
+        return response;
+        
       } catch (error: any) {
         console.error("[Knowledge] Stats error:", error);
         return `[error]Failed to get knowledge base stats: ${error.message}`;
@@ -74,7 +74,8 @@ import os
 from datetime import datetime, timedelta
 from pathlib import Path
 
-EPISODES_DIR = Path(os.path.expanduser("~/optidex/data/memory/episodes"))
+from jarvis_memory import EpisodeStore
+from memory import get_memory, is_postgres
 
 def parse_date(date_str):
     if not date_str:
@@ -148,40 +149,21 @@ if target_date:
         # Default to end of day
         end_ts = (target_date + timedelta(days=1)).timestamp()
 
-# Search episodes
-results = []
-for ep_file in sorted(EPISODES_DIR.glob("ep_*.json"), reverse=True):
-    if len(results) >= max_results * 2:  # Get extra for filtering
-        break
-    try:
-        with open(ep_file, 'r') as f:
-            ep = json.load(f)
-        
-        ts = ep.get('timestamp', 0)
-        
-        # Filter by time range
-        if start_ts and ts < start_ts:
-            continue
-        if end_ts and ts > end_ts:
-            continue
-        
-        # Filter by type
-        if episode_type_filter != 'all' and ep.get('episode_type') != episode_type_filter:
-            continue
-        
-        # Filter by search term
-        if search_term:
-            searchable = (ep.get('summary', '') + ' ' + ep.get('transcription', '') + ' ' + ' '.join(ep.get('detected_objects', []))).lower()
-            if search_term not in searchable:
-                continue
-        
-        results.append(ep)
-        
-    except Exception as e:
-        continue
-
-# Sort by timestamp descending and limit
-results = sorted(results, key=lambda x: x.get('timestamp', 0), reverse=True)[:max_results]
+# Search episodes: one ranked query on PostgreSQL, the episode index otherwise
+search = dict(
+    query=search_term or None,
+    episode_type=None if episode_type_filter == 'all' else episode_type_filter,
+    limit=max_results
+)
+if is_postgres():
+    episodes = get_memory().search_episodes(
+        start_time=datetime.fromtimestamp(start_ts) if start_ts else None,
+        end_time=datetime.fromtimestamp(end_ts) if end_ts else None,
+        **search
+    )
+else:
+    episodes = EpisodeStore().search(start=start_ts, end=end_ts, **search)
+results = [episode.to_dict() for episode in episodes]
 
 # Format output
 output = []
@@ -265,32 +247,28 @@ import os
 from datetime import datetime
 from pathlib import Path
 
-EPISODES_DIR = Path(os.path.expanduser("~/optidex/data/memory/episodes"))
+from jarvis_memory import EpisodeStore
 
 search_obj = "${object.replace(/"/g, '\\"').toLowerCase()}"
 max_results = ${maxResults}
 
 results = []
-for ep_file in sorted(EPISODES_DIR.glob("ep_*.json"), reverse=True):
+for episode in EpisodeStore().iter_episodes():
     if len(results) >= max_results:
         break
-    try:
-        with open(ep_file, 'r') as f:
-            ep = json.load(f)
-        
-        # Check detected objects
-        objects = [o.lower() for o in ep.get('detected_objects', [])]
-        summary = ep.get('summary', '').lower()
-        
-        if search_obj in objects or search_obj in summary:
-            dt = datetime.fromtimestamp(ep.get('timestamp', 0))
-            results.append({
-                'datetime': dt.strftime('%Y-%m-%d %H:%M'),
-                'summary': ep.get('summary', '')[:150],
-                'objects': ep.get('detected_objects', [])
-            })
-    except:
-        continue
+    ep = episode.to_dict()
+    
+    # Check detected objects
+    objects = [o.lower() for o in ep.get('detected_objects', [])]
+    summary = ep.get('summary', '').lower()
+    
+    if search_obj in objects or search_obj in summary:
+        dt = datetime.fromtimestamp(ep.get('timestamp', 0))
+        results.append({
+            'datetime': dt.strftime('%Y-%m-%d %H:%M'),
+            'summary': ep.get('summary', '')[:150],
+            'objects': ep.get('detected_objects', [])
+        })
 
 print(json.dumps({'count': len(results), 'sightings': results}))
 `);
@@ -349,32 +327,20 @@ import time
 from datetime import datetime
 from pathlib import Path
 
-EPISODES_DIR = Path(os.path.expanduser("~/optidex/data/memory/episodes"))
+from jarvis_memory import EpisodeStore
 
 cutoff_ts = time.time() - (${lookbackHours} * 3600)
 max_results = ${maxResults}
 
 results = []
-for ep_file in sorted(EPISODES_DIR.glob("ep_*.json"), reverse=True):
-    if len(results) >= max_results:
-        break
-    try:
-        with open(ep_file, 'r') as f:
-            ep = json.load(f)
-        
-        ts = ep.get('timestamp', 0)
-        if ts < cutoff_ts:
-            continue
-        
-        dt = datetime.fromtimestamp(ts)
-        results.append({
-            'time': dt.strftime('%H:%M'),
-            'date': dt.strftime('%Y-%m-%d'),
-            'type': ep.get('episode_type'),
-            'summary': ep.get('summary', '')[:100]
-        })
-    except:
-        continue
+for episode in EpisodeStore().iter_episodes(start=cutoff_ts, limit=max_results):
+    dt = datetime.fromtimestamp(episode.timestamp)
+    results.append({
+        'time': dt.strftime('%H:%M'),
+        'date': dt.strftime('%Y-%m-%d'),
+        'type': episode.episode_type,
+        'summary': episode.summary[:100]
+    })
 
 print(json.dumps({'count': len(results), 'activities': results}))
 `);